@@ -0,0 +1,388 @@
+"""Headless batch OCR: python -m OCR_Modules.batch <inputs> --engine paddle --output-dir out/
+
+Only the selected OCR engine is imported, and nothing from the GUI stack
+(tkinter, ttkbootstrap, keyboard, win32), so this runs on a plain Linux server.
+"""
+import argparse
+import glob
+import logging
+import os
+import shutil
+import sys
+import time
+
+from OCR_Modules import instrumentation
+from OCR_Modules.instrumentation import trace_image
+from OCR_Modules.ocr_cache import OCRCache
+from OCR_Modules.page_source import is_document, process_document
+from OCR_Modules.table_layout import group_into_grid
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+# PDFs and multi-frame TIFFs are OCR'd page by page into one workbook
+INPUT_EXTENSIONS = IMAGE_EXTENSIONS + ('.pdf',)
+
+def collect_inputs(patterns, recursive=False):
+    """Expand directories and glob patterns into a sorted list of image and PDF files."""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            if recursive:
+                for root, dirs, names in os.walk(pattern):
+                    files.update(os.path.join(root, name) for name in names)
+            else:
+                files.update(os.path.join(pattern, name) for name in os.listdir(pattern))
+        else:
+            files.update(glob.glob(pattern, recursive=recursive))
+    return sorted(f for f in files if os.path.isfile(f) and f.lower().endswith(INPUT_EXTENSIONS))
+
+def output_paths(file_path, output_dir=None):
+    # Same naming as the GUI so outputs are interchangeable
+    output_dir = output_dir or os.path.dirname(os.path.abspath(file_path))
+    base_filename = os.path.splitext(os.path.basename(file_path))[0]
+    output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
+    output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
+    return output_xlsx, output_image_path
+
+def is_up_to_date(file_path, outputs):
+    """True when every output exists and is newer than the input image."""
+    source_mtime = os.path.getmtime(file_path)
+    return all(os.path.exists(path) and os.path.getmtime(path) >= source_mtime for path in outputs)
+
+def load_engine(engine, model_dir=None, tesseract_cmd=None, tesseract_backend='auto', program_cache=None,
+                backend='paddle'):
+    """Return (ocr module, engine pool, cache identity) for the selected engine
+    without touching the other one. backend picks PaddleOCR's inference runtime."""
+    from OCR_Modules.engine_pool import get_paddle_pool, get_tesseract_pool
+    from OCR_Modules.ocr_cache import model_files
+
+    if engine == 'paddle':
+        from OCR_Modules import paddleOCR as module
+        from OCR_Modules.onnx_backend import ocr_cache_params
+        cache_id = ('PaddleOCR', model_files(model_dir or module.default_model_dir()), ocr_cache_params(backend))
+        pool = get_paddle_pool(model_dir=model_dir, program_cache=program_cache, backend=backend)
+        return module, pool, cache_id
+
+    from OCR_Modules import tesseractOCR as module
+    if tesseract_cmd is None and not os.path.exists(module.pytesseract.pytesseract.tesseract_cmd):
+        # Outside the Windows bundle fall back to a tesseract on PATH
+        tesseract_cmd = shutil.which('tesseract')
+    traineddata = os.path.join(os.environ.get('TESSDATA_PREFIX', ''), 'eng.traineddata')
+    pool = get_tesseract_pool(tesseract_cmd=tesseract_cmd, backend=tesseract_backend)
+    # Tesseract loads quickly; create the engine now so the cache key names the backend actually used
+    with pool.engine() as ocr:
+        params = module.engine_params(ocr)
+    cache_id = ('Tesseract', [traineddata], params)
+    return module, pool, cache_id
+
+def write_outputs(file_path, data, module, output_dir=None, green_threshold=0.97,
+                  yellow_threshold=0.92, draw_boxes=True):
+    """Rebuild the table grid and write the xlsx (and bounding box image)."""
+    output_xlsx, output_image_path = output_paths(file_path, output_dir)
+    os.makedirs(os.path.dirname(output_xlsx), exist_ok=True)
+
+    if not data:
+        raise ValueError("No data extracted from image.")
+    rows = group_into_grid(data)
+    module.save_as_xlsx(rows, output_xlsx, green_threshold, yellow_threshold)
+    if draw_boxes:
+        module.draw_bounding_boxes(file_path, data, output_image_path)
+    return output_xlsx
+
+def process_file(file_path, module, ocr, output_dir=None, green_threshold=0.97,
+                 yellow_threshold=0.92, draw_boxes=True, tiling=None):
+    """Run one image through process_image -> group_into_grid -> save_as_xlsx."""
+    data = _ocr_function(module, tiling)(file_path, ocr)
+    return write_outputs(file_path, data, module, output_dir, green_threshold,
+                         yellow_threshold, draw_boxes)
+
+def _ocr_function(module, tiling=None):
+    if tiling is None:
+        return module.process_image
+    return lambda file_path, ocr: module.process_image_tiled(file_path, ocr, **tiling)
+
+def _ocr_sequential(files, module, pool, tiling=None):
+    process_image = _ocr_function(module, tiling)
+    with pool.engine() as ocr:
+        for file_path in files:
+            try:
+                yield file_path, process_image(file_path, ocr), None
+            except Exception as e:
+                yield file_path, None, e
+
+def _ocr_results(files, module, pool, executor=None, cache=None, cache_id=None, tiling=None):
+    """Yield (file_path, data, error) in input order, serving cache hits without OCR."""
+    from OCR_Modules.ocr_cache import make_key
+
+    keys = {}
+    cached = {}
+    if cache is not None and cache.enabled:
+        engine, model_files, params = cache_id
+        for file_path in files:
+            try:
+                keys[file_path] = make_key(file_path, engine, model_files, params)
+            except OSError as e:
+                # Unreadable image or model file: OCR it uncached (and report the image error there)
+                logger.warning(f"Could not build OCR cache key for {file_path}: {str(e)}")
+                continue
+            cached[file_path] = cache.get(keys[file_path])
+    misses = [file_path for file_path in files if cached.get(file_path) is None]
+
+    # OCR either runs here on one warm engine or in the worker processes (results stay in order)
+    if executor is not None:
+        results = executor.map(misses)
+    else:
+        results = _ocr_sequential(misses, module, pool, tiling)
+
+    try:
+        for file_path in files:
+            # The record stays open while the caller writes the outputs, so one
+            # timing record covers OCR and output stages of each image
+            with trace_image(file_path):
+                if cached.get(file_path) is not None:
+                    yield file_path, cached[file_path], None
+                    continue
+                result = next(results)
+                if result[1] and file_path in keys:
+                    try:
+                        cache.put(keys[file_path], result[1])
+                    except OSError as e:
+                        logger.warning(f"Could not write OCR cache entry: {str(e)}")
+                yield result
+    finally:
+        # Hand the engine back even when --fail-fast stopped early
+        results.close()
+
+def run_document(file_path, module, pool, output_dir=None, green_threshold=0.97, yellow_threshold=0.92,
+                 executor=None, tiling=None, layout='sheets', dpi=None, page_workers=1):
+    """OCR a PDF/multi-frame TIFF page by page into <name>_output.xlsx (no bounding box images)."""
+    output_xlsx, _ = output_paths(file_path, output_dir)
+    os.makedirs(os.path.dirname(output_xlsx), exist_ok=True)
+    if executor is not None:
+        # Pages go to the worker processes; no local engine needed
+        summary = process_document(file_path, None, output_xlsx, green_threshold, yellow_threshold,
+                                   layout=layout, dpi=dpi, executor=executor)
+    else:
+        process_image = _ocr_function(module, tiling)
+        with pool.engine() as ocr:
+            summary = process_document(
+                file_path, lambda page: process_image(page, ocr), output_xlsx,
+                green_threshold, yellow_threshold, layout=layout, dpi=dpi, workers=page_workers
+            )
+    if summary['failed']:
+        page_number, error = summary['failures'][0]
+        raise RuntimeError(f"{summary['failed']} page(s) failed, first was page {page_number}: {error}")
+    return output_xlsx
+
+def run_batch(files, module, pool, output_dir=None, green_threshold=0.97, yellow_threshold=0.92,
+              draw_boxes=True, force=False, fail_fast=False, executor=None, cache=None, cache_id=None,
+              tiling=None, layout='sheets', dpi=None, page_workers=1):
+    summary = {'processed': 0, 'skipped': 0, 'failed': 0, 'failures': []}
+    start = time.perf_counter()
+
+    todo = []
+    documents = []
+    for file_path in files:
+        document = is_document(file_path)
+        outputs = output_paths(file_path, output_dir)
+        if not draw_boxes or document:
+            outputs = outputs[:1]
+        if not force and is_up_to_date(file_path, outputs):
+            summary['skipped'] += 1
+            logger.info(f"{file_path}: up to date, skipped")
+        elif document:
+            documents.append(file_path)
+        else:
+            todo.append(file_path)
+
+    results = _ocr_results(todo, module, pool, executor, cache, cache_id, tiling)
+
+    total = len(todo)
+    file_start = time.perf_counter()
+    for index, (file_path, data, error) in enumerate(results, start=1):
+        try:
+            if error is not None:
+                raise error
+            output_xlsx = write_outputs(file_path, data, module, output_dir,
+                                        green_threshold, yellow_threshold, draw_boxes)
+        except Exception as e:
+            summary['failed'] += 1
+            message = str(e).splitlines()[0] if str(e) else type(e).__name__
+            summary['failures'].append((file_path, message))
+            logger.error(f"[{index}/{total}] {file_path}: FAILED ({message})")
+            if fail_fast:
+                break
+        else:
+            summary['processed'] += 1
+            logger.info(f"[{index}/{total}] {file_path} -> {output_xlsx} "
+                        f"({time.perf_counter() - file_start:.2f}s)")
+        file_start = time.perf_counter()
+    results.close()
+
+    # Documents stream their pages straight into the workbook; pages are not cached
+    for file_path in documents:
+        if fail_fast and summary['failed']:
+            break
+        try:
+            with trace_image(file_path):
+                output_xlsx = run_document(file_path, module, pool, output_dir, green_threshold,
+                                           yellow_threshold, executor, tiling, layout, dpi, page_workers)
+        except Exception as e:
+            summary['failed'] += 1
+            message = str(e).splitlines()[0] if str(e) else type(e).__name__
+            summary['failures'].append((file_path, message))
+            logger.error(f"{file_path}: FAILED ({message})")
+        else:
+            summary['processed'] += 1
+            logger.info(f"{file_path} -> {output_xlsx} ({time.perf_counter() - file_start:.2f}s)")
+        file_start = time.perf_counter()
+
+    summary['elapsed'] = time.perf_counter() - start
+    return summary
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m OCR_Modules.batch',
+        description="OCR table images to Excel without the GUI."
+    )
+    parser.add_argument('inputs', nargs='+', help="Image files, directories or glob patterns")
+    parser.add_argument('--engine', choices=('paddle', 'tesseract'), default='paddle')
+    parser.add_argument('-o', '--output-dir', help="Where to write outputs (default: next to each image)")
+    parser.add_argument('--green', type=int, default=97, help="High confidence threshold in %% (default: 97)")
+    parser.add_argument('--yellow', type=int, default=92, help="Medium confidence threshold in %% (default: 92)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Descend into sub-directories")
+    parser.add_argument('-f', '--force', action='store_true', help="Re-process images whose outputs are up to date")
+    parser.add_argument('--no-boxes', action='store_true', help="Skip the bounding box image")
+    parser.add_argument('--fail-fast', action='store_true', help="Stop at the first failing image")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="PaddleOCR worker processes, each loading its own models, or Tesseract threads "
+                             "for document pages (default: 1)")
+    parser.add_argument('--threads', type=int, help="Inference threads per worker (default: cores / workers)")
+    parser.add_argument('--no-cache', action='store_true', help="Always re-run OCR instead of using cached results")
+    parser.add_argument('--cache-dir', help="OCR result cache directory (default: ~/.ocr_tool/cache)")
+    parser.add_argument('--cache-size', type=int, default=256, help="OCR result cache size limit in MB (default: 256)")
+    parser.add_argument('--model-dir', help="PaddleOCR model directory containing det/, cls/ and rec/ "
+                             "(default: the PaddleOCR install dir, or models/ with --workers)")
+    parser.add_argument('--backend', choices=('paddle', 'onnx', 'onnx-int8'),
+                        default=os.environ.get('OCR_PADDLE_BACKEND') or 'paddle',
+                        help="PaddleOCR inference runtime: Paddle, ONNX Runtime or ONNX Runtime with int8 "
+                             "weights (default: $OCR_PADDLE_BACKEND or paddle)")
+    program_cache = parser.add_mutually_exclusive_group()
+    program_cache.add_argument('--program-cache', action='store_true', default=None,
+                               help="Load Paddle's optimised programs from the on-disk cache instead of running the "
+                                    "graph optimisation at every start (default: $OCR_PROGRAM_CACHE, else off)")
+    program_cache.add_argument('--no-program-cache', dest='program_cache', action='store_false',
+                               help="Run Paddle's graph optimisation at every start")
+    parser.add_argument('--tesseract-cmd', help="Path to the tesseract executable")
+    parser.add_argument('--preprocess', metavar='STEPS',
+                        help="Image pre-processing before OCR: off, or comma separated steps from deskew, denoise, "
+                             "contrast, binarize; each still only runs when the image needs it "
+                             "(default: $OCR_PREPROCESS, or the engine's own steps)")
+    parser.add_argument('--tiled', action='store_true',
+                        help="OCR large scans in overlapping tiles so small text is not downscaled away")
+    parser.add_argument('--tile-size', type=int,
+                        help="Tile size in pixels (default: the detector's input limit for PaddleOCR, 1600 for Tesseract)")
+    parser.add_argument('--tile-overlap', type=int, default=256, help="Overlap between tiles in pixels (default: 256)")
+    parser.add_argument('--pages', choices=('sheets', 'append'), default='sheets',
+                        help="PDF/TIFF pages as one worksheet each, or appended on one sheet (default: sheets)")
+    parser.add_argument('--dpi', type=int, help="Render PDF pages (and rescale TIFF frames) at this dpi "
+                                                "(default: 200 for PDFs, native for TIFFs)")
+    parser.add_argument('--tesseract-backend', choices=('auto', 'tesserocr', 'subprocess'), default='auto',
+                        help="In-process tesserocr API or one tesseract process per image "
+                             "(default: tesserocr when installed)")
+    parser.add_argument('--trace', nargs='?', const=instrumentation.DEFAULT_TRACE_PATH, metavar='PATH',
+                        help="Time every stage per image, print a summary and append the records to PATH "
+                             f"as JSON lines (default: {instrumentation.DEFAULT_TRACE_PATH})")
+    parser.add_argument('--profile', metavar='PATH', help="Profile the whole run into PATH")
+    parser.add_argument('--profiler', choices=('cprofile', 'pyinstrument'), default='cprofile',
+                        help="cprofile writes a .prof file, pyinstrument an HTML report (default: cprofile)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.yellow > args.green:
+        args.yellow = args.green
+
+    files = collect_inputs(args.inputs, recursive=args.recursive)
+    if not files:
+        logger.error("No images found for the given inputs.")
+        return 2
+
+    if args.preprocess is not None:
+        from OCR_Modules.preprocess import default_steps
+        # Through the environment so the --workers processes pick it up too
+        os.environ['OCR_PREPROCESS'] = args.preprocess
+        try:
+            default_steps('paddle')
+        except ValueError as e:
+            logger.error(str(e))
+            return 2
+
+    if args.trace:
+        instrumentation.enable(args.trace)
+
+    parallel = args.engine == 'paddle' and args.workers > 1
+    if parallel:
+        from OCR_Modules.parallel import DEFAULT_MODEL_DIR, ParallelOCRExecutor
+        args.model_dir = args.model_dir or DEFAULT_MODEL_DIR
+
+    tiling = None
+    if args.tiled:
+        tiling = {'overlap': args.tile_overlap}
+        if args.tile_size:
+            tiling['tile_size'] = args.tile_size
+
+    module, pool, cache_id = load_engine(args.engine, model_dir=args.model_dir, tesseract_cmd=args.tesseract_cmd,
+                                         tesseract_backend=args.tesseract_backend,
+                                         program_cache=args.program_cache, backend=args.backend)
+    if tiling is not None:
+        # Tiled results differ from whole-page ones, so keep them apart in the cache
+        cache_id = cache_id[:2] + ({**cache_id[2], 'tiling': tiling},)
+    cache = OCRCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024, enabled=not args.no_cache)
+    executor = None
+    if parallel:
+        executor = ParallelOCRExecutor(workers=args.workers, threads_per_worker=args.threads,
+                                       model_dir=args.model_dir, tiling=tiling,
+                                       program_cache=args.program_cache, backend=args.backend)
+    try:
+        with instrumentation.profiled(args.profile, args.profiler):
+            summary = run_batch(
+                files, module, pool,
+                output_dir=args.output_dir,
+                green_threshold=args.green / 100.0,
+                yellow_threshold=args.yellow / 100.0,
+                draw_boxes=not args.no_boxes,
+                force=args.force,
+                fail_fast=args.fail_fast,
+                executor=executor,
+                cache=cache,
+                cache_id=cache_id,
+                tiling=tiling,
+                layout=args.pages,
+                dpi=args.dpi,
+                # One PaddleOCR engine is not thread safe; Tesseract pages can share one across threads
+                page_workers=args.workers if args.engine == 'tesseract' else 1,
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    logger.info(
+        f"Done in {summary['elapsed']:.1f}s: {summary['processed']} processed, "
+        f"{summary['skipped']} skipped, {summary['failed']} failed (of {len(files)})"
+    )
+    if cache.enabled:
+        cache.log_stats()
+    if instrumentation.is_enabled() and instrumentation.recent:
+        summary_text = instrumentation.format_summary(instrumentation.summarize(instrumentation.recent))
+        logger.info(f"Stage timings:\n{summary_text}")
+    for file_path, error in summary['failures']:
+        logger.info(f"  failed: {file_path}: {error}")
+    return 1 if summary['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
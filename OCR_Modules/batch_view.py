@@ -0,0 +1,80 @@
+import logging
+import os
+import tkinter as tk
+from tkinter import ttk
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATUS_LABELS = {'queued': 'Queued', 'running': 'Running...', 'done': 'Done', 'failed': 'Failed',
+                 'cancelled': 'Cancelled'}
+
+class BatchTable:
+    """Treeview listing the files of a batch with their status and time.
+
+    Rows are updated in place from BatchRunner's on_update; selecting a row
+    calls on_select(item), which is where the result view is filled in, so
+    nothing is loaded for files that are never looked at.
+    """
+
+    def __init__(self, parent, on_select=None, height=8):
+        self.on_select = on_select
+        self.items = {}
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=('status', 'time', 'detail'), height=height,
+                                 selectmode='browse')
+        self.tree.heading('#0', text='File')
+        self.tree.heading('status', text='Status')
+        self.tree.heading('time', text='Time')
+        self.tree.heading('detail', text='Output')
+        self.tree.column('#0', width=260, stretch=False)
+        self.tree.column('status', width=90, stretch=False)
+        self.tree.column('time', width=70, stretch=False, anchor='e')
+        self.tree.column('detail', width=400)
+        for status in ('failed', 'cancelled'):
+            self.tree.tag_configure(status, foreground='#c0392b' if status == 'failed' else 'gray')
+        scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind('<<TreeviewSelect>>', self._selected)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def load(self, items):
+        """Replace the rows with the items of a new batch."""
+        self.tree.delete(*self.tree.get_children())
+        self.items = {}
+        for item in items:
+            iid = str(item.index)
+            self.items[iid] = item
+            self.tree.insert('', tk.END, iid=iid, text=os.path.basename(item.path),
+                             values=self._values(item))
+
+    def update(self, item):
+        iid = str(item.index)
+        if not self.tree.exists(iid):
+            return
+        self.tree.item(iid, values=self._values(item), tags=(item.status,))
+        if item.status == 'running':
+            # Keep the file being worked on in view
+            self.tree.see(iid)
+
+    @staticmethod
+    def _values(item):
+        elapsed = f"{item.elapsed:.1f}s" if item.elapsed is not None else ''
+        if item.error is not None:
+            detail = str(item.error).splitlines()[0] if str(item.error) else type(item.error).__name__
+        elif item.result is not None:
+            detail = item.result.get('xlsx', '')
+        else:
+            detail = ''
+        return STATUS_LABELS[item.status], elapsed, detail
+
+    def _selected(self, event=None):
+        selection = self.tree.selection()
+        if selection and self.on_select is not None:
+            self.on_select(self.items[selection[0]])
@@ -0,0 +1,146 @@
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EnginePool:
+    """Keeps up to `size` warm OCR engines and hands them out with checkout/checkin."""
+
+    def __init__(self, factory, size=1, name='engine'):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.name = name
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.load_time = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _create(self):
+        start = time.perf_counter()
+        try:
+            engine = self.factory()
+        except Exception:
+            # Give the reserved slot back so a later checkout can retry
+            with self._lock:
+                self._created -= 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.load_time += elapsed
+        logger.info(f"[{self.name}] engine {self._created}/{self.size} loaded in {elapsed:.2f}s")
+        return engine
+
+    def checkout(self, timeout=None):
+        try:
+            engine = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    # Reserve the slot before the (slow) load so concurrent callers don't overshoot
+                    self._created += 1
+                    self.misses += 1
+            if can_create:
+                return self._create()
+            # Every instance is busy: wait for one to come back
+            try:
+                engine = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No {self.name} engine became available within {timeout}s")
+        with self._lock:
+            self.hits += 1
+        return engine
+
+    def checkin(self, engine):
+        self._idle.put(engine)
+
+    @contextmanager
+    def engine(self, timeout=None):
+        engine = self.checkout(timeout=timeout)
+        try:
+            yield engine
+        finally:
+            self.checkin(engine)
+
+    def warm_up(self, count=None):
+        """Load engines ahead of time so the first requests don't pay for it."""
+        count = self.size if count is None else min(count, self.size)
+        engines = []
+        try:
+            while len(engines) < count:
+                with self._lock:
+                    if self._created >= count:
+                        break
+                    self._created += 1
+                engines.append(self._create())
+        finally:
+            for engine in engines:
+                self.checkin(engine)
+
+    def resize(self, size):
+        with self._lock:
+            self.size = max(self.size, int(size))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'size': self.size,
+                'loaded': self._created,
+                'idle': self._idle.qsize(),
+                'load_time': round(self.load_time, 3),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+# Process-wide registry so every caller shares the same warm engines
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(key, factory, size=1, name=None):
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = EnginePool(factory, size=size, name=name or str(key))
+            _pools[key] = pool
+        elif size > pool.size:
+            pool.resize(size)
+        return pool
+
+def get_paddle_pool(model_dir=None, size=1, **options):
+    def factory():
+        # Imported lazily so that using the pool doesn't pull in paddle up front
+        from OCR_Modules.paddleOCR import initialize_ocr_SLANet_LCNetV2
+        return initialize_ocr_SLANet_LCNetV2(model_dir=model_dir, **options)
+
+    model_key = os.path.abspath(model_dir) if model_dir else None
+    key = ('PaddleOCR', model_key, tuple(sorted(options.items())))
+    return get_pool(key, factory, size=size, name='PaddleOCR')
+
+def get_tesseract_pool(tesseract_cmd=None, size=1, backend='auto'):
+    def factory():
+        from OCR_Modules.tesseractOCR import initialize_tesseract
+        return initialize_tesseract(tesseract_cmd=tesseract_cmd, backend=backend)
+
+    key = ('Tesseract', tesseract_cmd, backend)
+    return get_pool(key, factory, size=size, name='Tesseract')
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
+
+def log_pool_stats():
+    for stats in pool_stats():
+        logger.info(
+            f"[{stats['name']}] loaded={stats['loaded']}/{stats['size']} "
+            f"load_time={stats['load_time']:.2f}s hits={stats['hits']} misses={stats['misses']}"
+        )
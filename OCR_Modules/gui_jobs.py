@@ -0,0 +1,311 @@
+"""One-at-a-time job runner for the Tk GUIs.
+
+Jobs run on a single worker thread, so two clicks never OCR concurrently
+on one engine. Everything a job reports (progress, result, error) is
+queued and delivered on the Tk thread by a root.after poll, so callbacks
+may touch widgets freely while job functions must not.
+
+    job = scheduler.submit('scan.png', work, path, stages=STAGES,
+                           on_progress=show_progress, on_done=show_result, on_error=show_error)
+
+    def work(job, path):
+        job.stage('Recognising text')    # also the cancellation point
+        ...
+
+A new submission cancels the queued jobs and the running one by default.
+The running job stops at its next stage() or progress() call; whatever it
+returns after being cancelled is dropped.
+
+BatchRunner runs the same kind of job function over many files on a small
+thread pool, reporting a status per file instead of per-stage progress.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    def __init__(self, scheduler, name, function, args, stages=(), on_progress=None, on_done=None, on_error=None,
+                 on_cancelled=None):
+        self.scheduler = scheduler
+        self.name = name
+        self.function = function
+        self.args = args
+        self.stages = tuple(stages)
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+        self.submitted = time.perf_counter()
+        self._cancelled = threading.Event()
+        self._stage_index = 0
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise JobCancelled(self.name)
+
+    def stage(self, name, message=None):
+        """Enter the named stage: progress jumps to its start and `message` (or the name) is shown."""
+        self.check()
+        if name in self.stages:
+            self._stage_index = self.stages.index(name)
+        self._report(0.0, message or f"{name}...")
+
+    def progress(self, fraction, message=None):
+        """Progress within the current stage, 0..1."""
+        self.check()
+        self._report(fraction, message)
+
+    def _report(self, fraction, message):
+        if self.on_progress is None:
+            return
+        if self.stages:
+            percent = 100.0 * (self._stage_index + min(max(fraction, 0.0), 1.0)) / len(self.stages)
+        else:
+            percent = None
+        self.scheduler.call_in_ui(self._deliver, self.on_progress, percent, message)
+
+    def _deliver(self, callback, *args):
+        # A job cancelled after posting this must not update the widgets any more
+        if not self.cancelled:
+            callback(self, *args)
+
+class JobScheduler:
+    """Single worker thread, a bounded queue of pending jobs and a root.after poll.
+
+    max_pending bounds the jobs waiting behind the running one; submit
+    raises queue.Full when it is exceeded without superseding. poll_interval
+    is in ms; 16 ms keeps the UI at 60 fps while a job runs.
+    """
+
+    def __init__(self, root, max_pending=4, poll_interval=16, frame_budget=0.008):
+        self.root = root
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        # Callbacks stop for this poll once they have used this much of the frame (seconds)
+        self.frame_budget = frame_budget
+        self.current = None
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._events = queue.SimpleQueue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='gui-jobs', daemon=True)
+        self._worker.start()
+        self.root.after(self.poll_interval, self._poll)
+
+    def submit(self, name, function, *args, stages=(), on_progress=None, on_done=None, on_error=None,
+               on_cancelled=None, supersede=True):
+        """Queue function(job, *args) on the worker thread and return the Job."""
+        job = Job(self, name, function, args, stages, on_progress, on_done, on_error, on_cancelled)
+        with self._condition:
+            if supersede:
+                self._cancel_locked()
+            elif len(self._pending) >= self.max_pending:
+                raise queue.Full(f"{len(self._pending)} jobs are already waiting")
+            self._pending.append(job)
+            self._condition.notify()
+        return job
+
+    def cancel_all(self):
+        with self._condition:
+            self._cancel_locked()
+
+    def _cancel_locked(self):
+        for job in self._pending:
+            job.cancel()
+            self._post_cancelled(job)
+        self._pending.clear()
+        if self.current is not None:
+            logger.info(f"Cancelling {self.current.name}")
+            self.current.cancel()
+
+    def _post_cancelled(self, job):
+        if job.on_cancelled is not None:
+            self.call_in_ui(job.on_cancelled, job)
+
+    @property
+    def busy(self):
+        with self._condition:
+            return self.current is not None or bool(self._pending)
+
+    def call_in_ui(self, function, *args, **kwargs):
+        """Run function on the Tk thread at the next poll; safe from any thread."""
+        self._events.put((function, args, kwargs))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                job = self.current = self._pending.popleft()
+            start = time.perf_counter()
+            try:
+                job.check()
+                result = job.function(job, *job.args)
+                job.check()
+            except JobCancelled:
+                logger.info(f"{job.name} cancelled after {time.perf_counter() - start:.2f}s")
+                self._post_cancelled(job)
+            except Exception as e:
+                logger.error(f"{job.name} failed: {str(e)}")
+                if job.on_error is not None:
+                    self.call_in_ui(job._deliver, job.on_error, e)
+            else:
+                logger.info(f"{job.name} finished in {time.perf_counter() - start:.2f}s "
+                            f"({start - job.submitted:.2f}s queued)")
+                if job.on_done is not None:
+                    self.call_in_ui(job._deliver, job.on_done, result)
+            finally:
+                with self._condition:
+                    self.current = None
+
+    def _poll(self):
+        deadline = time.perf_counter() + self.frame_budget
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    function, args, kwargs = self._events.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    function(*args, **kwargs)
+                except Exception as e:
+                    logger.error(f"UI callback {getattr(function, '__name__', function)} failed: {str(e)}")
+        finally:
+            if not self._closed:
+                self.root.after(self.poll_interval, self._poll)
+
+    def shutdown(self):
+        with self._condition:
+            self._cancel_locked()
+            self._closed = True
+            self._condition.notify_all()
+
+class BatchItem:
+    """One file of a batch: status is queued, running, done, failed or cancelled."""
+
+    def __init__(self, index, path):
+        self.index = index
+        self.path = path
+        self.status = 'queued'
+        self.elapsed = None
+        self.error = None
+        self.result = None
+
+class BatchRunner:
+    """Runs function(job, path, *args) for every file on `workers` threads.
+
+    Each file gets its own Job without a progress callback, so a single-image
+    job function works unchanged and stops at its next stage() once the batch
+    is cancelled. on_update(item) and on_finished(runner) are called on the
+    Tk thread. The engine pool behind the function is shared by all workers,
+    so models load once for the whole batch.
+    """
+
+    def __init__(self, scheduler, function, files, *args, workers=1, on_update=None, on_finished=None):
+        self.scheduler = scheduler
+        self.function = function
+        self.args = args
+        self.workers = max(1, int(workers))
+        self.items = [BatchItem(index, path) for index, path in enumerate(files)]
+        self.on_update = on_update
+        self.on_finished = on_finished
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._remaining = len(self.items)
+        self._cancelled = threading.Event()
+        self._executor = None
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='gui-batch')
+        for item in self.items:
+            self._executor.submit(self._run_item, item)
+        # Workers finish the queued items on their own; nothing waits for them here
+        self._executor.shutdown(wait=False)
+        if not self.items:
+            self._finish()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def counts(self):
+        counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0, 'cancelled': 0}
+        for item in self.items:
+            counts[item.status] += 1
+        return counts
+
+    def _run_item(self, item):
+        if self._cancelled.is_set():
+            self._update(item, 'cancelled')
+            return self._item_finished()
+        job = Job(self.scheduler, item.path, self.function, (item.path,) + self.args)
+        with self._lock:
+            self._jobs[item.index] = job
+        self._update(item, 'running')
+        start = time.perf_counter()
+        try:
+            result = job.function(job, *job.args)
+            job.check()
+        except JobCancelled:
+            status, result, error = 'cancelled', None, None
+        except Exception as e:
+            logger.error(f"{item.path} failed: {str(e)}")
+            status, result, error = 'failed', None, e
+        else:
+            status, error = 'done', None
+        finally:
+            with self._lock:
+                self._jobs.pop(item.index, None)
+        self._update(item, status, time.perf_counter() - start, result, error)
+        self._item_finished()
+
+    def _update(self, item, status, elapsed=None, result=None, error=None):
+        # Items are only changed on the Tk thread, so the table never sees a half-updated one
+        self.scheduler.call_in_ui(self._apply, item, status, elapsed, result, error)
+
+    def _apply(self, item, status, elapsed, result, error):
+        item.status, item.elapsed, item.result, item.error = status, elapsed, result, error
+        if self.on_update is not None:
+            self.on_update(item)
+
+    def _item_finished(self):
+        with self._lock:
+            self._remaining -= 1
+            last = self._remaining == 0
+        if last:
+            self._finish()
+
+    def _finish(self):
+        elapsed = time.perf_counter() - self.start_time
+        logger.info(f"Batch of {len(self.items)} files finished in {elapsed:.2f}s")
+        if self.on_finished is not None:
+            self.scheduler.call_in_ui(self.on_finished, self)
@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from OCR_Modules.instrumentation import timed
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+def describe_source(source):
+    """Short label for logs; never the pixel data itself."""
+    if is_path(source):
+        return os.fspath(source)
+    if isinstance(source, Image.Image):
+        return f"in-memory {source.mode} image {source.width}x{source.height}"
+    if isinstance(source, np.ndarray):
+        return f"in-memory array {'x'.join(map(str, source.shape))}"
+    return repr(type(source))
+
+@timed('load')
+def load_image(source, rgb=False):
+    """Image as an 8-bit 3-channel ndarray (BGR, or RGB with rgb=True).
+
+    source may be a file path, a NumPy array (cv2 BGR/BGRA/grey convention)
+    or a PIL image. Arrays already in the requested layout are returned as
+    is; PIL images are viewed through the array interface and only colour
+    converted when needed.
+    """
+    start = time.perf_counter()
+    if is_path(source):
+        image = cv2.imread(os.fspath(source))
+        if image is None:
+            raise ValueError(f"Could not open image: {source}")
+        if rgb:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        origin = 'disk'
+    elif isinstance(source, Image.Image):
+        if source.mode not in ('RGB', 'RGBA', 'L'):
+            source = source.convert('RGB')
+        image = np.asarray(source)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB if rgb else cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2RGB if rgb else cv2.COLOR_RGBA2BGR)
+        elif not rgb:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        origin = 'memory'
+    elif isinstance(source, np.ndarray):
+        image = source
+        if image.dtype != np.uint8:
+            raise ValueError(f"Expected an 8-bit image, got {image.dtype}")
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB if rgb else cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2RGB if rgb else cv2.COLOR_BGRA2BGR)
+        elif rgb:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        origin = 'memory'
+    else:
+        raise TypeError(f"Unsupported image source: {type(source)!r}")
+
+    logger.info(f"Loaded {describe_source(source)} from {origin} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return image
+
+def load_pil_image(source):
+    """RGB PIL image for drawing; PIL inputs are reused without a copy when already RGB."""
+    if isinstance(source, Image.Image):
+        return source if source.mode == 'RGB' else source.convert('RGB')
+    if is_path(source):
+        return Image.open(source).convert('RGB')
+    return Image.fromarray(load_image(source, rgb=True))
+
+def save_image_async(image, path, **save_options):
+    """Save a PIL image on a background thread so it stays off the OCR path."""
+    def save():
+        start = time.perf_counter()
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            image.save(path, **save_options)
+            logger.info(f"Saved {path} in the background in {(time.perf_counter() - start) * 1000:.1f} ms")
+        except Exception as e:
+            logger.warning(f"Could not save {path}: {str(e)}")
+
+    thread = threading.Thread(target=save, name='image-save', daemon=False)
+    thread.start()
+    return thread
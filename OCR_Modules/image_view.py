@@ -0,0 +1,175 @@
+import logging
+import time
+import tkinter as tk
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIN_LEVEL_SIZE = 256
+MAX_ZOOM = 16.0
+
+def build_pyramid(image, min_size=MIN_LEVEL_SIZE):
+    """Level 0 is the image itself, every next level is half the size of the previous one."""
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGB')
+    levels = [image]
+    while max(levels[-1].size) // 2 >= min_size:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+class ImageViewer:
+    """Canvas that shows an image scaled to fit, with pan and zoom.
+
+    The image is turned into a mip-map pyramid once. Each redraw crops the
+    visible region from the smallest level that is still at least as large
+    as the output and does a single bilinear resample of that crop. Bursts
+    of <Configure> events are debounced, and PhotoImages are cached per
+    (rounded) canvas size so resizing back and forth does not redo work.
+
+    Mouse wheel zooms around the cursor, left drag pans, double click
+    returns to the fitted view.
+    """
+
+    def __init__(self, parent, image, bg='white', debounce_ms=60, size_bucket=16, cache_size=8):
+        self.levels = build_pyramid(image)
+        self.width, self.height = image.size
+        self.debounce_ms = debounce_ms
+        self.size_bucket = size_bucket
+        self.cache_size = cache_size
+        self.zoom = 1.0
+        self.centre = (self.width / 2, self.height / 2)
+        self._cache = OrderedDict()
+        self._pending = None
+        self._drag = None
+        self._photo = None
+
+        self.canvas = tk.Canvas(parent, bg=bg, highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", self._schedule)
+        self.canvas.bind("<ButtonPress-1>", self._start_drag)
+        self.canvas.bind("<B1-Motion>", self._drag_to)
+        self.canvas.bind("<Double-Button-1>", self.reset_view)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        # X11 reports the wheel as buttons 4 and 5
+        self.canvas.bind("<Button-4>", lambda event: self._zoom_at(event, 1.25))
+        self.canvas.bind("<Button-5>", lambda event: self._zoom_at(event, 0.8))
+
+    def _canvas_size(self):
+        bucket = self.size_bucket
+        width = max(self.canvas.winfo_width() // bucket * bucket, bucket)
+        height = max(self.canvas.winfo_height() // bucket * bucket, bucket)
+        return width, height
+
+    def _fit_scale(self, canvas_width, canvas_height):
+        # Do not upscale images in the fitted view
+        return min(canvas_width / self.width, canvas_height / self.height, 1.0)
+
+    def _schedule(self, event=None):
+        if self._pending is not None:
+            self.canvas.after_cancel(self._pending)
+        self._pending = self.canvas.after(self.debounce_ms, self.render)
+
+    def _clamp_centre(self, scale, canvas_width, canvas_height):
+        # Keep the view inside the image; centre it on any axis that fits entirely
+        half_w = canvas_width / scale / 2
+        half_h = canvas_height / scale / 2
+        cx, cy = self.centre
+        cx = self.width / 2 if half_w * 2 >= self.width else min(max(cx, half_w), self.width - half_w)
+        cy = self.height / 2 if half_h * 2 >= self.height else min(max(cy, half_h), self.height - half_h)
+        self.centre = (cx, cy)
+
+    def _view(self):
+        canvas_width, canvas_height = self._canvas_size()
+        scale = self._fit_scale(canvas_width, canvas_height) * self.zoom
+        self._clamp_centre(scale, canvas_width, canvas_height)
+        cx, cy = self.centre
+        left = max(cx - canvas_width / scale / 2, 0)
+        top = max(cy - canvas_height / scale / 2, 0)
+        right = min(cx + canvas_width / scale / 2, self.width)
+        bottom = min(cy + canvas_height / scale / 2, self.height)
+        return scale, (left, top, right, bottom)
+
+    def _level_for(self, scale):
+        # Smallest pyramid level that still has at least `scale` worth of pixels
+        level = 0
+        while level + 1 < len(self.levels) and scale <= 0.5 ** (level + 1):
+            level += 1
+        return level
+
+    def _photo_for(self, scale, box):
+        out_width = max(int(round((box[2] - box[0]) * scale)), 1)
+        out_height = max(int(round((box[3] - box[1]) * scale)), 1)
+        key = (tuple(int(round(v)) for v in box), out_width, out_height)
+        photo = self._cache.get(key)
+        if photo is not None:
+            self._cache.move_to_end(key)
+            return photo
+
+        level = self._level_for(scale)
+        factor = 0.5 ** level
+        source = self.levels[level]
+        crop_box = tuple(int(round(v * factor)) for v in box)
+        crop_box = (crop_box[0], crop_box[1],
+                    min(max(crop_box[2], crop_box[0] + 1), source.width),
+                    min(max(crop_box[3], crop_box[1] + 1), source.height))
+        region = source.crop(crop_box)
+        if region.size != (out_width, out_height):
+            region = region.resize((out_width, out_height), Image.BILINEAR)
+        photo = ImageTk.PhotoImage(region)
+
+        self._cache[key] = photo
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return photo
+
+    def render(self):
+        self._pending = None
+        start = time.perf_counter()
+        scale, box = self._view()
+        photo = self._photo_for(scale, box)
+        self.canvas.delete("all")
+        self.canvas.create_image(self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2,
+                                 image=photo, anchor='center')
+        self._photo = photo  # Keep a reference
+        logger.debug(f"Rendered image view in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def reset_view(self, event=None):
+        self.zoom = 1.0
+        self.centre = (self.width / 2, self.height / 2)
+        self.render()
+
+    def _on_wheel(self, event):
+        self._zoom_at(event, 1.25 if event.delta > 0 else 0.8)
+
+    def _zoom_at(self, event, factor):
+        new_zoom = min(max(self.zoom * factor, 1.0), MAX_ZOOM)
+        if new_zoom == self.zoom:
+            return
+        canvas_width, canvas_height = self._canvas_size()
+        old_scale = self._fit_scale(canvas_width, canvas_height) * self.zoom
+        new_scale = old_scale * new_zoom / self.zoom
+        # Keep the image point under the cursor where it is
+        dx = event.x - self.canvas.winfo_width() / 2
+        dy = event.y - self.canvas.winfo_height() / 2
+        cx, cy = self.centre
+        px, py = cx + dx / old_scale, cy + dy / old_scale
+        self.centre = (px - dx / new_scale, py - dy / new_scale)
+        self.zoom = new_zoom
+        self.render()
+
+    def _start_drag(self, event):
+        self._drag = (event.x, event.y)
+
+    def _drag_to(self, event):
+        if self._drag is None or self.zoom == 1.0:
+            return
+        canvas_width, canvas_height = self._canvas_size()
+        scale = self._fit_scale(canvas_width, canvas_height) * self.zoom
+        cx, cy = self.centre
+        self.centre = (cx - (event.x - self._drag[0]) / scale, cy - (event.y - self._drag[1]) / scale)
+        self._drag = (event.x, event.y)
+        self.render()
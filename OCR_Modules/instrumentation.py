@@ -0,0 +1,322 @@
+"""Per-stage timing for the OCR pipeline.
+
+    with trace_image(path):            # one record per image
+        with stage('load'): ...        # wall + CPU time per stage
+
+Nothing is measured until enable() is called (or OCR_TRACE is set to a
+trace file path); until then stage() hands back a shared no-op context.
+Each finished image is logged, kept for summaries and, with a trace file,
+appended to it as one JSON line.
+
+    python -m OCR_Modules.instrumentation trace.jsonl   # summarise a trace
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_PATH = os.path.join(os.path.expanduser('~'), '.ocr_tool', 'trace.jsonl')
+
+_enabled = False
+_trace_path = None
+_write_lock = threading.Lock()
+_local = threading.local()
+_noop = nullcontext()
+# Most recent image records, for the GUI status bar and CLI summaries
+recent = deque(maxlen=1000)
+
+def enable(trace_path=None):
+    """Start recording; trace_path adds a JSON-lines file of per-image records."""
+    global _enabled, _trace_path
+    _enabled = True
+    _trace_path = trace_path
+    if trace_path:
+        os.makedirs(os.path.dirname(os.path.abspath(trace_path)), exist_ok=True)
+
+def disable():
+    global _enabled, _trace_path
+    _enabled = False
+    _trace_path = None
+
+def is_enabled():
+    return _enabled
+
+def _rss():
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss
+
+def _peak_rss():
+    """The process's RSS high-water mark in bytes, as kept by the OS."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, KB on Linux and the BSDs
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), 'peak_wset', None)
+    return None
+
+class _Stage:
+    __slots__ = ('record', 'name', 'wall', 'cpu')
+
+    def __init__(self, record, name):
+        self.record = record
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        stages = self.record['stages']
+        entry = stages.get(self.name)
+        if entry is None:
+            entry = stages[self.name] = {'wall': 0.0, 'cpu': 0.0, 'calls': 0}
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+        entry['calls'] += 1
+
+def stage(name):
+    """Time a pipeline stage into the current thread's image record (no-op when disabled)."""
+    if not _enabled:
+        return _noop
+    record = getattr(_local, 'record', None)
+    if record is None:
+        return _noop
+    return _Stage(record, name)
+
+def timed(name):
+    """Decorator form of stage()."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_record():
+    return getattr(_local, 'record', None)
+
+@contextmanager
+def trace_image(label, **fields):
+    """Collect the stages run in this thread into one record for `label`.
+
+    Nested calls join the already open record, so code paths that trace
+    themselves can be called from ones that already do.
+    """
+    if not _enabled or getattr(_local, 'record', None) is not None:
+        yield getattr(_local, 'record', None)
+        return
+
+    record = {'image': str(label), 'start': time.time(), 'stages': {}, 'rss_start': _rss() or 0}
+    record.update(fields)
+    _local.record = record
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield record
+    except Exception as e:
+        record['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        raise
+    finally:
+        _local.record = None
+        record['wall'] = time.perf_counter() - wall
+        record['cpu'] = time.process_time() - cpu
+        _finish(record)
+
+@contextmanager
+def collect_stages():
+    """Collect the stages run in this thread into a bare dict, without an image record.
+
+    Worker processes use it to send their stage timings back with the
+    result; merge_stages() adds them to the parent's open record.
+    """
+    record = getattr(_local, 'record', None)
+    if record is not None:
+        yield record['stages']
+        return
+    _local.record = {'stages': {}}
+    try:
+        yield _local.record['stages']
+    finally:
+        _local.record = None
+
+def merge_stages(stages):
+    """Add stage timings from collect_stages() to the current thread's record, if any."""
+    record = getattr(_local, 'record', None)
+    if not _enabled or record is None or not stages:
+        return
+    for name, entry in stages.items():
+        total = record['stages'].setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+        total['wall'] += entry['wall']
+        total['cpu'] += entry['cpu']
+        total['calls'] += entry['calls']
+
+def _finish(record):
+    # RSS when the image was done, and the process peak so far (which may predate this image)
+    record['rss_start_mb'] = round(record.pop('rss_start') / 2 ** 20, 1)
+    record['rss_end_mb'] = round((_rss() or 0) / 2 ** 20, 1)
+    record['rss_peak_mb'] = round((_peak_rss() or 0) / 2 ** 20, 1)
+    recent.append(record)
+    logger.info(f"Timing {record['image']}: {format_record(record)}")
+    if _trace_path:
+        line = json.dumps(record, default=str)
+        with _write_lock:
+            with open(_trace_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+def format_record(record, top=4):
+    """One line: total wall time, the slowest stages, RSS at the end and the process peak RSS."""
+    stages = sorted(record['stages'].items(), key=lambda item: item[1]['wall'], reverse=True)
+    parts = [f"{name} {entry['wall'] * 1000:.0f} ms" for name, entry in stages[:top]]
+    text = f"{record['wall']:.2f} s"
+    if parts:
+        text += f" ({', '.join(parts)})"
+    if record.get('rss_end_mb'):
+        text += f", RSS {record['rss_end_mb']:.0f} MB"
+    if record.get('rss_peak_mb'):
+        text += f", process peak RSS {record['rss_peak_mb']:.0f} MB"
+    return text
+
+def summarize(records):
+    """Totals per stage over many image records."""
+    totals = {}
+    for record in records:
+        for name, entry in record['stages'].items():
+            total = totals.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            total['wall'] += entry['wall']
+            total['cpu'] += entry['cpu']
+            total['calls'] += entry['calls']
+    return {
+        'images': len(records),
+        'wall': sum(record['wall'] for record in records),
+        'cpu': sum(record['cpu'] for record in records),
+        'rss_peak_mb': max((record.get('rss_peak_mb', 0) for record in records), default=0),
+        'stages': totals,
+    }
+
+def format_summary(summary):
+    lines = [f"{summary['images']} images, {summary['wall']:.2f} s wall, {summary['cpu']:.2f} s CPU, "
+             f"process peak RSS {summary['rss_peak_mb']:.0f} MB",
+             f"{'stage':<12} {'calls':>6} {'wall s':>8} {'cpu s':>8} {'share':>6}"]
+    total = summary['wall'] or 1
+    for name, entry in sorted(summary['stages'].items(), key=lambda item: item[1]['wall'], reverse=True):
+        lines.append(f"{name:<12} {entry['calls']:>6} {entry['wall']:>8.3f} {entry['cpu']:>8.3f} "
+                     f"{entry['wall'] / total:>6.0%}")
+    return '\n'.join(lines)
+
+def load_trace(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class TimedPredictor:
+    """Wraps a PaddleOCR predictor (text_detector, ...) so each call is timed as a stage.
+
+    Attribute reads and writes go to the wrapped predictor, so code that
+    tweaks e.g. rec_batch_num keeps working.
+    """
+
+    def __init__(self, predictor, name):
+        object.__setattr__(self, '_predictor', predictor)
+        object.__setattr__(self, '_stage_name', name)
+
+    def __call__(self, *args, **kwargs):
+        with stage(self._stage_name):
+            return self._predictor(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._predictor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._predictor, name, value)
+
+def instrument_paddle(ocr):
+    """Time detection, angle classification and recognition of a PaddleOCR instance."""
+    for attribute, name in (('text_detector', 'detect'), ('text_classifier', 'classify'),
+                            ('text_recognizer', 'recognize')):
+        predictor = getattr(ocr, attribute, None)
+        if predictor is not None and not isinstance(predictor, TimedPredictor):
+            setattr(ocr, attribute, TimedPredictor(predictor, name))
+    return ocr
+
+@contextmanager
+def profile_run(output_path, profiler='cprofile'):
+    """Profile everything inside the block once.
+
+    cProfile writes a .prof file (and logs the top functions); pyinstrument,
+    if installed, writes an HTML report.
+    """
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+        prof = Profiler()
+        prof.start()
+        try:
+            yield prof
+        finally:
+            prof.stop()
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(prof.output_html())
+            logger.info(f"pyinstrument report written to {output_path}")
+        return
+
+    import cProfile
+    import io
+    import pstats
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield prof
+    finally:
+        prof.disable()
+        prof.dump_stats(output_path)
+        stream = io.StringIO()
+        pstats.Stats(prof, stream=stream).sort_stats('cumulative').print_stats(20)
+        logger.info(f"cProfile stats written to {output_path}\n{stream.getvalue()}")
+
+def profiled(output_path=None, profiler='cprofile'):
+    """profile_run(output_path) when a path is given, otherwise a no-op context."""
+    return profile_run(output_path, profiler) if output_path else nullcontext()
+
+if os.environ.get('OCR_TRACE'):
+    enable(os.environ['OCR_TRACE'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise an OCR timing trace (JSON lines)")
+    parser.add_argument('trace', nargs='?', default=DEFAULT_TRACE_PATH)
+    parser.add_argument('--last', type=int, help="Only the last N images")
+    args = parser.parse_args(argv)
+
+    records = load_trace(args.trace)
+    if args.last:
+        records = records[-args.last:]
+    print(format_summary(summarize(records)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
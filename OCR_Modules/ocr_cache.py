@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import stat
+import struct
+import threading
+
+import numpy as np
+from PIL import Image
+
+from OCR_Modules.image_io import describe_source, is_path
+from OCR_Modules.word_boxes import WordBoxes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.ocr_tool', 'cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def hash_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def hash_image(source):
+    """Content hash of an image: file bytes for paths, pixel buffer for in-memory images."""
+    if is_path(source):
+        return hash_file(source)
+    if isinstance(source, Image.Image):
+        header, buffer = f"{source.mode}{source.size}", source.tobytes()
+    else:
+        array = np.ascontiguousarray(source)
+        header, buffer = f"{array.dtype}{array.shape}", memoryview(array)
+    h = hashlib.sha256(header.encode('ascii'))
+    h.update(buffer)
+    return h.hexdigest()
+
+_file_hashes = {}
+
+def hash_files(paths):
+    """Combined hash of several (model) files, memoised on path, size and mtime."""
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            continue
+        memo_key = (path, st.st_size, st.st_mtime_ns)
+        digest = _file_hashes.get(memo_key)
+        if digest is None:
+            digest = _file_hashes[memo_key] = hash_file(path)
+        h.update(os.path.basename(path).encode('utf-8'))
+        h.update(digest.encode('ascii'))
+    return h.hexdigest()
+
+def model_files(model_dir):
+    """All files of the det/cls/rec models below a PaddleOCR model directory.
+
+    The ~/.paddleocr/whl layout nests the models (det/en/<model>/...), so the
+    whole tree is walked; only regular files are returned.
+    """
+    files = []
+    for sub in ('det', 'cls', 'rec'):
+        for root, dirs, names in os.walk(os.path.join(model_dir, sub)):
+            dirs.sort()
+            files.extend(path for path in (os.path.join(root, name) for name in sorted(names))
+                         if os.path.isfile(path))
+    return files
+
+def make_key(image_path, engine, model_files=(), params=None):
+    """Cache key: image bytes + engine name + model file hashes + OCR parameters.
+
+    image_path may also be an in-memory ndarray or PIL image.
+    """
+    h = hashlib.sha256()
+    h.update(hash_image(image_path).encode('ascii'))
+    h.update(engine.encode('utf-8'))
+    h.update(hash_files(model_files).encode('ascii'))
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+class OCRCache:
+    """Disk-backed OCR result cache with size-bounded LRU eviction."""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.ocrw')
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = WordBoxes.from_bytes(f.read())
+            # Touch the entry so eviction sees it as recently used
+            os.utime(path)
+        except (OSError, ValueError, struct.error):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if not self.enabled or not data:
+            return
+        path = self._path(key)
+        blob = WordBoxes.from_records(data).to_bytes()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(blob)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        entries = []
+        for root, dirs, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.ocrw'):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Drop least recently used entries until we are comfortably under the limit
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except OSError:
+                pass
+        self._size = size
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'enabled': self.enabled,
+                    'size': self._size, 'max_bytes': self.max_bytes}
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(f"OCR cache: {stats['hits']} hits, {stats['misses']} misses")
+
+_default_cache = None
+
+def get_default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = OCRCache()
+    return _default_cache
+
+def cached_process_image(process_image, file_path, ocr, engine, cache=None, model_files=(), params=None):
+    """Call process_image(file_path, ocr) unless the same image/engine/config is cached."""
+    if cache is None or not cache.enabled:
+        return process_image(file_path, ocr)
+
+    try:
+        key = make_key(file_path, engine, model_files, params)
+    except OSError as e:
+        # An unreadable model file must not stop OCR, only the caching of it
+        logger.warning(f"Could not build OCR cache key, running without the cache: {str(e)}")
+        return process_image(file_path, ocr)
+    data = cache.get(key)
+    if data is not None:
+        logger.info(f"OCR cache hit for {describe_source(file_path)}")
+        return data
+
+    data = process_image(file_path, ocr)
+    try:
+        cache.put(key, data)
+    except OSError as e:
+        logger.warning(f"Could not write OCR cache entry: {str(e)}")
+    return data
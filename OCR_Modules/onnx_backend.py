@@ -0,0 +1,198 @@
+"""ONNX Runtime inference for the PaddleOCR det/cls/rec models.
+
+Backends:
+    paddle      the Paddle Inference CPU predictor (default)
+    onnx        the same models converted to ONNX, run by ONNX Runtime
+    onnx-int8   the ONNX models with dynamically quantised int8 weights
+
+PaddleOCR still does the pre- and post-processing; only the three
+predictors change. Converted models are looked up next to the Paddle ones
+(<model_dir>/det/inference.onnx, inference_int8.onnx) so a bundle can ship
+them. Otherwise they are converted once with paddle2onnx into
+~/.ocr_tool/onnx, keyed by the Paddle model files.
+
+    python -m OCR_Modules.onnx_backend --model-dir models --int8 --in-place
+"""
+import argparse
+import hashlib
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+
+from OCR_Modules.ocr_cache import hash_files
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('paddle', 'onnx', 'onnx-int8')
+MODEL_KINDS = ('det', 'cls', 'rec')
+MODEL_FILES = {'onnx': 'inference.onnx', 'onnx-int8': 'inference_int8.onnx'}
+DEFAULT_ONNX_DIR = os.path.join(os.path.expanduser('~'), '.ocr_tool', 'onnx')
+# Lowest opset paddle2onnx supports for all PP-OCR operators
+OPSET_VERSION = 11
+
+_convert_lock = threading.Lock()
+
+def is_available():
+    return importlib.util.find_spec('onnxruntime') is not None
+
+def default_backend():
+    """The backend named by OCR_PADDLE_BACKEND, 'paddle' when unset."""
+    return os.environ.get('OCR_PADDLE_BACKEND') or 'paddle'
+
+def resolve_backend(backend=None):
+    if backend is None:
+        backend = default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if backend != 'paddle' and not is_available():
+        raise ImportError("The onnxruntime package is not installed")
+    return backend
+
+def ocr_cache_params(backend):
+    """OCR result cache parameters for PaddleOCR on `backend`.
+
+    ONNX and int8 results can differ slightly from Paddle's, so they are
+    cached apart, as are results of a different pre-processing.
+    """
+    from OCR_Modules.preprocess import cache_params
+
+    params = {'cls': True}
+    if backend != 'paddle':
+        params['backend'] = backend
+    params.update(cache_params('paddle'))
+    return params
+
+def paddle_model_files(model_dir):
+    return [os.path.join(model_dir, name) for name in os.listdir(model_dir)
+            if name.endswith(('.pdmodel', '.pdiparams'))]
+
+def convert_model(model_dir, save_file, opset_version=OPSET_VERSION):
+    """Convert one Paddle inference model (inference.pdmodel/.pdiparams) to ONNX."""
+    import paddle2onnx
+
+    start = time.perf_counter()
+    temp_file = f"{save_file}.{os.getpid()}.tmp"
+    paddle2onnx.export(
+        model_file=os.path.join(model_dir, 'inference.pdmodel'),
+        params_file=os.path.join(model_dir, 'inference.pdiparams'),
+        save_file=temp_file,
+        opset_version=opset_version,
+        enable_onnx_checker=True
+    )
+    # Other processes may convert at the same time; whichever finishes last wins with identical bytes
+    os.replace(temp_file, save_file)
+    logger.info(f"Converted {model_dir} to ONNX in {time.perf_counter() - start:.2f}s")
+    return save_file
+
+def quantize_model(onnx_file, save_file):
+    """Dynamically quantise the weights of an ONNX model to 8 bits."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    start = time.perf_counter()
+    temp_file = f"{save_file}.{os.getpid()}.tmp"
+    # Unsigned weights: the CPU provider has ConvInteger kernels for uint8 only
+    quantize_dynamic(onnx_file, temp_file, weight_type=QuantType.QUInt8)
+    os.replace(temp_file, save_file)
+    size = os.path.getsize(onnx_file) / 2 ** 20
+    logger.info(f"Quantised {onnx_file} to int8 in {time.perf_counter() - start:.2f}s "
+                f"({size:.1f} MB -> {os.path.getsize(save_file) / 2 ** 20:.1f} MB)")
+    return save_file
+
+def model_path(model_dir, backend, cache_dir=None):
+    """The ONNX file for one Paddle model dir, converting (and quantising) it on first use."""
+    filename = MODEL_FILES[backend]
+    bundled = os.path.join(model_dir, filename)
+    if os.path.exists(bundled):
+        return bundled
+
+    key = hashlib.sha256(hash_files(paddle_model_files(model_dir)).encode('ascii')).hexdigest()[:24]
+    target_dir = os.path.join(cache_dir or DEFAULT_ONNX_DIR, key)
+    target = os.path.join(target_dir, filename)
+    with _convert_lock:
+        if os.path.exists(target):
+            return target
+        os.makedirs(target_dir, exist_ok=True)
+        onnx_file = os.path.join(model_dir, MODEL_FILES['onnx'])
+        if not os.path.exists(onnx_file):
+            onnx_file = os.path.join(target_dir, MODEL_FILES['onnx'])
+            if not os.path.exists(onnx_file):
+                convert_model(model_dir, onnx_file)
+        if backend == 'onnx-int8':
+            quantize_model(onnx_file, target)
+    return target
+
+def onnx_params(params, backend, cache_dir=None):
+    """PaddleOCR arguments that run params' det/cls/rec models on ONNX Runtime."""
+    onnx = {'use_onnx': True}
+    for kind in MODEL_KINDS:
+        model_dir = params.get(f'{kind}_model_dir')
+        if model_dir:
+            onnx[f'{kind}_model_dir'] = model_path(model_dir, backend, cache_dir)
+    return onnx
+
+def session_options(threads=None):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+        # The three models run one after another, so parallel graph branches gain nothing
+        options.inter_op_num_threads = 1
+    return options
+
+def set_threads(ocr, params, threads):
+    """Recreate the ONNX sessions of a PaddleOCR instance with `threads` intra-op threads.
+
+    PaddleOCR opens its sessions with ONNX Runtime's defaults, which use
+    every core; that oversubscribes the CPU when several workers run.
+    """
+    import onnxruntime as ort
+
+    options = session_options(threads)
+    for attribute, kind in (('text_detector', 'det'), ('text_classifier', 'cls'), ('text_recognizer', 'rec')):
+        predictor = getattr(ocr, attribute, None)
+        path = params.get(f'{kind}_model_dir')
+        if predictor is None or not getattr(predictor, 'use_onnx', False) or not path:
+            continue
+        session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        predictor.predictor = session
+        predictor.input_tensor = session.get_inputs()[0]
+    return ocr
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the PaddleOCR det/cls/rec models to ONNX")
+    parser.add_argument('--model-dir', help="Directory with det/, cls/ and rec/ (default: the PaddleOCR install dir)")
+    parser.add_argument('--int8', action='store_true', help="Also write the dynamically quantised int8 models")
+    parser.add_argument('--in-place', action='store_true',
+                        help="Write inference.onnx next to the Paddle models (for bundling) instead of the cache")
+    parser.add_argument('--cache-dir', default=DEFAULT_ONNX_DIR)
+    args = parser.parse_args(argv)
+
+    from OCR_Modules.paddleOCR import default_model_dir
+
+    model_dir = args.model_dir or default_model_dir()
+    for kind in MODEL_KINDS:
+        kind_dir = os.path.join(model_dir, kind)
+        if args.in_place:
+            onnx_file = os.path.join(kind_dir, MODEL_FILES['onnx'])
+            if not os.path.exists(onnx_file):
+                convert_model(kind_dir, onnx_file)
+            paths = [onnx_file]
+            if args.int8:
+                paths.append(quantize_model(onnx_file, os.path.join(kind_dir, MODEL_FILES['onnx-int8'])))
+        else:
+            paths = [model_path(kind_dir, 'onnx', args.cache_dir)]
+            if args.int8:
+                paths.append(model_path(kind_dir, 'onnx-int8', args.cache_dir))
+        for path in paths:
+            print(f"{kind}: {path} ({os.path.getsize(path) / 2 ** 20:.1f} MB)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
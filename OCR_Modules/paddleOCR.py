@@ -1,28 +1,39 @@
 from paddleocr import PaddleOCR
+import copy
 import cv2
 import logging
 import numpy as np
-import openpyxl
-from openpyxl.styles import PatternFill
-from openpyxl.utils import get_column_letter
 import os  # Added to use os.cpu_count()
 from PIL import Image, ImageDraw, ImageFont
 import sys
 import traceback
+from OCR_Modules.instrumentation import instrument_paddle, timed
+from OCR_Modules.image_io import describe_source, load_pil_image
+from OCR_Modules.preprocess import prepare, restore_boxes
+from OCR_Modules.tiling import DEFAULT_OVERLAP, DEFAULT_TILE_SIZE, process_image_tiled as tiled_ocr
+from OCR_Modules.word_boxes import WordBoxes, as_word_boxes
+from OCR_Modules.xlsx_writer import write_xlsx
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def initialize_ocr_SLANet_LCNetV2(model_dir=None):
+def default_model_dir():
+    if getattr(sys, 'frozen', False):
+        app_dir = os.path.dirname(sys.executable)
+        return os.path.join(app_dir, 'paddleocr', 'whl')
+    return os.path.expanduser('~/.paddleocr/whl')
+
+def initialize_ocr_SLANet_LCNetV2(model_dir=None, program_cache=None, backend='paddle', **options):
+    """PaddleOCR for the det/cls/rec models in model_dir.
+
+    backend is 'paddle', 'onnx' or 'onnx-int8' (see OCR_Modules.onnx_backend).
+    program_cache=None follows $OCR_PROGRAM_CACHE (see OCR_Modules.program_cache).
+    """
     if model_dir is None:
-        if getattr(sys, 'frozen', False):
-            app_dir = os.path.dirname(sys.executable)
-            model_dir = os.path.join(app_dir, 'paddleocr', 'whl')
-        else:
-            model_dir = os.path.expanduser('~/.paddleocr/whl')
+        model_dir = default_model_dir()
     
-    return PaddleOCR(
+    params = dict(
         use_angle_cls=True,
         lang='en',
         use_gpu=False,
@@ -31,30 +42,56 @@ def initialize_ocr_SLANet_LCNetV2(model_dir=None):
         cls_model_dir=os.path.join(model_dir, 'cls'),
         rec_model_dir=os.path.join(model_dir, 'rec')
     )
+    # Extra PaddleOCR arguments (e.g. cpu_threads) override the defaults above
+    params.update(options)
+    ocr = None
+    if program_cache is None:
+        from OCR_Modules.program_cache import enabled
+        program_cache = enabled()
+    if backend != 'paddle':
+        from OCR_Modules import onnx_backend
+        backend = onnx_backend.resolve_backend(backend)
+        params.update(onnx_backend.onnx_params(params, backend))
+        ocr = PaddleOCR(**params)
+        if params.get('cpu_threads'):
+            onnx_backend.set_threads(ocr, params, params['cpu_threads'])
+    elif program_cache:
+        # Load the IR-optimised programs saved by an earlier start (built on the first one)
+        from OCR_Modules.program_cache import create_paddle_ocr
+        try:
+            ocr = create_paddle_ocr(params)
+        except Exception as e:
+            logger.warning(f"Optimised program cache unavailable, loading the models directly: {str(e)}")
+    if ocr is None:
+        ocr = PaddleOCR(**params)
+    # Detection, classification and recognition are timed as stages when tracing is on
+    return instrument_paddle(ocr)
 
-def process_image(file_path, ocr):
+def process_image(file_path, ocr, preprocess=True):
     try:
-        # Load image
-        logger.info(f"Loading image from: {file_path}")
-        image = cv2.imread(file_path)
-        if image is None:
-            raise ValueError("Could not open image!")
+        # Load image; file_path may also be an in-memory ndarray (BGR) or PIL image
+        logger.info(f"Loading image from: {describe_source(file_path)}")
+        # Deskew/denoise/contrast as needed (see OCR_Modules.preprocess); boxes are mapped back below
+        image, info = prepare(file_path, 'paddle', None if preprocess else ())
 
         logger.info("Processing image...")
 
         # Perform OCR with error checking
         result = ocr.ocr(image, cls=True, det=True)
-        logger.info(f"OCR result type: {type(result)}")
-        logger.info(f"OCR result: {result}")
+        logger.debug(f"OCR result: {result}")
 
         if result is None:
             raise ValueError("OCR processing failed - no results returned")
 
-        if not result:
-            raise ValueError("No text detected in image.")
+        # A blank image (e.g. an empty page of a duplex scan) comes back as [] or [None]
+        if not any(result):
+            logger.info("No text detected in image")
+            return WordBoxes.empty()
 
         # Extract text, coordinates, and confidence
-        data = []
+        boxes = []
+        texts = []
+        confidences = []
         for line in result:
             if not line:
                 continue
@@ -68,25 +105,95 @@ def process_image(file_path, ocr):
                     logger.warning(f"Skipping invalid bbox: {bbox}")
                     continue
                     
-                x = (bbox[0][0] + bbox[2][0]) / 2  # Average x-coordinate
-                y = (bbox[0][1] + bbox[2][1]) / 2  # Average y-coordinate
-                data.append({
-                    'x': x, 
-                    'y': y, 
-                    'text': text, 
-                    'confidence': confidence, 
-                    'bbox': bbox
-                })
-
-        if not data:
+                boxes.append(bbox)
+                texts.append(text)
+                confidences.append(confidence)
+
+        if not texts:
             raise ValueError("No valid data extracted from OCR results")
 
-        return data
+        # Centres ('x'/'y') are derived from the boxes inside WordBoxes
+        return restore_boxes(WordBoxes(boxes, confidences, texts), info)
 
     except Exception as e:
         error_msg = f"Error: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
         raise Exception(error_msg)
 
+def process_images(file_paths, ocr, rec_batch_size=64, cls=True, preprocess=True):
+    """Batched process_image: detect page by page, then classify and recognise
+    the text-line crops of all pages together in large batches.
+
+    Like process_image, entries may be paths or in-memory images."""
+    # Only importable once paddleocr has put its bundled tools package on sys.path
+    from tools.infer.predict_system import sorted_boxes
+    from tools.infer.utility import get_rotate_crop_image, get_minarea_rect_crop
+
+    crops = []
+    page_boxes = []
+    page_infos = []
+    for file_path in file_paths:
+        image, info = prepare(file_path, 'paddle', None if preprocess else ())
+        page_infos.append(info)
+
+        dt_boxes, _ = ocr.text_detector(image)
+        if dt_boxes is None or len(dt_boxes) == 0:
+            page_boxes.append([])
+            continue
+
+        dt_boxes = sorted_boxes(dt_boxes)
+        page_boxes.append(dt_boxes)
+        for box in dt_boxes:
+            if ocr.args.det_box_type == 'quad':
+                crops.append(get_rotate_crop_image(image, copy.deepcopy(box)))
+            else:
+                crops.append(get_minarea_rect_crop(image, copy.deepcopy(box)))
+
+    rec_res = []
+    if crops:
+        # Temporarily raise the predictor batch sizes; the engine is not shared while we hold it
+        saved_batch_sizes = (ocr.text_classifier.cls_batch_num, ocr.text_recognizer.rec_batch_num)
+        ocr.text_classifier.cls_batch_num = rec_batch_size
+        ocr.text_recognizer.rec_batch_num = rec_batch_size
+        try:
+            if cls and ocr.use_angle_cls:
+                crops, _, _ = ocr.text_classifier(crops)
+            rec_res, _ = ocr.text_recognizer(crops)
+        finally:
+            ocr.text_classifier.cls_batch_num, ocr.text_recognizer.rec_batch_num = saved_batch_sizes
+
+    # Split the pooled recognition results back per page
+    results = []
+    offset = 0
+    for dt_boxes, info in zip(page_boxes, page_infos):
+        page_res = rec_res[offset:offset + len(dt_boxes)]
+        offset += len(dt_boxes)
+
+        keep = [i for i, (_, confidence) in enumerate(page_res) if confidence >= ocr.drop_score]
+        if keep:
+            results.append(restore_boxes(WordBoxes(
+                np.asarray(dt_boxes)[keep],
+                [page_res[i][1] for i in keep],
+                [page_res[i][0] for i in keep]
+            ), info))
+        else:
+            results.append(WordBoxes.empty())
+
+    logger.info(f"Batched OCR: {len(file_paths)} images, {len(crops)} text crops")
+    return results
+
+def process_image_tiled(file_path, ocr, tile_size=None, overlap=DEFAULT_OVERLAP, tiles_per_batch=4):
+    """process_image for very large scans: detect per overlapping tile so small text is not
+    lost to det_limit_side_len, recognise the tiles' crops in shared batches, then merge."""
+    if tile_size is None:
+        # Tiles no larger than the detector's input limit are never downscaled
+        tile_size = ocr.args.det_limit_side_len if ocr.args.det_limit_type == 'max' else DEFAULT_TILE_SIZE
+        tile_size = max(tile_size, 2 * overlap)
+    # The whole page is pre-processed once; the tiles are cut from the result
+    image, info = prepare(file_path, 'paddle')
+    words = tiled_ocr(image, ocr, lambda tiles, ocr: process_images(tiles, ocr, preprocess=False),
+                      tile_size=tile_size, overlap=overlap, tiles_per_batch=tiles_per_batch)
+    return restore_boxes(words, info)
+
 def group_into_rows(data, y_threshold=10):
     # Sort data by y-coordinate
     data_sorted = sorted(data, key=lambda k: k['y'])
@@ -116,68 +223,37 @@ def group_into_rows(data, y_threshold=10):
     return [[(text, confidence) for x, text, confidence in row] for row in rows]
 
 def save_as_xlsx(rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-
-    for row_index, row in enumerate(rows, start=1):
-        for col_index, cell in enumerate(row, start=1):
-            text, confidence = cell
-            ws.cell(row=row_index, column=col_index, value=text)
-
-            if confidence >= green_threshold:
-                # Green for confidence >= green_threshold
-                fill_color = '00FF00'
-            elif confidence >= yellow_threshold:
-                # Yellow for confidence >= yellow_threshold
-                fill_color = 'FFFF00'
-            else:
-                # Red for confidence below yellow_threshold
-                fill_color = 'FF0000'
-
-            fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-            ws.cell(row=row_index, column=col_index).fill = fill
-
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    wb.save(output_xlsx)
+    # Streams rows in write-only mode with shared green/yellow/red styles
+    write_xlsx(rows, output_xlsx, green_threshold, yellow_threshold)
     logger.info(f"Excel file has been saved at: {output_xlsx}")
 
+@timed('draw')
 def draw_bounding_boxes(image_path, data, output_image_path):
-    image = Image.open(image_path)
-    # Convert image to RGB mode
-    image = image.convert('RGB')
+    """Draw the words onto a copy of the image, save it and return it as a PIL image.
+
+    image_path may be a path, an ndarray or a PIL image; in-memory inputs are not modified.
+    """
+    words = as_word_boxes(data)
+    image = np.array(load_pil_image(image_path))
+
+    # All boxes in a single polyline call instead of one draw.line per word
+    cv2.polylines(image, list(np.rint(words.boxes).astype(np.int32)), True, (0, 128, 0), 2)
+
+    image = Image.fromarray(image)
     draw = ImageDraw.Draw(image)
     try:
         font = ImageFont.truetype("arial.ttf", 16)  # Use a true type font
     except:
         font = ImageFont.load_default()
 
-    for item in data:
-        bbox = item['bbox']
-        text = item['text']
-        confidence = item['confidence']
-
-        # Draw bounding box
-        bbox_points = [(point[0], point[1]) for point in bbox]
-        draw.line(bbox_points + [bbox_points[0]], fill='green', width=2)
-
-        # Put text and confidence
-        x, y = bbox[0][0], bbox[0][1]
+    # Put text and confidence
+    anchors = words.boxes[:, 0].tolist()
+    for (x, y), text, confidence in zip(anchors, words.texts, words.confidence.tolist()):
         draw.text((x, y - 20), f'{text} ({confidence:.2f})', fill='red', font=font)
 
     image.save(output_image_path)
     logger.info(f"Image with bounding boxes saved at: {output_image_path}")
+    return image
 
 if __name__ == "__main__":
     ocr_model = initialize_ocr_SLANet_LCNetV2()
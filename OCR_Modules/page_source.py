@@ -0,0 +1,172 @@
+"""Multi-page documents (PDF, multi-frame TIFF) as a lazy stream of page images.
+
+PDF rendering needs PyMuPDF (pip install pymupdf); it is imported only when
+a PDF is opened. TIFF frames are read with Pillow.
+"""
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image, ImageSequence
+
+from OCR_Modules.image_io import load_image
+from OCR_Modules.table_layout import group_into_grid
+from OCR_Modules.xlsx_writer import XlsxStreamWriter
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EXTENSIONS = ('.pdf', '.tif', '.tiff')
+DEFAULT_PDF_DPI = 200
+
+def _open_pdf(path):
+    try:
+        import fitz
+    except ImportError:
+        raise ImportError("Reading PDF files requires PyMuPDF (pip install pymupdf)")
+    return fitz.open(path)
+
+def page_count(path):
+    if path.lower().endswith('.pdf'):
+        with _open_pdf(path) as doc:
+            return doc.page_count
+    with Image.open(path) as image:
+        return getattr(image, 'n_frames', 1)
+
+def is_document(path):
+    """True for PDFs and for TIFFs with more than one frame."""
+    lower = path.lower()
+    if lower.endswith('.pdf'):
+        return True
+    if lower.endswith(('.tif', '.tiff')):
+        try:
+            return page_count(path) > 1
+        except OSError:
+            return False
+    return False
+
+def iter_pages(path, dpi=None):
+    """Yield (page_number, BGR ndarray) one page at a time, starting at 1.
+
+    PDFs are rendered at `dpi` (default 200). TIFF frames keep their native
+    resolution unless `dpi` is given and the frame records its own dpi.
+    Only the current page is held in memory.
+    """
+    if path.lower().endswith('.pdf'):
+        with _open_pdf(path) as doc:
+            import fitz
+            zoom = (dpi or DEFAULT_PDF_DPI) / 72
+            matrix = fitz.Matrix(zoom, zoom)
+            for index in range(doc.page_count):
+                pixmap = doc.load_page(index).get_pixmap(matrix=matrix, alpha=False)
+                samples = np.frombuffer(pixmap.samples, dtype=np.uint8)
+                page = samples.reshape(pixmap.height, pixmap.width, pixmap.n)
+                # The conversion copies, so the pixmap can be released right away
+                code = cv2.COLOR_GRAY2BGR if pixmap.n == 1 else cv2.COLOR_RGB2BGR
+                yield index + 1, cv2.cvtColor(page, code)
+                del pixmap, samples, page
+        return
+
+    with Image.open(path) as image:
+        for index, frame in enumerate(ImageSequence.Iterator(image)):
+            page = load_image(frame)
+            source_dpi = frame.info.get('dpi')
+            if dpi and source_dpi and source_dpi[0]:
+                scale = dpi / float(source_dpi[0])
+                if abs(scale - 1) > 0.01:
+                    page = cv2.resize(page, None, fx=scale, fy=scale,
+                                      interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC)
+            yield index + 1, page
+
+def ordered_map(function, items, workers=1, max_pending=None):
+    """Yield (item, result, error) in input order, running at most max_pending calls at once.
+
+    items is consumed lazily, so with a page generator only a bounded number
+    of pages is ever decoded at the same time.
+    """
+    if workers <= 1:
+        for item in items:
+            try:
+                yield item, function(item), None
+            except Exception as e:
+                yield item, None, e
+        return
+
+    max_pending = max_pending or workers * 2
+    pending = deque()
+
+    def result(item, future):
+        try:
+            return item, future.result(), None
+        except Exception as e:
+            return item, None, e
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for item in items:
+            while len(pending) >= max_pending:
+                yield result(*pending.popleft())
+            pending.append((item, executor.submit(function, item)))
+        while pending:
+            yield result(*pending.popleft())
+
+def process_document(path, process_page, output_xlsx, green_threshold=0.97, yellow_threshold=0.92,
+                     layout='sheets', dpi=None, executor=None, workers=1, on_page=None):
+    """OCR every page of a PDF/TIFF and stream the tables into one workbook.
+
+    process_page(page_array) -> WordBoxes runs one page. layout='sheets'
+    writes each page to its own worksheet, 'append' puts all pages on one
+    sheet with a blank row between them. With a ParallelOCRExecutor pages
+    run in its worker processes, otherwise on `workers` threads; either way
+    they are written in page order. on_page(page_number, page, data, rows)
+    is called after each page is written. Returns a summary dict.
+    """
+    if layout not in ('sheets', 'append'):
+        raise ValueError(f"Unknown page layout: {layout}")
+
+    start = time.perf_counter()
+    summary = {'pages': 0, 'failed': 0, 'failures': []}
+    numbered = iter_pages(path, dpi)
+    page_numbers = deque()
+
+    def pages():
+        # Page numbers travel alongside, so the executor only sees the arrays
+        for page_number, page in numbered:
+            page_numbers.append(page_number)
+            yield page
+
+    if executor is not None:
+        results = executor.map(pages())
+    else:
+        results = ordered_map(process_page, pages(), workers=workers)
+
+    with XlsxStreamWriter(output_xlsx, green_threshold, yellow_threshold) as writer:
+        if layout == 'append':
+            writer.add_sheet('Pages')
+        for page, data, error in results:
+            page_number = page_numbers.popleft()
+            if error is not None:
+                summary['failed'] += 1
+                message = str(error).splitlines()[0] if str(error) else type(error).__name__
+                summary['failures'].append((page_number, message))
+                logger.error(f"{path} page {page_number}: FAILED ({message})")
+                continue
+
+            rows = group_into_grid(data) if data else []
+            if layout == 'sheets':
+                writer.add_sheet(f"Page {page_number}")
+            elif summary['pages']:
+                writer.write_row([])
+            writer.write_rows(rows)
+            summary['pages'] += 1
+            logger.info(f"{path} page {page_number}: {len(data) if data else 0} words, {len(rows)} rows")
+            if on_page is not None:
+                on_page(page_number, page, data, rows)
+        results.close()
+
+    summary['elapsed'] = time.perf_counter() - start
+    logger.info(f"{path}: {summary['pages']} pages written to {output_xlsx} in {summary['elapsed']:.1f}s")
+    return summary
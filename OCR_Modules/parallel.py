@@ -0,0 +1,157 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from OCR_Modules import instrumentation
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+
+# The PaddleOCR instance owned by this worker process, its tiling options and the
+# executor's warm-up barrier (set by _init_worker)
+_worker_ocr = None
+_worker_tiling = None
+_worker_barrier = None
+
+def _init_worker(model_dir, cpu_threads, mkldnn, tiling=None, program_cache=None, backend='paddle', barrier=None):
+    global _worker_ocr, _worker_tiling, _worker_barrier
+    _worker_tiling = tiling
+    _worker_barrier = barrier
+    # Pin the math libraries before paddle is imported so workers don't oversubscribe the cores
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(cpu_threads)
+
+    import cv2
+    from OCR_Modules.paddleOCR import initialize_ocr_SLANet_LCNetV2
+    cv2.setNumThreads(1)
+
+    start = time.perf_counter()
+    _worker_ocr = initialize_ocr_SLANet_LCNetV2(
+        model_dir=model_dir,
+        program_cache=program_cache,
+        backend=backend,
+        enable_mkldnn=mkldnn,
+        cpu_threads=cpu_threads
+    )
+    logger.info(f"Worker {os.getpid()} loaded models in {time.perf_counter() - start:.2f}s "
+                f"({cpu_threads} threads, {backend} backend)")
+
+def _ocr_in_worker(file_path):
+    from OCR_Modules.paddleOCR import process_image, process_image_tiled
+    if _worker_tiling is not None:
+        return process_image_tiled(file_path, _worker_ocr, **_worker_tiling)
+    return process_image(file_path, _worker_ocr)
+
+def _process_in_worker(file_path, trace=False):
+    """(data, stages); stages are the worker's stage timings when the parent is tracing."""
+    if not trace:
+        return _ocr_in_worker(file_path), None
+    instrumentation.enable()
+    with instrumentation.collect_stages() as stages:
+        data = _ocr_in_worker(file_path)
+    return data, stages
+
+def _ping():
+    # Hold this worker until every worker has taken a ping, so no worker answers two
+    if _worker_barrier is not None:
+        _worker_barrier.wait()
+    return os.getpid()
+
+def split_cores(workers=None, threads_per_worker=None):
+    """Pick (workers, threads) so workers x threads matches the available cores."""
+    cores = os.cpu_count() or 1
+    if workers is None:
+        workers = max(1, cores // (threads_per_worker or 2))
+    if threads_per_worker is None:
+        threads_per_worker = max(1, cores // workers)
+    return workers, threads_per_worker
+
+class ParallelOCRExecutor:
+    """Runs PaddleOCR in K worker processes, each holding its own copy of the models.
+
+    tiling, when given, is a dict of process_image_tiled options and makes
+    every worker OCR its pages tile by tile.
+    """
+
+    def __init__(self, workers=None, threads_per_worker=None, model_dir=None, max_pending=None, mkldnn=True,
+                 tiling=None, program_cache=None, backend='paddle'):
+        self.workers, self.threads_per_worker = split_cores(workers, threads_per_worker)
+        self.model_dir = model_dir or DEFAULT_MODEL_DIR
+        # Bound the number of in-flight images so huge batches don't pile up in memory
+        self.max_pending = max_pending or self.workers * 2
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.model_dir, self.threads_per_worker, mkldnn, tiling, program_cache, backend,
+                      context.Barrier(self.workers))
+        )
+
+    def warm_up(self):
+        """Start every worker and wait until its models are loaded.
+
+        Each ping blocks its worker on a barrier until all the workers have
+        one, so the pings land on distinct processes and the pool has to
+        start all of them.
+        """
+        start = time.perf_counter()
+        futures = [self._executor.submit(_ping) for _ in range(self.workers)]
+        pids = {future.result() for future in futures}
+        if len(pids) != self.workers:
+            raise RuntimeError(f"Only {len(pids)} of {self.workers} OCR workers answered the warm-up")
+        logger.info(f"{len(pids)} OCR worker(s) ready in {time.perf_counter() - start:.2f}s")
+        return time.perf_counter() - start
+
+    def submit(self, file_path):
+        """Future of (data, stages) for one image; see map() for the plain results."""
+        # Blocks while max_pending images are already queued
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(_process_in_worker, file_path, instrumentation.is_enabled())
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def map(self, file_paths):
+        """Yield (file_path, data, error) in submission order.
+
+        The workers' stage timings are added to the image record open in the
+        calling thread (see instrumentation.trace_image) as each result is taken.
+        """
+        pending = deque()
+        for file_path in file_paths:
+            # Drain finished heads first so submit() never blocks on our own backlog
+            while len(pending) >= self.max_pending:
+                yield self._result(*pending.popleft())
+            pending.append((file_path, self.submit(file_path)))
+        while pending:
+            yield self._result(*pending.popleft())
+
+    @staticmethod
+    def _result(file_path, future):
+        try:
+            data, stages = future.result()
+        except Exception as e:
+            return file_path, None, e
+        instrumentation.merge_stages(stages)
+        return file_path, data, None
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=exc_type is None)
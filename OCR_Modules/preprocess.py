@@ -0,0 +1,394 @@
+"""Image clean-up before OCR: deskew, denoise, contrast normalisation and
+adaptive binarisation.
+
+    image, info = prepare(path, 'tesseract')
+    data = restore_boxes(run_ocr(image), info)
+
+A few quality measures are taken once per image on a small grey copy, and
+each step is skipped when they say the page does not need it:
+
+    deskew     text lines tilted by MIN_SKEW degrees or more (projection profile search)
+    denoise    estimated noise sigma of NOISE_SIGMA or more (3x3 median)
+    contrast   low grey level spread, or lighting that changes across the page (CLAHE on luma)
+    binarize   the same, unless the page is already black and white (adaptive mean threshold)
+
+Binarisation is only in Tesseract's default steps; PaddleOCR's detector is
+trained on natural images. OCR_PREPROCESS=off turns the stage off and
+OCR_PREPROCESS=deskew,contrast picks steps for both engines. Results are
+kept in a small in-memory cache per image, so running the same image again,
+or with the other engine, only repeats the steps that differ. Boxes found
+on a deskewed image are rotated back by restore_boxes, so they line up with
+the original.
+
+    python -m OCR_Modules.preprocess scan.jpg --engine tesseract --save out.png
+"""
+import argparse
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from OCR_Modules.image_io import describe_source, is_path, load_image
+from OCR_Modules.instrumentation import stage, timed
+from OCR_Modules.word_boxes import WordBoxes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Always applied in this order
+STEPS = ('deskew', 'denoise', 'contrast', 'binarize')
+DEFAULT_STEPS = {
+    'paddle': ('deskew', 'denoise', 'contrast'),
+    'tesseract': ('deskew', 'denoise', 'contrast', 'binarize'),
+}
+# Quality measures are taken on a copy no larger than this
+ANALYSIS_SIZE = 1024
+# Skew search range and the smallest angle worth a rotation (degrees)
+MAX_SKEW = 10.0
+MIN_SKEW = 0.3
+NOISE_SIGMA = 4.0
+# Grey levels between the 1st and 99th percentile below which contrast is stretched
+MIN_SPREAD = 150
+# Standard deviation of the fitted background brightness above which lighting counts as uneven
+MAX_LIGHTING = 12.0
+# Noise sigma below which a full-range image is a clean digital original (screenshot, export)
+CLEAN_NOISE = 1.0
+# Share of pixels that are already (nearly) black or white on a binarised page
+BINARY_FRACTION = 0.9
+CACHE_BYTES = 128 * 1024 * 1024
+
+def parse_steps(value):
+    steps = [step.strip().lower() for step in value.split(',') if step.strip()]
+    unknown = sorted(set(steps) - set(STEPS))
+    if unknown:
+        raise ValueError(f"Unknown pre-processing step(s): {', '.join(unknown)} (choose from {', '.join(STEPS)})")
+    return tuple(step for step in STEPS if step in steps)
+
+def default_steps(engine):
+    """The steps for 'paddle' or 'tesseract', from OCR_PREPROCESS or DEFAULT_STEPS."""
+    value = os.environ.get('OCR_PREPROCESS', '').strip().lower()
+    if value in ('', 'auto', 'on'):
+        return DEFAULT_STEPS[engine]
+    if value in ('off', 'none', '0'):
+        return ()
+    return parse_steps(value)
+
+def cache_params(engine, steps=None):
+    """OCR result cache parameters for the pre-processing of `engine`; empty when it is off."""
+    steps = default_steps(engine) if steps is None else steps
+    return {'preprocess': ','.join(steps)} if steps else {}
+
+def _grey(image):
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+def _shrink(grey, size=ANALYSIS_SIZE):
+    scale = size / max(grey.shape[:2])
+    if scale >= 1:
+        return grey
+    return cv2.resize(grey, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+def estimate_skew(grey, max_angle=MAX_SKEW, max_points=50000):
+    """Angle (degrees, counter-clockwise) that levels the text lines of a grey image.
+
+    Projection profile search: for each candidate angle the dark pixels are
+    projected onto the rotated y axis with one bincount over all angles, and
+    the angle whose row profile has the sharpest steps wins. A coarse pass
+    over +-max_angle is refined around the best coarse angle.
+    """
+    _, ink = cv2.threshold(grey, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    ys, xs = np.nonzero(ink)
+    if len(xs) < 100:
+        return 0.0
+    if len(xs) > max_points:
+        stride = len(xs) // max_points + 1
+        ys, xs = ys[::stride], xs[::stride]
+    xs = xs.astype(np.float32) - grey.shape[1] / 2
+    ys = ys.astype(np.float32)
+
+    def best(angles):
+        slopes = np.tan(np.radians(angles)).astype(np.float32)
+        rows = np.rint(ys[None, :] - xs[None, :] * slopes[:, None]).astype(np.int64)
+        rows -= rows.min()
+        span = int(rows.max()) + 1
+        rows += np.arange(len(angles))[:, None] * span
+        profiles = np.bincount(rows.ravel(), minlength=len(angles) * span).reshape(len(angles), span)
+        scores = np.square(np.diff(profiles, axis=1).astype(np.float64)).sum(axis=1)
+        return float(angles[int(np.argmax(scores))])
+
+    coarse = best(np.arange(-max_angle, max_angle + 0.25, 0.5))
+    return best(np.arange(coarse - 0.5, coarse + 0.55, 0.05))
+
+def estimate_noise(grey, crop=512):
+    """Noise sigma of a grey image from the median absolute Laplacian-like response (Immerkaer)."""
+    height, width = grey.shape
+    # Full resolution, since downscaling averages the noise away; the centre is usually page content
+    y0, x0 = max(0, (height - crop) // 2), max(0, (width - crop) // 2)
+    patch = grey[y0:y0 + crop, x0:x0 + crop].astype(np.float32)
+    kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+    response = cv2.filter2D(patch, -1, kernel)[1:-1, 1:-1]
+    # The kernel has an L2 norm of 6; the median keeps text edges from counting as noise
+    return float(np.median(np.abs(response)) / (0.6745 * 6))
+
+def estimate_lighting(small):
+    """How much the page background brightness changes across a grey image.
+
+    Dark text is removed by a wide max filter and the result is averaged
+    onto a 16x16 grid. A smooth quadratic surface is fitted to the grid,
+    dropping the cells far from it and refitting, so solid areas (title bars,
+    sidebars, filled cells) don't count; the spread of the surface is the
+    lighting change (gradients, vignetting).
+    """
+    background = cv2.dilate(small, np.ones((15, 15), np.uint8))
+    grid = cv2.resize(background, (16, 16), interpolation=cv2.INTER_AREA).astype(np.float64).ravel()
+    ys, xs = np.divmod(np.arange(grid.size), 16)
+    xs, ys = xs / 15 - 0.5, ys / 15 - 0.5
+    design = np.column_stack([np.ones(grid.size), xs, ys, xs * xs, xs * ys, ys * ys])
+    # Start from the cells near the typical background level, then refit around the surface
+    residual = np.abs(grid - np.median(grid))
+    keep = residual <= max(3 * np.median(residual), MAX_LIGHTING)
+    for _ in range(5):
+        coef = np.linalg.lstsq(design[keep], grid[keep], rcond=None)[0]
+        residual = np.abs(grid - design @ coef)
+        inliers = residual <= max(3 * np.median(residual), MAX_LIGHTING)
+        # Stop when the fit is settled, or when most of the page would be thrown away
+        if np.array_equal(inliers, keep) or np.count_nonzero(inliers) < grid.size // 4:
+            break
+        keep = inliers
+    return float((design @ coef).std())
+
+@timed('assess')
+def assess(image):
+    """Quick quality measures of an image, a few ms whatever its size."""
+    grey = _grey(image)
+    small = _shrink(grey)
+    low, high = np.percentile(small, (1, 99))
+    return {
+        'skew': estimate_skew(small),
+        'noise': estimate_noise(grey),
+        'spread': float(high - low),
+        'lighting': estimate_lighting(small),
+        'binary': float(np.count_nonzero((small <= 32) | (small >= 223)) / small.size),
+    }
+
+def needs(step, quality):
+    """Whether `step` would change anything on an image with these quality measures."""
+    if step == 'deskew':
+        return abs(quality['skew']) >= MIN_SKEW
+    if step == 'denoise':
+        return quality['noise'] >= NOISE_SIGMA and quality['binary'] < BINARY_FRACTION
+    # A full-range, noise-free image is a digital original; its dark panels are not a shadow
+    clean = quality['spread'] >= MIN_SPREAD and quality['noise'] < CLEAN_NOISE
+    poor = quality['spread'] < MIN_SPREAD or (quality['lighting'] > MAX_LIGHTING and not clean)
+    if step == 'contrast':
+        return poor
+    if step == 'binarize':
+        return poor and quality['binary'] < BINARY_FRACTION
+    raise ValueError(f"Unknown pre-processing step: {step}")
+
+def deskew(image, angle):
+    """Rotate by `angle` degrees onto a canvas that holds the whole page.
+
+    Returns the rotated image and the 2x3 matrix from original to rotated
+    coordinates.
+    """
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(math.ceil(height * sin + width * cos))
+    new_height = int(math.ceil(height * cos + width * sin))
+    matrix[0, 2] += (new_width - width) / 2
+    matrix[1, 2] += (new_height - height) / 2
+    # The new corners are filled with the page colour: replicated edges read as streaks of ink
+    edges = np.concatenate([image[0], image[-1], image[:, 0], image[:, -1]])
+    fill = np.median(edges, axis=0)
+    fill = tuple(float(value) for value in np.atleast_1d(fill))
+    rotated = cv2.warpAffine(image, matrix, (new_width, new_height), flags=cv2.INTER_LINEAR,
+                             borderMode=cv2.BORDER_CONSTANT, borderValue=fill)
+    return rotated, matrix
+
+def denoise(image):
+    return cv2.medianBlur(image, 3)
+
+def normalise_contrast(image, clip_limit=2.0, tiles=8):
+    """CLAHE on the luma channel, so colours keep their hue."""
+    clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tiles, tiles))
+    if image.ndim == 2:
+        return clahe.apply(image)
+    ycrcb = cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb)
+    ycrcb[:, :, 0] = clahe.apply(np.ascontiguousarray(ycrcb[:, :, 0]))
+    return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
+
+def binarize(image, offset=15):
+    """Adaptive mean threshold to a single-channel black and white image.
+
+    The local mean is a box filter, constant time per pixel whatever the
+    block size, where a Gaussian window gets slower as blocks grow.
+    """
+    grey = _grey(image)
+    # About two text lines per block on a typical page, always odd
+    block = max(15, min(grey.shape[:2]) // 40) | 1
+    return cv2.adaptiveThreshold(grey, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, block, offset)
+
+def apply_step(step, image, quality):
+    """Run one step; returns (image, matrix) where matrix is only set by deskew."""
+    if step == 'deskew':
+        return deskew(image, quality['skew'])
+    if step == 'denoise':
+        return denoise(image), None
+    if step == 'contrast':
+        return normalise_contrast(image), None
+    return binarize(image), None
+
+class PreprocessCache:
+    """Small LRU of pre-processed images, bounded by their total size in bytes.
+
+    Keys are (image key, steps). An entry whose image is None means no step
+    was needed and the original is used as is.
+    """
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, image, info):
+        size = image.nbytes if image is not None else 0
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0].nbytes if old[0] is not None else 0
+            self._entries[key] = (image, info)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes if evicted is not None else 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+_cache = PreprocessCache()
+
+def image_key(source):
+    """Cache identity of an image: path and modification time, or a hash of the pixels."""
+    if is_path(source):
+        path = os.path.abspath(os.fspath(source))
+        stat = os.stat(path)
+        return ('file', path, stat.st_mtime_ns, stat.st_size)
+    from OCR_Modules.ocr_cache import hash_image
+    return ('pixels', hash_image(source))
+
+def _cached_prefix(key, steps, cache):
+    # Longest already processed prefix of the steps, e.g. PaddleOCR's run before Tesseract's
+    for count in range(len(steps), 0, -1):
+        entry = cache.get((key, steps[:count]))
+        if entry is not None:
+            return count, entry
+    return 0, None
+
+def prepare(source, engine, steps=None, cache=_cache):
+    """Load `source` and run the pre-processing steps it needs.
+
+    Returns (BGR or grey ndarray, info); info['matrix'] maps original to
+    processed coordinates (None when the image was not rotated).
+    """
+    steps = default_steps(engine) if steps is None else tuple(steps)
+    if not steps:
+        return load_image(source), {'steps': (), 'applied': [], 'matrix': None, 'quality': None}
+
+    start = time.perf_counter()
+    key = image_key(source) if cache is not None else None
+    done, entry = _cached_prefix(key, steps, cache) if cache is not None else (0, None)
+    if entry is not None:
+        image, info = entry
+        info = dict(info, applied=list(info['applied']), timings=dict(info['timings']))
+        if done == len(steps):
+            logger.info(f"Pre-processing cache hit for {describe_source(source)}")
+            return (image if image is not None else load_image(source)), dict(info, steps=steps)
+        if image is None:
+            image = load_image(source)
+    else:
+        image = load_image(source)
+        info = {'applied': [], 'matrix': None, 'timings': {}, 'quality': assess(image)}
+
+    quality = info['quality']
+    changed = entry is not None and entry[0] is not None
+    for step in steps[done:]:
+        if not needs(step, quality):
+            continue
+        step_start = time.perf_counter()
+        with stage(step):
+            image, matrix = apply_step(step, image, quality)
+        info['timings'][step] = (time.perf_counter() - step_start) * 1000
+        info['applied'].append(step)
+        if matrix is not None:
+            info['matrix'] = matrix
+        changed = True
+    info['steps'] = steps
+
+    if cache is not None:
+        cache.put((key, steps), image if changed else None, info)
+    skipped = [step for step in steps if step not in info['applied']]
+    applied = [f"{step} {info['timings'][step]:.0f} ms" for step in info['applied']]
+    if 'deskew' in info['applied']:
+        applied[info['applied'].index('deskew')] = f"deskew {quality['skew']:+.2f} deg {info['timings']['deskew']:.0f} ms"
+    logger.info(f"Pre-processed {describe_source(source)} in {(time.perf_counter() - start) * 1000:.0f} ms: "
+                f"{', '.join(applied) or 'nothing needed'}"
+                + (f"; skipped {', '.join(skipped)}" if skipped else ""))
+    return image, info
+
+def restore_boxes(data, info):
+    """Map WordBoxes found on a pre-processed image back onto the original image."""
+    matrix = info.get('matrix') if info else None
+    if matrix is None or not len(data):
+        return data
+    inverse = cv2.invertAffineTransform(matrix).astype(np.float32)
+    boxes = data.boxes @ inverse[:, :2].T + inverse[:, 2]
+    return WordBoxes(boxes, data.confidence, data.texts)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show (and save) what pre-processing does to an image")
+    parser.add_argument('image')
+    parser.add_argument('--engine', choices=sorted(DEFAULT_STEPS), default='paddle')
+    parser.add_argument('--steps', help=f"Comma separated steps (default: the engine's, from {', '.join(STEPS)})")
+    parser.add_argument('--save', help="Write the pre-processed image here")
+    args = parser.parse_args(argv)
+
+    steps = parse_steps(args.steps) if args.steps else None
+    image, info = prepare(args.image, args.engine, steps, cache=None)
+    quality = info['quality'] or {}
+    print(' '.join(f"{name}={value:.2f}" for name, value in quality.items()))
+    for step in info['steps']:
+        if step in info['applied']:
+            print(f"{step:<9} applied  {info['timings'][step]:7.1f} ms")
+        else:
+            print(f"{step:<9} skipped")
+    if args.save:
+        cv2.imwrite(args.save, image)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import logging
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from OCR_Modules.instrumentation import timed
+from OCR_Modules.xlsx_writer import GREEN, YELLOW, RED
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CELL_WIDTH = 90
+CELL_HEIGHT = 30
+FONT_SIZE = 20
+BORDER_SIZE = 40
+
+# The whole table is drawn unless the image would exceed this many pixels (about 48 MB as RGB);
+# then the rows that fit are drawn and a note under the table says how much is shown
+MAX_PREVIEW_PIXELS = 16_000_000
+NOTE_HEIGHT = 30
+
+_fonts = {}
+
+def _font(size):
+    font = _fonts.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype("arial.ttf", size)
+        except:
+            font = ImageFont.load_default()
+        _fonts[size] = font
+    return font
+
+def table_shape(rows):
+    return len(rows), max((len(row) for row in rows), default=0)
+
+@timed('preview')
+def render_table_preview(rows, green_threshold=0.97, yellow_threshold=0.92, viewport=None,
+                         cell_width=CELL_WIDTH, cell_height=CELL_HEIGHT, font_size=FONT_SIZE, border_size=BORDER_SIZE,
+                         max_pixels=MAX_PREVIEW_PIXELS):
+    """Draw the OCR grid the way it will look in Excel, straight from memory.
+
+    rows is the group_into_grid output (lists of (text, confidence) or None).
+    viewport is (first_row, first_col, n_rows, n_cols) to draw only that
+    window; by default the whole table is drawn, up to max_pixels. Whenever
+    part of the table is left out, a note under it says what is shown.
+    """
+    start = time.perf_counter()
+    total_rows, total_cols = table_shape(rows)
+    if viewport is None:
+        first_row, first_col, n_rows, n_cols = 0, 0, total_rows, total_cols
+        if max_pixels:
+            # Keep every column where possible and cut rows, so what is shown reads like the sheet
+            n_cols = min(n_cols, max(1, (max_pixels // (cell_height + 2 * border_size + NOTE_HEIGHT)) // cell_width))
+            width = cell_width * n_cols + 2 * border_size
+            n_rows = min(n_rows, max(1, (max_pixels // width - 2 * border_size - NOTE_HEIGHT) // cell_height))
+    else:
+        first_row, first_col, n_rows, n_cols = viewport
+    n_rows = max(min(n_rows, total_rows - first_row), 0)
+    n_cols = max(min(n_cols, total_cols - first_col), 0)
+    partial = n_rows < total_rows or n_cols < total_cols
+
+    image_width = cell_width * n_cols + 2 * border_size
+    image_height = cell_height * n_rows + 2 * border_size + (NOTE_HEIGHT if partial else 0)
+    image = Image.new('RGB', (image_width, image_height), 'white')
+    draw = ImageDraw.Draw(image)
+    font = _font(font_size)
+
+    for row_idx in range(n_rows):
+        row = rows[first_row + row_idx]
+        y1 = row_idx * cell_height + border_size
+        y2 = y1 + cell_height
+        for col_idx in range(n_cols):
+            x1 = col_idx * cell_width + border_size
+            x2 = x1 + cell_width
+            source_col = first_col + col_idx
+            cell = row[source_col] if source_col < len(row) else None
+
+            if cell is None:
+                draw.rectangle([x1, y1, x2, y2], fill='#FFFFFF', outline='black')
+                continue
+
+            text, confidence = cell
+            if confidence >= green_threshold:
+                fill_color = GREEN
+            elif confidence >= yellow_threshold:
+                fill_color = YELLOW
+            else:
+                fill_color = RED
+            draw.rectangle([x1, y1, x2, y2], fill=f'#{fill_color}', outline='black')
+
+            text = str(text)
+            bbox = font.getbbox(text)
+            text_x = x1 + (cell_width - (bbox[2] - bbox[0])) / 2
+            text_y = y1 + (cell_height - (bbox[3] - bbox[1])) / 2
+            draw.text((text_x, text_y), text, fill='black', font=font)
+
+    if partial:
+        note = (f"Showing rows {first_row + 1}-{first_row + n_rows} of {total_rows}, "
+                f"columns {first_col + 1}-{first_col + n_cols} of {total_cols}; the Excel file has the whole table")
+        draw.text((border_size, cell_height * n_rows + border_size + NOTE_HEIGHT / 4), note, fill='#C00000',
+                  font=font)
+    logger.info(f"Rendered {n_rows}x{n_cols} preview of a {total_rows}x{total_cols} table "
+                f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return image
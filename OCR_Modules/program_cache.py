@@ -0,0 +1,325 @@
+"""On-disk cache of Paddle's optimised inference programs.
+
+Every PaddleOCR(...) construction parses inference.pdmodel/.pdiparams of the
+det, cls and rec models and runs the IR optimisation passes on them again.
+The first start saves the optimised programs; later starts load them with
+the passes switched off. Each snapshot is keyed by the model file hashes,
+the Paddle version, the CPU signature and the options that change the
+passes, so a changed model or machine simply builds a new snapshot.
+
+A new snapshot is only used after a validation run shows it OCRs a test
+image exactly like the original models. A snapshot that fails validation
+is marked as failed and the original models are used from then on.
+
+The cache is opt-in (OCR_PROGRAM_CACHE=1, or --program-cache in the batch
+CLI) until it has been verified against paddlepaddle 2.6.2.
+
+    python -m OCR_Modules.program_cache --model-dir models    # build, then time cold vs warm
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import threading
+import time
+
+from OCR_Modules.ocr_cache import hash_files
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROGRAM_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.ocr_tool', 'programs')
+MODEL_KINDS = ('det', 'cls', 'rec')
+# PaddleOCR options that change which optimisation passes run
+PROGRAM_OPTIONS = ('use_gpu', 'enable_mkldnn', 'precision', 'use_tensorrt', 'use_xpu', 'use_npu')
+OPTIMIZED_FILES = ('_optimized.pdmodel', '_optimized.pdiparams')
+MANIFEST = 'manifest.json'
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+# Model dir -> staging dir for the optimised program, while a build is running
+_save_requests = {}
+# Snapshot dirs in use; their programs are loaded without the IR passes
+_snapshot_dirs = set()
+_hook_installed = False
+# Constructions in one process are serialised so two of them never build the same snapshot
+_create_lock = threading.RLock()
+
+def enabled():
+    """True when OCR_PROGRAM_CACHE switches the cache on."""
+    return os.environ.get('OCR_PROGRAM_CACHE', '').strip().lower() in TRUE_VALUES
+
+def cpu_signature():
+    """Short hash of the CPU model and instruction set extensions."""
+    flags = ''
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if line.startswith(('flags', 'Features')):
+                    flags = ' '.join(sorted(line.split(':', 1)[1].split()))
+                    break
+    except OSError:
+        pass
+    # On Windows platform.processor() names family, model and stepping
+    text = f"{platform.machine()}|{platform.processor()}|{flags}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+def program_key(model_dir, params, paddle_version):
+    files = [os.path.join(model_dir, name) for name in os.listdir(model_dir)
+             if name.endswith(('.pdmodel', '.pdiparams'))]
+    h = hashlib.sha256()
+    h.update(hash_files(files).encode('ascii'))
+    h.update(paddle_version.encode('utf-8'))
+    h.update(cpu_signature().encode('ascii'))
+    h.update(json.dumps({name: params.get(name) for name in PROGRAM_OPTIONS}, sort_keys=True,
+                        default=str).encode('utf-8'))
+    return h.hexdigest()[:24]
+
+def read_manifest(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _install_config_hook():
+    """Swap the inference module PaddleOCR's create_predictor uses for one whose Config
+    saves optimised programs for models being built and skips the passes for snapshots."""
+    global _hook_installed
+    if _hook_installed:
+        return
+    from paddle import inference
+    from tools.infer import utility
+
+    class SnapshotConfig(inference.Config):
+        def __init__(self, *args):
+            super().__init__(*args)
+            model_dir = os.path.dirname(os.path.abspath(self.prog_file()))
+            staging_dir = _save_requests.get(model_dir)
+            if staging_dir is not None:
+                try:
+                    self.enable_save_optim_model(True)
+                    self.set_optim_cache_dir(staging_dir)
+                except AttributeError:
+                    # Older Paddle: nothing is saved and the build is recorded as failed
+                    pass
+
+        def switch_ir_optim(self, x=True):
+            if os.path.dirname(os.path.abspath(self.prog_file())) in _snapshot_dirs:
+                # The snapshot already is the output of these passes
+                x = False
+            super().switch_ir_optim(x)
+
+    class InferenceModule:
+        Config = SnapshotConfig
+
+        def __getattr__(self, name):
+            return getattr(inference, name)
+
+    utility.inference = InferenceModule()
+    _hook_installed = True
+
+def _validation_image():
+    # A few lines of plain text, rendered rather than shipped
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+
+    image = Image.new('RGB', (640, 200), 'white')
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(28)
+    for y, line in zip((20, 80, 140), ("Invoice 20417", "Total 1,284.50 EUR", "Due 2024-07-31")):
+        draw.text((20, y), line, fill='black', font=font)
+    return np.asarray(image)[:, :, ::-1].copy()
+
+def _ocr_lines(ocr, image):
+    result = ocr.ocr(image, cls=True, det=True)
+    lines = []
+    for page in result or []:
+        for box, (text, confidence) in page or []:
+            lines.append((text, float(confidence), [coordinate for point in box for coordinate in point]))
+    return lines
+
+def _same_result(expected, actual, box_tolerance=2.0, confidence_tolerance=0.02):
+    if len(expected) != len(actual):
+        return False
+    for (text_a, conf_a, box_a), (text_b, conf_b, box_b) in zip(expected, actual):
+        if text_a != text_b or abs(conf_a - conf_b) > confidence_tolerance:
+            return False
+        if max(abs(a - b) for a, b in zip(box_a, box_b)) > box_tolerance:
+            return False
+    return True
+
+def _write_manifest(directory, manifest):
+    with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+def _publish(staging_dir, snapshot_dir):
+    # Another process may have published the same snapshot meanwhile; the first one wins
+    try:
+        os.replace(staging_dir, snapshot_dir)
+    except OSError:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+def _prune(cache_dir, kind, model_dir, keep):
+    """Remove older snapshots of the same model directory."""
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name == keep or not name.startswith(kind + '-'):
+            continue
+        manifest = read_manifest(path)
+        if manifest and manifest.get('source') == model_dir:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Removed stale {kind} program snapshot {name}")
+
+def create_paddle_ocr(params, cache_dir=None):
+    """PaddleOCR(**params), loading the det/cls/rec models from cached optimised programs.
+
+    Missing snapshots are built during this construction, validated against
+    the original models and published for the next start.
+    """
+    import paddle
+    from paddleocr import PaddleOCR
+
+    cache_dir = os.path.abspath(cache_dir or DEFAULT_PROGRAM_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    with _create_lock:
+        _install_config_hook()
+        return _create(PaddleOCR, paddle.__version__, params, cache_dir)
+
+def _create(PaddleOCR, paddle_version, params, cache_dir):
+    params = dict(params)
+    original = dict(params)
+    builds = {}
+    for kind in MODEL_KINDS:
+        model_dir = params.get(f'{kind}_model_dir')
+        if not model_dir or not os.path.isdir(model_dir):
+            continue
+        model_dir = os.path.abspath(model_dir)
+        key = program_key(model_dir, params, paddle_version)
+        snapshot_dir = os.path.join(cache_dir, f"{kind}-{key}")
+        manifest = read_manifest(snapshot_dir)
+        if manifest is None:
+            staging_dir = f"{snapshot_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+            os.makedirs(staging_dir, exist_ok=True)
+            builds[kind] = (model_dir, staging_dir, snapshot_dir)
+            _save_requests[model_dir] = staging_dir
+        elif manifest['status'] == 'ok':
+            _snapshot_dirs.add(snapshot_dir)
+            params[f'{kind}_model_dir'] = snapshot_dir
+
+    start = time.perf_counter()
+    try:
+        ocr = PaddleOCR(**params)
+    except Exception:
+        for _, staging_dir, _ in builds.values():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    finally:
+        for model_dir, _, _ in builds.values():
+            _save_requests.pop(model_dir, None)
+    elapsed = time.perf_counter() - start
+
+    if not builds:
+        snapshots = [kind for kind in MODEL_KINDS
+                     if params.get(f'{kind}_model_dir') != original.get(f'{kind}_model_dir')]
+        logger.info(f"Predictors created in {elapsed:.2f}s from optimised programs for "
+                    f"{', '.join(snapshots) or 'no model'}")
+        return ocr
+
+    logger.info(f"Predictors created in {elapsed:.2f}s, saving optimised programs for {', '.join(builds)}")
+    snapshot_params = dict(params)
+    for kind, (model_dir, staging_dir, snapshot_dir) in builds.items():
+        saved = [os.path.join(staging_dir, name) for name in OPTIMIZED_FILES]
+        if not all(os.path.exists(path) for path in saved):
+            # This Paddle build did not save the program; remember that instead of retrying every start
+            _write_manifest(staging_dir, {'status': 'failed', 'source': model_dir,
+                                          'reason': 'Paddle did not write an optimised program'})
+            _publish(staging_dir, snapshot_dir)
+            builds[kind] = None
+            continue
+        for path, name in zip(saved, ('inference.pdmodel', 'inference.pdiparams')):
+            os.replace(path, os.path.join(staging_dir, name))
+        _snapshot_dirs.add(staging_dir)
+        snapshot_params[f'{kind}_model_dir'] = staging_dir
+    builds = {kind: build for kind, build in builds.items() if build is not None}
+    if not builds:
+        return ocr
+
+    # Validate: the snapshot must OCR a test image exactly like the models it came from
+    status, reason, warm = 'failed', None, None
+    try:
+        image = _validation_image()
+        expected = _ocr_lines(ocr, image)
+        start = time.perf_counter()
+        candidate = PaddleOCR(**snapshot_params)
+        warm = time.perf_counter() - start
+        if _same_result(expected, _ocr_lines(candidate, image)):
+            status = 'ok'
+        else:
+            reason = 'validation output differs from the original models'
+        # Release the snapshot files before the staging dirs are moved
+        del candidate
+    except Exception as e:
+        reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+    logger.info(f"Optimised programs for {', '.join(builds)}: {status}"
+                f"{f' ({reason})' if reason else ''}; cold start {elapsed:.2f}s"
+                f"{f', warm start {warm:.2f}s' if warm is not None else ''}")
+
+    for kind, (model_dir, staging_dir, snapshot_dir) in builds.items():
+        _snapshot_dirs.discard(staging_dir)
+        if status != 'ok':
+            for name in ('inference.pdmodel', 'inference.pdiparams'):
+                try:
+                    os.remove(os.path.join(staging_dir, name))
+                except OSError:
+                    pass
+        _write_manifest(staging_dir, {
+            'status': status, 'reason': reason, 'source': model_dir, 'paddle': paddle_version,
+            'cpu': cpu_signature(), 'options': {name: params.get(name) for name in PROGRAM_OPTIONS},
+            'cold_seconds': round(elapsed, 3), 'warm_seconds': round(warm, 3) if warm is not None else None,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        _publish(staging_dir, snapshot_dir)
+        if status == 'ok':
+            _prune(cache_dir, kind, model_dir, keep=os.path.basename(snapshot_dir))
+    # The candidate loaded from the staging dirs, which have been moved; keep the original instance
+    return ocr
+
+def clear(cache_dir=None):
+    shutil.rmtree(cache_dir or DEFAULT_PROGRAM_CACHE_DIR, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the optimised program cache and time cold vs warm starts")
+    parser.add_argument('--model-dir', help="Directory with det/, cls/ and rec/ (default: the PaddleOCR install dir)")
+    parser.add_argument('--cache-dir', default=DEFAULT_PROGRAM_CACHE_DIR)
+    parser.add_argument('--mkldnn', action='store_true', help="Build for enable_mkldnn=True, as the batch workers use")
+    parser.add_argument('--clear', action='store_true', help="Delete the cache first, so the first start is cold")
+    args = parser.parse_args(argv)
+
+    from OCR_Modules.paddleOCR import default_model_dir
+
+    if args.clear:
+        clear(args.cache_dir)
+    model_dir = args.model_dir or default_model_dir()
+    params = dict(use_angle_cls=True, lang='en', use_gpu=False, show_log=False, enable_mkldnn=args.mkldnn,
+                  **{f'{kind}_model_dir': os.path.join(model_dir, kind) for kind in MODEL_KINDS})
+    timings = []
+    for label in ('first', 'second'):
+        start = time.perf_counter()
+        create_paddle_ocr(params, args.cache_dir)
+        timings.append(time.perf_counter() - start)
+        print(f"{label} start: {timings[-1]:.2f}s")
+    for kind in MODEL_KINDS:
+        for name in sorted(os.listdir(args.cache_dir)):
+            manifest = read_manifest(os.path.join(args.cache_dir, name))
+            if name.startswith(kind + '-') and manifest and manifest.get('source') == os.path.abspath(
+                    os.path.join(model_dir, kind)):
+                print(f"{kind}: {manifest['status']} {manifest.get('reason') or ''}".rstrip())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
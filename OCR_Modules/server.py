@@ -0,0 +1,467 @@
+"""Local HTTP OCR service on asyncio, holding warm engines.
+
+    python -m OCR_Modules.server --engine paddle --port 8765
+
+    curl --data-binary @scan.png 'http://127.0.0.1:8765/ocr?format=grid'
+    curl -F file=@scan.png 'http://127.0.0.1:8765/ocr?format=xlsx' -o scan.xlsx
+    curl http://127.0.0.1:8765/metrics
+
+POST /ocr takes an image as the raw request body or as a multipart form
+field and returns JSON words (format=words, the default), a JSON grid of
+table cells (format=grid) or an xlsx workbook (format=xlsx). Requests
+that arrive within --batch-window ms of each other are OCR'd in one
+process_images call (up to --max-batch images). At most --queue-size
+images wait for an engine; beyond that the server answers 429 with
+Retry-After rather than letting latency grow without bound.
+
+GET /metrics reports request counts, queue depth, batch sizes and latency
+percentiles; GET /health says whether the engines are loaded.
+"""
+import argparse
+import asyncio
+import email.parser
+import email.policy
+import io
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+import numpy as np
+
+from OCR_Modules import instrumentation
+from OCR_Modules.table_layout import group_into_grid
+from OCR_Modules.xlsx_writer import write_xlsx
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMATS = ('words', 'grid', 'xlsx')
+XLSX_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+MAX_HEADERS = 100
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+def percentiles(values):
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None, 'mean': None}
+    array = np.fromiter(values, dtype=np.float64)
+    p50, p90, p99 = np.percentile(array, (50, 90, 99))
+    return {'p50': round(p50, 2), 'p90': round(p90, 2), 'p99': round(p99, 2), 'mean': round(array.mean(), 2)}
+
+class Metrics:
+    """Counters and recent timings; only touched from the event loop thread."""
+
+    def __init__(self, window=1000):
+        self.started = time.time()
+        self.requests = 0
+        self.ok = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_images = 0
+        self.max_batch = 0
+        # Recent values in ms, for percentiles
+        self.latency = deque(maxlen=window)
+        self.queue_wait = deque(maxlen=window)
+        self.inference = deque(maxlen=window)
+
+    def record_batch(self, size, inference_ms):
+        self.batches += 1
+        self.batched_images += size
+        self.max_batch = max(self.max_batch, size)
+        self.inference.append(inference_ms)
+
+    def snapshot(self, queue_depth, queue_capacity):
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'queue_depth': queue_depth,
+            'queue_capacity': queue_capacity,
+            'requests': {'total': self.requests, 'ok': self.ok, 'rejected': self.rejected, 'failed': self.failed},
+            'batches': {
+                'count': self.batches,
+                'images': self.batched_images,
+                'mean_size': round(self.batched_images / self.batches, 2) if self.batches else None,
+                'max_size': self.max_batch,
+            },
+            'latency_ms': percentiles(self.latency),
+            'queue_wait_ms': percentiles(self.queue_wait),
+            'inference_ms': percentiles(self.inference),
+        }
+
+def decode_image(body):
+    """BGR ndarray from encoded image bytes (PNG, JPEG, BMP, TIFF, ...)."""
+    image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise HTTPError(400, "The request body is not a readable image")
+    return image
+
+def multipart_file(content_type, body):
+    """The first file (or 'file'/'image' field) of a multipart/form-data body."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if part.get_filename() or name in ('file', 'image'):
+            return part.get_payload(decode=True)
+    raise HTTPError(400, "No file field in the multipart form")
+
+def words_json(data):
+    return {
+        'count': len(data),
+        'words': [{'text': word['text'], 'confidence': round(word['confidence'], 4),
+                   'bbox': [[round(float(x), 1), round(float(y), 1)] for x, y in word['bbox']]}
+                  for word in data],
+    }
+
+def grid_json(data):
+    rows = group_into_grid(data) if len(data) else []
+    return {
+        'rows': len(rows),
+        'columns': max((len(row) for row in rows), default=0),
+        'grid': [[None if cell is None else {'text': cell[0], 'confidence': round(float(cell[1]), 4)}
+                  for cell in row] for row in rows],
+    }
+
+def xlsx_bytes(data, green_threshold, yellow_threshold):
+    rows = group_into_grid(data) if len(data) else []
+    buffer = io.BytesIO()
+    write_xlsx(rows, buffer, green_threshold, yellow_threshold)
+    return buffer.getvalue()
+
+class OCRServer:
+    """Micro-batching HTTP front end for one OCR module and its engine pool.
+
+    Each of `engines` batch loops takes the first waiting image, gathers
+    whatever else arrives within batch_window seconds (up to max_batch) and
+    runs them through module.process_images on one engine from the pool.
+    """
+
+    def __init__(self, module, pool, engine_name, engines=1, batch_window=0.02, max_batch=8, queue_size=32,
+                 max_body=50 * 1024 * 1024):
+        self.module = module
+        self.pool = pool
+        self.engine_name = engine_name
+        self.engines = max(1, engines)
+        self.batch_window = batch_window
+        self.max_batch = max(1, max_batch)
+        self.queue_size = queue_size
+        self.max_body = max_body
+        self.metrics = Metrics()
+        self.ready = False
+        self._queue = None
+        self._server = None
+        self._batch_tasks = []
+        # Inference threads, one per engine, apart from the default executor used for decoding and xlsx
+        self._inference = ThreadPoolExecutor(max_workers=self.engines, thread_name_prefix='ocr-batch')
+
+    async def start(self, host='127.0.0.1', port=8765):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self._batch_tasks = [asyncio.create_task(self._batch_loop()) for _ in range(self.engines)]
+        # Load the engines while already answering /health, so a supervisor can see the progress
+        asyncio.get_running_loop().run_in_executor(self._inference, self._warm_up)
+        return self._server
+
+    def _warm_up(self):
+        start = time.perf_counter()
+        self.pool.resize(self.engines)
+        try:
+            self.pool.warm_up()
+        except Exception as e:
+            # /health keeps reporting 'loading'; the first request retries the load
+            logger.error(f"Could not load the {self.engine_name} engine: {str(e)}")
+            return
+        self.ready = True
+        logger.info(f"{self.engines} {self.engine_name} engine(s) ready in {time.perf_counter() - start:.2f}s")
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        for task in self._batch_tasks:
+            task.cancel()
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        self._inference.shutdown(wait=False)
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Futures already cancelled (their handler was cancelled, e.g. on shutdown) are dropped
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            now = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.metrics.queue_wait.append((now - enqueued) * 1000)
+            results = await loop.run_in_executor(self._inference, self._run_batch, [item[0] for item in batch])
+            self.metrics.record_batch(len(batch), (time.perf_counter() - now) * 1000)
+            for (_, future, _), (data, error) in zip(batch, results):
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(data)
+                else:
+                    future.set_exception(error)
+
+    def _run_batch(self, images):
+        """[(data, error)] per image; a failing batch is retried image by image to isolate the culprit."""
+        with self.pool.engine() as ocr:
+            try:
+                with instrumentation.trace_image(f"batch of {len(images)}", engine=self.engine_name):
+                    return [(data, None) for data in self.module.process_images(images, ocr)]
+            except Exception as e:
+                if len(images) == 1:
+                    return [(None, e)]
+                logger.warning(f"Batch of {len(images)} failed ({str(e)}), retrying one by one")
+            results = []
+            for image in images:
+                try:
+                    results.append((self.module.process_image(image, ocr), None))
+                except Exception as e:
+                    results.append((None, e))
+            return results
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {'error': str(e)}, headers=e.headers, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                status, payload, content_type, extra = await self._route(method, target, headers, body)
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and (version == 'HTTP/1.1' or headers.get('connection', '').lower() == 'keep-alive'))
+                await self._respond(writer, status, payload, content_type, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # A bug in a handler must still get an answer, not a silently closed socket
+            logger.exception(f"Unhandled error while serving a request: {str(e)}")
+            try:
+                await self._respond(writer, 500, {'error': "Internal server error"}, keep_alive=False)
+            except Exception:
+                pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(431, "Too many headers")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                try:
+                    size = int((await reader.readline()).split(b';')[0], 16)
+                except ValueError:
+                    raise HTTPError(400, "Malformed chunk size")
+                if size < 0:
+                    raise HTTPError(400, "Malformed chunk size")
+                if size == 0:
+                    await reader.readline()
+                    break
+                if len(body) + size > self.max_body:
+                    raise HTTPError(413, f"Body larger than {self.max_body} bytes")
+                body += await reader.readexactly(size)
+                await reader.readline()
+            return method, target, version, headers, bytes(body)
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HTTPError(400, "Content-Length must be a number")
+        if length < 0:
+            raise HTTPError(400, "Content-Length must not be negative")
+        if length > self.max_body:
+            raise HTTPError(413, f"Body larger than {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return method, target, version, headers, body
+
+    async def _respond(self, writer, status, payload, content_type='application/json', headers=None,
+                       keep_alive=True):
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode('utf-8')
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(payload)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await writer.drain()
+
+    async def _route(self, method, target, headers, body):
+        """(status, payload, content type, extra headers) for one request."""
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/ocr':
+                if method != 'POST':
+                    raise HTTPError(405, "Use POST", {'Allow': 'POST'})
+                return await self._ocr(headers, body, query)
+            if method != 'GET':
+                raise HTTPError(405, "Use GET", {'Allow': 'GET'})
+            if url.path == '/metrics':
+                return 200, self.metrics.snapshot(self._queue.qsize(), self.queue_size), 'application/json', {}
+            if url.path == '/health':
+                payload = {'status': 'ok' if self.ready else 'loading', 'engine': self.engine_name,
+                           'engines': self.engines}
+                return (200 if self.ready else 503), payload, 'application/json', {}
+            raise HTTPError(404, f"No such endpoint: {url.path}")
+        except HTTPError as e:
+            return e.status, {'error': str(e)}, 'application/json', e.headers
+
+    async def _ocr(self, headers, body, query):
+        start = time.perf_counter()
+        self.metrics.requests += 1
+        output = query.get('format', 'words')
+        if output not in FORMATS:
+            self.metrics.failed += 1
+            raise HTTPError(400, f"format must be one of {', '.join(FORMATS)}")
+        # Query parameters are checked before any OCR is spent on the image
+        try:
+            green = float(query.get('green', 97)) / 100.0
+            yellow = float(query.get('yellow', 92)) / 100.0
+        except ValueError:
+            self.metrics.failed += 1
+            raise HTTPError(400, "green and yellow must be numbers (percent)")
+        if not (0 <= green <= 1 and 0 <= yellow <= 1):
+            self.metrics.failed += 1
+            raise HTTPError(400, "green and yellow must be between 0 and 100")
+        yellow = min(yellow, green)
+        if not body:
+            self.metrics.failed += 1
+            raise HTTPError(400, "Send the image as the request body or a multipart 'file' field")
+        if self._queue.full():
+            # Shed load before decoding; the client retries after roughly one batch
+            self.metrics.rejected += 1
+            retry_after = max(1, round(percentiles(self.metrics.inference)['p50'] or 1000) // 1000)
+            raise HTTPError(429, "Too many images waiting, retry later", {'Retry-After': str(retry_after)})
+
+        loop = asyncio.get_running_loop()
+        content_type = headers.get('content-type', '')
+        try:
+            if content_type.startswith('multipart/form-data'):
+                body = multipart_file(content_type, body)
+            image = await loop.run_in_executor(None, decode_image, body)
+        except HTTPError:
+            self.metrics.failed += 1
+            raise
+
+        future = loop.create_future()
+        try:
+            self._queue.put_nowait((image, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            raise HTTPError(429, "Too many images waiting, retry later", {'Retry-After': '1'})
+        try:
+            data = await future
+        except Exception as e:
+            self.metrics.failed += 1
+            logger.error(f"OCR failed: {str(e)}")
+            raise HTTPError(500, f"OCR failed: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+
+        try:
+            if output == 'xlsx':
+                payload = await loop.run_in_executor(None, xlsx_bytes, data, green, yellow)
+                result = (200, payload, XLSX_TYPE, {'Content-Disposition': 'attachment; filename="ocr_output.xlsx"'})
+            elif output == 'grid':
+                result = (200, await loop.run_in_executor(None, grid_json, data), 'application/json', {})
+            else:
+                result = (200, words_json(data), 'application/json', {})
+        except Exception as e:
+            self.metrics.failed += 1
+            logger.error(f"Formatting the OCR result failed: {str(e)}")
+            raise HTTPError(500, f"Could not build the {output} response: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+        self.metrics.ok += 1
+        self.metrics.latency.append((time.perf_counter() - start) * 1000)
+        return result
+
+async def serve(server, host, port):
+    await server.start(host, port)
+    logger.info(f"Listening on http://{host}:{server.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m OCR_Modules.server',
+                                     description="HTTP service turning table images into JSON or Excel.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="Port, 0 for any free one (default: 8765)")
+    parser.add_argument('--engine', choices=('paddle', 'tesseract'), default='paddle')
+    parser.add_argument('--engines', type=int, default=1, help="Warm engine instances, each running one batch at a time")
+    parser.add_argument('--batch-window', type=float, default=20,
+                        help="Milliseconds to wait for more images to batch with the first (default: 20)")
+    parser.add_argument('--max-batch', type=int, default=8, help="Images per batch (default: 8)")
+    parser.add_argument('--queue-size', type=int, default=32,
+                        help="Images allowed to wait; more get 429 Too Many Requests (default: 32)")
+    parser.add_argument('--model-dir', help="PaddleOCR model directory containing det/, cls/ and rec/")
+    parser.add_argument('--backend', choices=('paddle', 'onnx', 'onnx-int8'),
+                        default=os.environ.get('OCR_PADDLE_BACKEND') or 'paddle',
+                        help="PaddleOCR inference runtime (default: $OCR_PADDLE_BACKEND or paddle)")
+    parser.add_argument('--tesseract-cmd', help="Path to the tesseract executable")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from OCR_Modules.batch import load_engine
+
+    module, pool, _ = load_engine(args.engine, model_dir=args.model_dir, tesseract_cmd=args.tesseract_cmd,
+                                  backend=args.backend)
+    server = OCRServer(module, pool, args.engine, engines=args.engines, batch_window=args.batch_window / 1000.0,
+                       max_batch=args.max_batch, queue_size=args.queue_size)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import logging
+
+import numpy as np
+
+from OCR_Modules.instrumentation import timed
+from OCR_Modules.word_boxes import as_word_boxes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def cluster_rows(y_centres, heights, tolerance=0.5):
+    """Row index per word.
+
+    Words are sorted by their vertical centre and a new row starts wherever
+    the gap to the previous word exceeds `tolerance` times the local text
+    height, so tall headers and small print both group correctly.
+    """
+    n = len(y_centres)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(y_centres, kind='stable')
+    ys = y_centres[order]
+    hs = heights[order]
+    # Never let a run of tiny boxes collapse the tolerance to zero
+    floor = 0.25 * max(float(np.median(heights)), 1.0)
+    local = np.maximum(tolerance * (hs[1:] + hs[:-1]) / 2, floor)
+    row_sorted = np.concatenate(([0], np.cumsum(np.diff(ys) > local)))
+    rows = np.empty(n, dtype=np.int64)
+    rows[order] = row_sorted
+    return rows
+
+def wide_boxes(x0, x1, wide_factor=4.0):
+    """Mask of boxes much wider than the typical word (titles, merged header cells)."""
+    widths = x1 - x0
+    return widths > wide_factor * max(float(np.median(widths)), 1.0)
+
+def column_boundaries(x0, x1, heights, min_gap=None, exclude=None):
+    """x positions that separate columns, taken from gaps in the x-projection.
+
+    Boxes in `exclude` (usually wide_boxes) are left out of the projection so
+    they can't bridge the gaps between columns.
+    """
+    if len(x0) == 0:
+        return np.zeros(0, dtype=np.float32)
+    if min_gap is None:
+        min_gap = max(float(np.median(heights)), 1.0)
+    if exclude is not None and not exclude.all():
+        x0, x1 = x0[~exclude], x1[~exclude]
+
+    # Sweep the intervals left to right; a gap is where the next start clears everything so far
+    order = np.argsort(x0, kind='stable')
+    starts = x0[order]
+    reach = np.maximum.accumulate(x1[order])
+    gaps = starts[1:] - reach[:-1]
+    is_gap = gaps >= min_gap
+    return ((starts[1:][is_gap] + reach[:-1][is_gap]) / 2).astype(np.float32)
+
+@timed('group')
+def group_into_grid(data, row_tolerance=0.5, min_col_gap=None):
+    """Rebuild the table as a dense grid of (text, confidence) cells.
+
+    Unlike group_into_rows, empty cells are kept as None so that values stay
+    in their own column. Words that land in the same cell are joined with a
+    space and the cell gets the lowest confidence among them.
+    """
+    words = as_word_boxes(data)
+    n = len(words)
+    if n == 0:
+        return []
+    texts = words.texts
+    confidences = words.confidence
+
+    x0, y0, x1, y1 = words.bounds()
+    heights = np.maximum(y1 - y0, 1.0)
+
+    rows = cluster_rows((y0 + y1) / 2, heights, row_tolerance)
+    wide = wide_boxes(x0, x1)
+    boundaries = column_boundaries(x0, x1, heights, min_col_gap, exclude=wide)
+    # Wide boxes belong to the column they start in, everything else to the one under its centre
+    anchors = np.where(wide, x0, (x0 + x1) / 2)
+    cols = np.searchsorted(boundaries, anchors)
+    n_rows, n_cols = int(rows.max()) + 1, len(boundaries) + 1
+
+    # Order words by cell, then left to right inside the cell
+    order = np.lexsort((x0, cols, rows))
+    cell_ids = rows[order] * n_cols + cols[order]
+    starts = np.flatnonzero(np.concatenate(([True], cell_ids[1:] != cell_ids[:-1])))
+    ends = np.append(starts[1:], n)
+    cell_conf = np.minimum.reduceat(confidences[order], starts)
+
+    grid = [[None] * n_cols for _ in range(n_rows)]
+    order = order.tolist()
+    for start, end, cell, conf in zip(starts.tolist(), ends.tolist(), cell_ids[starts].tolist(), cell_conf.tolist()):
+        if end - start == 1:
+            text = texts[order[start]]
+        else:
+            text = ' '.join(texts[i] for i in order[start:end])
+        grid[cell // n_cols][cell % n_cols] = (text, conf)
+
+    logger.info(f"Table layout: {n} words -> {n_rows} rows x {n_cols} columns")
+    return grid
@@ -3,12 +3,17 @@ from pytesseract import Output
 import cv2
 import logging
 import numpy as np
-import openpyxl
-from openpyxl.styles import PatternFill
-from openpyxl.utils import get_column_letter
 import os
 from PIL import Image, ImageDraw, ImageFont
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from OCR_Modules.image_io import load_image
+from OCR_Modules.instrumentation import stage, timed
+from OCR_Modules.preprocess import cache_params, prepare, restore_boxes
+from OCR_Modules.tiling import DEFAULT_OVERLAP, DEFAULT_TILE_SIZE, process_image_tiled as tiled_ocr
+from OCR_Modules.tesserocr_backend import TesserocrEngine, load_tesserocr, resolve_backend
+from OCR_Modules.word_boxes import WordBoxes, as_word_boxes
+from OCR_Modules.xlsx_writer import write_xlsx
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -35,7 +40,7 @@ else:
         'tesseract_binary', 'tessdata'
     )
 
-def initialize_tesseract(tesseract_cmd=None):
+def initialize_tesseract(tesseract_cmd=None, backend='auto'):
     if tesseract_cmd is None:
         if getattr(sys, 'frozen', False):
             app_dir = os.path.dirname(sys.executable)
@@ -43,50 +48,67 @@ def initialize_tesseract(tesseract_cmd=None):
     
     if tesseract_cmd:
         pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
-    
+
+    # Prefer the in-process API; the executable stays configured as the fallback
+    if resolve_backend(backend) == 'tesserocr':
+        engine = load_tesserocr()
+        if engine is not None:
+            return engine
+        if backend == 'tesserocr':
+            raise RuntimeError("Could not initialise the tesserocr backend")
+
     return pytesseract
 
-def process_image(file_path, ocr):
+def engine_params(ocr):
+    """OCR cache parameters identifying the Tesseract engine in use (and the pre-processing)."""
+    if isinstance(ocr, TesserocrEngine):
+        params = ocr.params()
+    else:
+        params = {'tesseract_cmd': ocr.pytesseract.tesseract_cmd}
+    params.update(cache_params('tesseract'))
+    return params
+
+def process_image(file_path, ocr, preprocess=True):
     try:
-        # Load image
-        image = cv2.imread(file_path)
-        if image is None:
-            raise ValueError("Could not open image!")
+        # Load and pre-process the image; file_path may also be an in-memory ndarray (BGR) or PIL image
+        image, info = prepare(file_path, 'tesseract', None if preprocess else ())
+        # Binarised pages are single-channel and go to Tesseract as they are
+        image_rgb = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
         logger.info("Processing image with Tesseract OCR...")
 
-        # Convert to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-        # Run Tesseract OCR
-        data = ocr.image_to_data(image_rgb, output_type=Output.DICT)
-
-        n_boxes = len(data['level'])
-        extracted_data = []
-
-        for i in range(n_boxes):
-            try:
-                x = data['left'][i] + data['width'][i] / 2
-                y = data['top'][i] + data['height'][i] / 2
-                text = data['text'][i]
-                confidence = float(data['conf'][i]) / 100.0 if data['conf'][i] != '-1' else 0.0
-                bbox = [
-                    (data['left'][i], data['top'][i]),
-                    (data['left'][i] + data['width'][i], data['top'][i]),
-                    (data['left'][i] + data['width'][i], data['top'][i] + data['height'][i]),
-                    (data['left'][i], data['top'][i] + data['height'][i]),
-                ]
-                if text.strip():
-                    extracted_data.append({'x': x, 'y': y, 'text': text.strip(), 'confidence': confidence, 'bbox': bbox})
-            except Exception as e:
-                logger.warning(f"Error processing box {i}: {str(e)}")
-
-        return extracted_data
+        # Run Tesseract OCR (pytesseract subprocess or the in-process TesserocrEngine)
+        with stage('tesseract'):
+            data = ocr.image_to_data(image_rgb, output_type=Output.DICT)
+        # Column-wise conversion; empty-text and conf == -1 rows are masked out
+        with stage('parse'):
+            words = WordBoxes.from_tesseract(data)
+        return restore_boxes(words, info)
 
     except Exception as e:
         logger.error(f"Error processing image: {str(e)}")
         raise
 
+def process_images(file_paths, ocr, workers=None, preprocess=True):
+    """process_image over several images (paths or arrays) on a thread pool, results in input order.
+
+    Both backends run outside the GIL: pytesseract in a subprocess, tesserocr
+    in libtesseract with one API handle per concurrent thread.
+    """
+    workers = workers or min(len(file_paths), os.cpu_count() or 1) or 1
+    if workers == 1:
+        return [process_image(file_path, ocr, preprocess) for file_path in file_paths]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda file_path: process_image(file_path, ocr, preprocess), file_paths))
+
+def process_image_tiled(file_path, ocr, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP, tiles_per_batch=4):
+    """process_image for very large scans, OCR'ing overlapping tiles in parallel and merging them."""
+    # The whole page is pre-processed once; the tiles are cut from the result
+    image, info = prepare(file_path, 'tesseract')
+    words = tiled_ocr(image, ocr, lambda tiles, ocr: process_images(tiles, ocr, preprocess=False),
+                      tile_size=tile_size, overlap=overlap, tiles_per_batch=tiles_per_batch)
+    return restore_boxes(words, info)
+
 def group_into_rows(data, y_threshold=10):
     # Sort data by y-coordinate
     data_sorted = sorted(data, key=lambda k: k['y'])
@@ -116,72 +138,33 @@ def group_into_rows(data, y_threshold=10):
     return [[(text, confidence) for x, text, confidence in row] for row in rows]
 
 def save_as_xlsx(rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-
-    for row_index, row in enumerate(rows, start=1):
-        for col_index, cell in enumerate(row, start=1):
-            text, confidence = cell
-            ws.cell(row=row_index, column=col_index, value=text)
-
-            if confidence >= green_threshold:
-                # Green for confidence >= green_threshold
-                fill_color = '00FF00'
-            elif confidence >= yellow_threshold:
-                # Yellow for confidence >= yellow_threshold
-                fill_color = 'FFFF00'
-            else:
-                # Red for confidence below yellow_threshold
-                fill_color = 'FF0000'
-
-            fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-            ws.cell(row=row_index, column=col_index).fill = fill
-
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(cell.value)
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    wb.save(output_xlsx)
+    # Streams rows in write-only mode with shared green/yellow/red styles
+    write_xlsx(rows, output_xlsx, green_threshold, yellow_threshold)
     logger.info(f"Excel file has been saved at: {output_xlsx}")
 
+@timed('draw')
 def draw_bounding_boxes(image_path, data, output_path):
     try:
-        image = cv2.imread(image_path)
-        for item in data:
-            bbox = item['bbox']
-            if len(bbox) != 4:
-                logger.warning(f"Skipping invalid bounding box: {bbox}")
-                continue
-            
-            try:
-                # Convert bbox to numpy array of integers
-                bbox_np = np.array(bbox, dtype=np.int32)
-                
-                # Ensure the bbox is in the correct format for cv2.polylines
-                bbox_np = bbox_np.reshape((-1, 1, 2))
-                
-                cv2.polylines(image, [bbox_np], True, (0, 255, 0), 2)
-                
-                # Add text above the bounding box in black color
-                text = item['text']
-                confidence = item['confidence']
-                label = f"{text} ({confidence:.2f})"
-                cv2.putText(image, label, (bbox[0][0], bbox[0][1] - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
-            except Exception as e:
-                logger.warning(f"Error drawing bounding box: {str(e)}")
-        
+        words = as_word_boxes(data)
+        image = load_image(image_path)
+        if image is image_path:
+            # Never draw onto the caller's array
+            image = image.copy()
+
+        # Draw every box in one call; cv2 wants (N,4,1,2) int32 point lists
+        polygons = np.rint(words.boxes).astype(np.int32).reshape(-1, 4, 1, 2)
+        cv2.polylines(image, list(polygons), True, (0, 255, 0), 2)
+
+        # Add text above the bounding box in black color
+        anchors = polygons[:, 0, 0].tolist()
+        for (x, y), text, confidence in zip(anchors, words.texts, words.confidence.tolist()):
+            label = f"{text} ({confidence:.2f})"
+            cv2.putText(image, label, (x, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+
         cv2.imwrite(output_path, image)
         logger.info(f"Image with bounding boxes saved to {output_path}")
+        return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
     except Exception as e:
         logger.error(f"Error in draw_bounding_boxes: {str(e)}")
         raise
@@ -0,0 +1,134 @@
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+
+try:
+    import tesserocr
+    from tesserocr import PSM, RIL, PyTessBaseAPI, iterate_level
+except ImportError:
+    tesserocr = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'tesserocr', 'subprocess')
+
+# Word rows reported by image_to_data use level 5
+WORD_LEVEL = 5
+
+def is_available():
+    return tesserocr is not None
+
+def resolve_backend(backend='auto'):
+    """'auto' becomes 'tesserocr' when the bindings are installed, otherwise 'subprocess'."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown Tesseract backend: {backend}")
+    if backend == 'auto':
+        return 'tesserocr' if is_available() else 'subprocess'
+    if backend == 'tesserocr' and not is_available():
+        raise ImportError("The tesserocr package is not installed")
+    return backend
+
+class TesserocrEngine:
+    """In-process Tesseract keeping initialised API handles alive between images.
+
+    image_to_data mirrors pytesseract.image_to_data(..., output_type=Output.DICT)
+    for word-level rows, so process_image can use either engine. Pixels are
+    handed to libtesseract as a raw buffer; there is no temp file and no
+    subprocess. Each concurrently running thread gets its own handle, and
+    handles are reused by later threads, so the GUI's one-thread-per-job
+    model still loads the traineddata only once.
+    """
+
+    def __init__(self, tessdata_path=None, lang='eng', psm=None):
+        if tesserocr is None:
+            raise ImportError("The tesserocr package is not installed")
+        self.tessdata_path = tessdata_path or os.environ.get('TESSDATA_PREFIX') or tesserocr.get_languages()[0]
+        self.lang = lang
+        # PSM.AUTO is also the tesseract command line default
+        self.psm = PSM.AUTO if psm is None else psm
+        self.version = tesserocr.tesseract_version()
+        self._idle = queue.LifoQueue()
+        self._apis = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        api = PyTessBaseAPI(path=self.tessdata_path.rstrip('/\\') + os.sep, lang=self.lang, psm=self.psm)
+        with self._lock:
+            self._apis.append(api)
+            count = len(self._apis)
+        logger.info(f"Initialised Tesseract API handle #{count} ({self.lang})")
+        return api
+
+    def _release(self, api):
+        self._idle.put(api)
+
+    def warm_up(self):
+        self._release(self._acquire())
+
+    def params(self):
+        """Identity of this engine for the OCR cache."""
+        return {'backend': 'tesserocr', 'version': self.version, 'lang': self.lang, 'psm': int(self.psm)}
+
+    def image_to_data(self, image, output_type='dict'):
+        if output_type != 'dict':
+            raise ValueError("TesserocrEngine only supports dict output")
+
+        image = np.ascontiguousarray(image)
+        if image.dtype != np.uint8:
+            raise ValueError(f"Expected an 8-bit image, got {image.dtype}")
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        data = {key: [] for key in ('level', 'left', 'top', 'width', 'height', 'conf', 'text')}
+        api = self._acquire()
+        try:
+            api.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+            api.Recognize()
+            iterator = api.GetIterator()
+            if iterator is not None:
+                for word in iterate_level(iterator, RIL.WORD):
+                    box = word.BoundingBox(RIL.WORD)
+                    if box is None:
+                        continue
+                    x1, y1, x2, y2 = box
+                    data['level'].append(WORD_LEVEL)
+                    data['left'].append(x1)
+                    data['top'].append(y1)
+                    data['width'].append(x2 - x1)
+                    data['height'].append(y2 - y1)
+                    data['conf'].append(word.Confidence(RIL.WORD))
+                    data['text'].append(word.GetUTF8Text(RIL.WORD) or '')
+            api.Clear()
+        finally:
+            self._release(api)
+        return data
+
+    def close(self):
+        """End every handle; only call once no thread is using the engine."""
+        with self._lock:
+            apis, self._apis = self._apis, []
+        self._idle = queue.LifoQueue()
+        for api in apis:
+            api.End()
+
+def load_tesserocr(tessdata_path=None, lang='eng'):
+    """TesserocrEngine, or None (with a warning) when the bindings or tessdata are unavailable."""
+    if tesserocr is None:
+        return None
+    try:
+        engine = TesserocrEngine(tessdata_path=tessdata_path, lang=lang)
+        # Initialise the first handle now so a bad tessdata path falls back immediately
+        engine.warm_up()
+        return engine
+    except Exception as e:
+        logger.warning(f"tesserocr unavailable, using the tesseract executable: {str(e)}")
+        return None
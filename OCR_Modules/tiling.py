@@ -0,0 +1,115 @@
+import logging
+import time
+
+import numpy as np
+
+from OCR_Modules.image_io import describe_source, load_image
+from OCR_Modules.word_boxes import WordBoxes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_TILE_SIZE = 1600
+DEFAULT_OVERLAP = 256
+
+def tile_grid(width, height, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP):
+    """(x0, y0, x1, y1) tiles covering the image, neighbours sharing `overlap` pixels.
+
+    Tiles are spread evenly, so the last row/column is never a thin sliver.
+    """
+    if overlap >= tile_size:
+        raise ValueError("overlap must be smaller than the tile size")
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        count = int(np.ceil((length - overlap) / (tile_size - overlap)))
+        return np.linspace(0, length - tile_size, count).round().astype(int).tolist()
+
+    return [(x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+            for y0 in starts(height) for x0 in starts(width)]
+
+def _touches_inner_edge(x0, y0, x1, y1, tile, width, height, margin=2):
+    # A box running into a tile edge that is not the page edge was probably cut by the tile
+    tx0, ty0, tx1, ty1 = tile
+    return (((x0 <= tx0 + margin) & (tx0 > 0)) | ((x1 >= tx1 - margin) & (tx1 < width))
+            | ((y0 <= ty0 + margin) & (ty0 > 0)) | ((y1 >= ty1 - margin) & (ty1 < height)))
+
+def suppress_duplicates(words, truncated, overlap_threshold=0.5):
+    """Greedy NMS for words seen by two tiles.
+
+    Overlap is measured as intersection over the smaller box, so a partial
+    line cut by one tile is removed in favour of the full line from the
+    neighbouring tile. Complete boxes win over truncated ones, then larger
+    boxes, then higher confidence. Returns a boolean keep mask.
+    """
+    n = len(words)
+    keep = np.ones(n, dtype=bool)
+    if n < 2:
+        return keep
+    x0, y0, x1, y1 = words.bounds()
+    area = np.maximum(x1 - x0, 1) * np.maximum(y1 - y0, 1)
+    order = np.lexsort((-words.confidence, -area, truncated))
+
+    for rank, i in enumerate(order):
+        if not keep[i]:
+            continue
+        rest = order[rank + 1:]
+        rest = rest[keep[rest]]
+        if len(rest) == 0:
+            break
+        iw = np.minimum(x1[i], x1[rest]) - np.maximum(x0[i], x0[rest])
+        ih = np.minimum(y1[i], y1[rest]) - np.maximum(y0[i], y0[rest])
+        inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+        ratio = inter / np.minimum(area[i], area[rest])
+        keep[rest[ratio > overlap_threshold]] = False
+    return keep
+
+def process_image_tiled(file_path, ocr, process_tiles, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP,
+                        tiles_per_batch=4, overlap_threshold=0.5):
+    """OCR a large image tile by tile and return page-level WordBoxes.
+
+    process_tiles(list_of_tile_arrays, ocr) -> list of WordBoxes is the
+    engine's multi-image entry point (it may batch or parallelise the tiles
+    it gets). Only `tiles_per_batch` tile copies exist at a time, so the
+    OCR working set depends on the tile size, not the page size.
+    """
+    start = time.perf_counter()
+    image = load_image(file_path)
+    height, width = image.shape[:2]
+    tiles = tile_grid(width, height, tile_size, overlap)
+
+    parts = []
+    truncated = []
+    for batch_start in range(0, len(tiles), tiles_per_batch):
+        batch = tiles[batch_start:batch_start + tiles_per_batch]
+        crops = [np.ascontiguousarray(image[y0:y1, x0:x1]) for x0, y0, x1, y1 in batch]
+        results = process_tiles(crops, ocr)
+        del crops
+        for tile, words in zip(batch, results):
+            if not len(words):
+                continue
+            # Shift tile coordinates back onto the page
+            boxes = words.boxes + np.array(tile[:2], dtype=np.float32)
+            shifted = WordBoxes(boxes, words.confidence, words.texts)
+            bx0, by0, bx1, by1 = shifted.bounds()
+            truncated.append(_touches_inner_edge(bx0, by0, bx1, by1, tile, width, height))
+            parts.append(shifted)
+
+    words = WordBoxes.concatenate(parts)
+    removed = 0
+    if len(tiles) > 1 and len(words):
+        # Only words reaching into an area shared by two tiles can be duplicates
+        x0, y0, x1, y1 = words.bounds()
+        tiles_touched = sum((x1 > tx0) & (x0 < tx1) & (y1 > ty0) & (y0 < ty1) for tx0, ty0, tx1, ty1 in tiles)
+        candidates = np.flatnonzero(tiles_touched > 1)
+        keep = np.ones(len(words), dtype=bool)
+        keep[candidates] = suppress_duplicates(words[candidates], np.concatenate(truncated)[candidates],
+                                               overlap_threshold)
+        removed = int((~keep).sum())
+        words = words[keep]
+
+    logger.info(f"Tiled OCR of {describe_source(file_path)} ({width}x{height}): {len(tiles)} tiles, "
+                f"{len(words)} words, {removed} duplicates removed in {time.perf_counter() - start:.2f}s")
+    return words
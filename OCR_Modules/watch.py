@@ -0,0 +1,506 @@
+"""Watch-folder service: OCR images and PDFs to Excel as they land in a directory.
+
+    python -m OCR_Modules.watch /srv/scans --engine paddle --mirror /srv/excel
+
+New files are picked up through inotify on Linux and by polling elsewhere
+(or with --poll, which network shares mounted from another machine need:
+inotify only sees writes made by this machine). A file is queued once its
+size and mtime have been stable for --settle seconds, so a scanner still
+writing it is left alone. Processed files are recorded in a small SQLite
+database, and a restart only picks up what is new or changed since.
+
+    python -m OCR_Modules.watch --status      # counts and recent failures
+"""
+import argparse
+import ctypes
+import ctypes.util
+import logging
+import os
+import queue
+import select
+import signal
+import sqlite3
+import struct
+import sys
+import threading
+import time
+
+from OCR_Modules import instrumentation
+from OCR_Modules.batch import INPUT_EXTENSIONS, load_engine, process_file, run_document
+from OCR_Modules.instrumentation import trace_image
+from OCR_Modules.page_source import is_document
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser('~'), '.ocr_tool', 'watch.sqlite3')
+# Bounding box images written next to the inputs must not be OCR'd in turn
+OUTPUT_SUFFIXES = ('_output_image.jpg', '_output.xlsx')
+# Files scanners and copy tools write before renaming them into place
+TEMPORARY_SUFFIXES = ('.tmp', '.part', '.partial', '.crdownload')
+
+def is_input(path):
+    name = os.path.basename(path)
+    lower = name.lower()
+    if name.startswith(('.', '~$')) or lower.endswith(OUTPUT_SUFFIXES + TEMPORARY_SUFFIXES):
+        return False
+    return lower.endswith(INPUT_EXTENSIONS)
+
+def scan(directory, recursive=False):
+    """Every input file below directory (one level unless recursive)."""
+    try:
+        entries = list(os.scandir(directory))
+    except OSError as e:
+        logger.warning(f"Cannot list {directory}: {str(e)}")
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    yield from scan(entry.path, recursive)
+            elif entry.is_file() and is_input(entry.path):
+                yield entry.path
+        except OSError:
+            continue
+
+class WatchState:
+    """SQLite record of every file the service has handled, keyed by absolute path.
+
+    A file counts as handled for one (size, mtime); a file that is written
+    again is processed again. Failures are retried on later sightings up to
+    max_attempts times.
+    """
+
+    def __init__(self, path=None, max_attempts=3):
+        self.path = path or DEFAULT_STATE_PATH
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets --status read while the service is writing
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            ' path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, status TEXT,'
+            ' attempts INTEGER, output TEXT, error TEXT, seconds REAL, updated REAL)'
+        )
+        self._db.commit()
+
+    def needs_processing(self, path, size, mtime_ns):
+        with self._lock:
+            row = self._db.execute('SELECT size, mtime_ns, status, attempts FROM files WHERE path = ?',
+                                   (path,)).fetchone()
+        if row is None or (row[0], row[1]) != (size, mtime_ns):
+            return True
+        return row[2] == 'failed' and row[3] < self.max_attempts
+
+    def record(self, path, size, mtime_ns, status, output=None, error=None, seconds=None):
+        with self._lock:
+            row = self._db.execute('SELECT size, mtime_ns, attempts FROM files WHERE path = ?', (path,)).fetchone()
+            # Attempts count per version of the file
+            attempts = row[2] + 1 if row is not None and (row[0], row[1]) == (size, mtime_ns) else 1
+            self._db.execute(
+                'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (path, size, mtime_ns, status, attempts, output, error, seconds, time.time())
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute('SELECT status, COUNT(*) FROM files GROUP BY status').fetchall())
+            failures = self._db.execute(
+                "SELECT path, attempts, error FROM files WHERE status = 'failed' ORDER BY updated DESC LIMIT 10"
+            ).fetchall()
+        return counts, failures
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class PollingWatcher:
+    """Reports input files that are new or whose size or mtime changed since the last scan."""
+
+    def __init__(self, directories, recursive=False, interval=2.0):
+        self.directories = directories
+        self.recursive = recursive
+        self.interval = interval
+        self._seen = {}
+        self._last_poll = 0.0
+
+    def read(self, timeout):
+        wait = self._last_poll + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(min(timeout, wait))
+            return []
+        self._last_poll = time.monotonic()
+        changed = []
+        current = {}
+        for directory in self.directories:
+            for path in scan(directory, self.recursive):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                current[path] = (st.st_size, st.st_mtime_ns)
+                if self._seen.get(path) != current[path]:
+                    changed.append(path)
+        self._seen = current
+        return changed
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Linux inotify through ctypes: reports files closed after writing or moved in."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, directories, recursive=False):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.recursive = recursive
+        self._watches = {}
+        # Set when the kernel dropped events; the service then rescans everything
+        self.overflowed = False
+        for directory in directories:
+            self.add(directory)
+
+    def add(self, directory):
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+        if wd < 0:
+            # Usually fs.inotify.max_user_watches; the periodic rescan still covers the directory
+            logger.warning(f"Cannot watch {directory}: {os.strerror(ctypes.get_errno())}")
+            return
+        self._watches[wd] = directory
+        if self.recursive:
+            for entry in os.scandir(directory):
+                if entry.is_dir(follow_symlinks=False):
+                    self.add(entry.path)
+
+    def read(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            name = data[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b'\0')
+            offset += self.EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & self.IN_ISDIR:
+                if self.recursive:
+                    # Files may have landed in the new directory before the watch was added
+                    self.add(path)
+                    paths.extend(scan(path, recursive=True))
+            elif is_input(path):
+                paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self._fd)
+
+def make_watcher(directories, recursive=False, mode='auto', poll_interval=2.0):
+    if mode in ('auto', 'inotify') and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directories, recursive)
+        except OSError as e:
+            if mode == 'inotify':
+                raise
+            logger.warning(f"inotify unavailable ({str(e)}), polling every {poll_interval:g}s")
+    elif mode == 'inotify':
+        raise OSError("inotify is only available on Linux")
+    return PollingWatcher(directories, recursive, poll_interval)
+
+class Debouncer:
+    """Holds candidate files until their size and mtime stop changing for `settle` seconds."""
+
+    def __init__(self, settle=2.0):
+        self.settle = settle
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, path, now=None):
+        if path not in self._pending:
+            self._pending[path] = (None, now if now is not None else time.monotonic())
+
+    def ready(self, now=None):
+        """Pop and return (path, size, mtime_ns) for every file that has settled."""
+        now = now if now is not None else time.monotonic()
+        settled = []
+        for path, (signature, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Deleted or renamed away before it settled
+                del self._pending[path]
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != signature:
+                self._pending[path] = (current, now)
+            elif st.st_size > 0 and now - since >= self.settle and _can_open(path):
+                del self._pending[path]
+                settled.append((path, st.st_size, st.st_mtime_ns))
+        return settled
+
+def _can_open(path):
+    # On Windows a file the scanner still holds open for writing cannot be opened for reading
+    try:
+        with open(path, 'rb'):
+            return True
+    except OSError:
+        return False
+
+class WatchService:
+    """Feeds settled files from the watched directories to `workers` threads sharing an engine pool."""
+
+    def __init__(self, directories, module, pool, state, mirror=None, recursive=False, settle=2.0,
+                 mode='auto', poll_interval=2.0, rescan_interval=60.0, workers=1, green_threshold=0.97,
+                 yellow_threshold=0.92, draw_boxes=True, layout='sheets', dpi=None):
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.module = module
+        self.pool = pool
+        self.state = state
+        self.mirror = os.path.abspath(mirror) if mirror else None
+        self.recursive = recursive
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.workers = max(1, workers)
+        self.green_threshold = green_threshold
+        self.yellow_threshold = yellow_threshold
+        self.draw_boxes = draw_boxes
+        self.layout = layout
+        self.dpi = dpi
+        self.debouncer = Debouncer(settle)
+        self.stop_event = threading.Event()
+        self._queue = queue.Queue()
+        # Paths queued or being processed, so a burst of events queues a file only once
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+
+    def output_dir(self, path):
+        """Mirror the file's place below its watched directory, or None for next to the input."""
+        if self.mirror is None:
+            return None
+        roots = [root for root in self.directories if path.startswith(root + os.sep)]
+        root = max(roots, key=len) if roots else os.path.dirname(path)
+        return os.path.normpath(os.path.join(self.mirror, os.path.relpath(os.path.dirname(path), root)))
+
+    def offer(self, path):
+        if self.mirror and path.startswith(self.mirror + os.sep):
+            return
+        with self._active_lock:
+            if path in self._active:
+                return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        # Rescans offer every file again; only new or changed ones wait to settle
+        if self.state.needs_processing(path, st.st_size, st.st_mtime_ns):
+            self.debouncer.add(path)
+
+    def _dispatch(self):
+        for path, size, mtime_ns in self.debouncer.ready():
+            if not self.state.needs_processing(path, size, mtime_ns):
+                continue
+            with self._active_lock:
+                if path in self._active:
+                    continue
+                self._active.add(path)
+            self._queue.put((path, size, mtime_ns))
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, size, mtime_ns = item
+            try:
+                self.process(path, size, mtime_ns)
+            finally:
+                with self._active_lock:
+                    self._active.discard(path)
+
+    def process(self, path, size, mtime_ns):
+        start = time.perf_counter()
+        output_dir = self.output_dir(path)
+        try:
+            with trace_image(path):
+                if is_document(path):
+                    output = run_document(path, self.module, self.pool, output_dir, self.green_threshold,
+                                          self.yellow_threshold, layout=self.layout, dpi=self.dpi)
+                else:
+                    with self.pool.engine() as ocr:
+                        output = process_file(path, self.module, ocr, output_dir, self.green_threshold,
+                                              self.yellow_threshold, self.draw_boxes)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            error = str(e).splitlines()[0] if str(e) else type(e).__name__
+            self.failed += 1
+            self.state.record(path, size, mtime_ns, 'failed', error=error, seconds=elapsed)
+            logger.error(f"{path}: FAILED ({error})")
+        else:
+            elapsed = time.perf_counter() - start
+            self.processed += 1
+            self.state.record(path, size, mtime_ns, 'done', output=output, seconds=elapsed)
+            logger.info(f"{path} -> {output} ({elapsed:.2f}s, {self._queue.qsize()} queued)")
+
+    def rescan(self):
+        for directory in self.directories:
+            for path in scan(directory, self.recursive):
+                self.offer(path)
+
+    def run(self):
+        """Watch until stop() is called (or SIGINT/SIGTERM in main); queued files are finished first."""
+        watcher = make_watcher(self.directories, self.recursive, self.mode, self.poll_interval)
+        threads = [threading.Thread(target=self._worker, name=f"watch-worker-{index}", daemon=True)
+                   for index in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        logger.info(f"Watching {', '.join(self.directories)} with {type(watcher).__name__} "
+                    f"({self.workers} worker{'s' if self.workers > 1 else ''})")
+        # Everything already there that the state database hasn't seen
+        self.rescan()
+        last_scan = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                # Wake up often enough to notice settled files without waiting for another event
+                for path in watcher.read(timeout=min(0.5, self.debouncer.settle / 2) or 0.1):
+                    self.offer(path)
+                if getattr(watcher, 'overflowed', False) or time.monotonic() - last_scan > self.rescan_interval:
+                    # Catches events inotify dropped or never sees (e.g. writes from another machine)
+                    watcher.overflowed = False
+                    self.rescan()
+                    last_scan = time.monotonic()
+                self._dispatch()
+        finally:
+            watcher.close()
+            for _ in threads:
+                self._queue.put(None)
+            for thread in threads:
+                thread.join()
+            logger.info(f"Stopped: {self.processed} processed, {self.failed} failed")
+
+    def stop(self):
+        self.stop_event.set()
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m OCR_Modules.watch',
+        description="Watch directories and OCR new table images and PDFs to Excel as they arrive."
+    )
+    parser.add_argument('directories', nargs='*', help="Directories to watch")
+    parser.add_argument('--engine', choices=('paddle', 'tesseract'), default='paddle')
+    parser.add_argument('--mirror', metavar='DIR',
+                        help="Write outputs to a tree under DIR mirroring the watched directories "
+                             "(default: next to each input)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Also watch sub-directories")
+    parser.add_argument('--settle', type=float, default=2.0,
+                        help="Seconds a file's size and mtime must stay unchanged before it is OCR'd (default: 2)")
+    parser.add_argument('--poll', action='store_true', help="Poll instead of using inotify (needed for network shares)")
+    parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds between polls (default: 2)")
+    parser.add_argument('--rescan-interval', type=float, default=60.0,
+                        help="Full rescan every N seconds to catch missed events (default: 60)")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="Files OCR'd in parallel, each on its own engine")
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help=f"State database (default: {DEFAULT_STATE_PATH})")
+    parser.add_argument('--max-attempts', type=int, default=3, help="Tries per failing file (default: 3)")
+    parser.add_argument('--status', action='store_true', help="Print what the state database holds and exit")
+    parser.add_argument('--green', type=int, default=97, help="High confidence threshold in %% (default: 97)")
+    parser.add_argument('--yellow', type=int, default=92, help="Medium confidence threshold in %% (default: 92)")
+    parser.add_argument('--no-boxes', action='store_true', help="Skip the bounding box image")
+    parser.add_argument('--pages', choices=('sheets', 'append'), default='sheets',
+                        help="PDF/TIFF pages as one worksheet each, or appended on one sheet (default: sheets)")
+    parser.add_argument('--dpi', type=int, help="Render PDF pages at this dpi (default: 200)")
+    parser.add_argument('--model-dir', help="PaddleOCR model directory containing det/, cls/ and rec/")
+    parser.add_argument('--backend', choices=('paddle', 'onnx', 'onnx-int8'),
+                        default=os.environ.get('OCR_PADDLE_BACKEND') or 'paddle',
+                        help="PaddleOCR inference runtime (default: $OCR_PADDLE_BACKEND or paddle)")
+    parser.add_argument('--tesseract-cmd', help="Path to the tesseract executable")
+    parser.add_argument('--trace', nargs='?', const=instrumentation.DEFAULT_TRACE_PATH, metavar='PATH',
+                        help="Append per-image stage timings to PATH as JSON lines")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    state = WatchState(args.state, max_attempts=args.max_attempts)
+    if args.status:
+        counts, failures = state.stats()
+        print(', '.join(f"{count} {status}" for status, count in sorted(counts.items())) or "Nothing processed yet")
+        for path, attempts, error in failures:
+            print(f"  failed ({attempts}x): {path}: {error}")
+        return 0
+    if not args.directories:
+        logger.error("No directories to watch.")
+        return 2
+    missing = [directory for directory in args.directories if not os.path.isdir(directory)]
+    if missing:
+        logger.error(f"Not a directory: {', '.join(missing)}")
+        return 2
+
+    if args.trace:
+        instrumentation.enable(args.trace)
+    module, pool, _ = load_engine(args.engine, model_dir=args.model_dir, tesseract_cmd=args.tesseract_cmd,
+                                  backend=args.backend)
+    # One warm engine per worker, loaded before the first file arrives
+    pool.resize(args.workers)
+    pool.warm_up()
+
+    service = WatchService(
+        args.directories, module, pool, state,
+        mirror=args.mirror,
+        recursive=args.recursive,
+        settle=args.settle,
+        mode='poll' if args.poll else 'auto',
+        poll_interval=args.poll_interval,
+        rescan_interval=args.rescan_interval,
+        workers=args.workers,
+        green_threshold=args.green / 100.0,
+        yellow_threshold=min(args.yellow, args.green) / 100.0,
+        draw_boxes=not args.no_boxes,
+        layout=args.pages,
+        dpi=args.dpi,
+    )
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: service.stop())
+    try:
+        service.run()
+    finally:
+        state.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
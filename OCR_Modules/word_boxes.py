@@ -0,0 +1,169 @@
+import struct
+from itertools import chain, compress
+
+import numpy as np
+
+# Binary layout used by to_bytes/from_bytes: header, boxes, confidences, text offsets, utf-8 text
+_MAGIC = b'OCW2'
+_HEADER = struct.Struct('<4sI')
+
+class WordBoxes:
+    """OCR words stored column-wise in contiguous NumPy arrays.
+
+    boxes       (N,4,2) float32 corner points, clockwise from top-left
+    confidence  (N,)    float32
+    centres     (N,2)   float32, midpoint of corners 0 and 2 (same as the old 'x'/'y')
+    texts are kept in one string buffer indexed by an (N+1,) offset array.
+
+    Iterating yields the old per-word dicts ('x', 'y', 'text', 'confidence',
+    'bbox') so existing callers keep working.
+    """
+
+    def __init__(self, boxes, confidence, texts):
+        self.boxes = np.ascontiguousarray(boxes, dtype=np.float32).reshape(-1, 4, 2)
+        self.confidence = np.ascontiguousarray(confidence, dtype=np.float32).reshape(-1)
+        if len(self.boxes) != len(self.confidence) or len(self.boxes) != len(texts):
+            raise ValueError("boxes, confidence and texts must have the same length")
+        self.centres = (self.boxes[:, 0] + self.boxes[:, 2]) / 2
+        self._text_buffer = ''.join(texts)
+        self._text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=self._text_offsets[1:])
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 4, 2), dtype=np.float32), np.zeros(0, dtype=np.float32), [])
+
+    @classmethod
+    def from_records(cls, data):
+        """Build from the old list of {'bbox', 'text', 'confidence', ...} dicts."""
+        if isinstance(data, WordBoxes):
+            return data
+        n = len(data)
+        # Flattening by hand is several times faster than np.asarray on nested lists
+        coords = chain.from_iterable(chain.from_iterable(item['bbox'] for item in data))
+        boxes = np.fromiter(coords, dtype=np.float32, count=n * 8).reshape(n, 4, 2)
+        confidence = np.fromiter((item['confidence'] for item in data), dtype=np.float32, count=n)
+        return cls(boxes, confidence, [item['text'] for item in data])
+
+    @classmethod
+    def from_tesseract(cls, data):
+        """Build from an image_to_data DICT result using column-wise array operations.
+
+        Rows with empty text (the page/block/paragraph/line levels) or conf == -1
+        are masked out. Boxes run clockwise from the top-left like PaddleOCR's.
+        """
+        texts = [text.strip() if isinstance(text, str) else '' for text in data['text']]
+        keep = np.fromiter((len(text) > 0 for text in texts), dtype=bool, count=len(texts))
+        # conf is numeric in recent pytesseract releases and a string in older ones
+        confidence = np.asarray(data['conf'], dtype=np.float32)
+        keep &= confidence != -1
+
+        left = np.asarray(data['left'], dtype=np.float32)[keep]
+        top = np.asarray(data['top'], dtype=np.float32)[keep]
+        right = left + np.asarray(data['width'], dtype=np.float32)[keep]
+        bottom = top + np.asarray(data['height'], dtype=np.float32)[keep]
+
+        boxes = np.empty((len(left), 4, 2), dtype=np.float32)
+        boxes[:, :, 0] = np.stack([left, right, right, left], axis=1)
+        boxes[:, :, 1] = np.stack([top, top, bottom, bottom], axis=1)
+        return cls(boxes, confidence[keep] / 100.0, list(compress(texts, keep.tolist())))
+
+    @classmethod
+    def concatenate(cls, parts):
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        return cls(
+            np.concatenate([part.boxes for part in parts]),
+            np.concatenate([part.confidence for part in parts]),
+            list(chain.from_iterable(part.texts for part in parts))
+        )
+
+    def __len__(self):
+        return len(self.confidence)
+
+    def text(self, index):
+        start, end = self._text_offsets[index], self._text_offsets[index + 1]
+        return self._text_buffer[start:end]
+
+    @property
+    def texts(self):
+        offsets = self._text_offsets.tolist()
+        buffer = self._text_buffer
+        return [buffer[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    @property
+    def x(self):
+        return self.centres[:, 0]
+
+    @property
+    def y(self):
+        return self.centres[:, 1]
+
+    def bounds(self):
+        """(x0, y0, x1, y1) arrays of the axis-aligned extent of every box."""
+        xs, ys = self.boxes[:, :, 0], self.boxes[:, :, 1]
+        return xs.min(axis=1), ys.min(axis=1), xs.max(axis=1), ys.max(axis=1)
+
+    def _record(self, index, box):
+        return {
+            'x': (box[0][0] + box[2][0]) / 2,
+            'y': (box[0][1] + box[2][1]) / 2,
+            'text': self.text(index),
+            'confidence': float(self.confidence[index]),
+            'bbox': box,
+        }
+
+    def __iter__(self):
+        # Compatibility view for code written against the list of dicts
+        for index, box in enumerate(self.boxes.tolist()):
+            yield self._record(index, box)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            return self._record(int(key), self.boxes[key].tolist())
+        # Slices, boolean masks and index arrays give a new WordBoxes
+        indices = np.arange(len(self))[key]
+        texts = self.texts
+        return WordBoxes(self.boxes[indices], self.confidence[indices], [texts[i] for i in indices.tolist()])
+
+    def __repr__(self):
+        return f"WordBoxes({len(self)} words)"
+
+    @property
+    def nbytes(self):
+        return (self.boxes.nbytes + self.confidence.nbytes + self.centres.nbytes
+                + self._text_offsets.nbytes + len(self._text_buffer.encode('utf-8')))
+
+    def to_bytes(self):
+        texts = [text.encode('utf-8') for text in self.texts]
+        offsets = np.zeros(len(texts) + 1, dtype=np.uint32)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        return b''.join([
+            _HEADER.pack(_MAGIC, len(self)),
+            self.boxes.tobytes(),
+            self.confidence.tobytes(),
+            offsets.tobytes(),
+            b''.join(texts),
+        ])
+
+    @classmethod
+    def from_bytes(cls, blob):
+        magic, n = _HEADER.unpack_from(blob)
+        if magic != _MAGIC:
+            raise ValueError("Not a serialised WordBoxes record")
+        pos = _HEADER.size
+        boxes = np.frombuffer(blob, dtype=np.float32, count=n * 8, offset=pos)
+        pos += boxes.nbytes
+        confidence = np.frombuffer(blob, dtype=np.float32, count=n, offset=pos)
+        pos += confidence.nbytes
+        offsets = np.frombuffer(blob, dtype=np.uint32, count=n + 1, offset=pos).tolist()
+        pos += (n + 1) * 4
+        texts = [blob[pos + start:pos + end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+        return cls(boxes, confidence, texts)
+
+def as_word_boxes(data):
+    """Accept either a WordBoxes or the old list of dicts."""
+    return data if isinstance(data, WordBoxes) else WordBoxes.from_records(data)
@@ -0,0 +1,140 @@
+import logging
+from copy import copy
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter
+
+from OCR_Modules.instrumentation import timed
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GREEN = '00FF00'
+YELLOW = 'FFFF00'
+RED = 'FF0000'
+
+class XlsxStreamWriter:
+    """Writes OCR grids row by row using openpyxl's write-only mode.
+
+    Cells get one of three pre-built green/yellow/red styles. Column widths
+    are tracked as rows arrive; because write-only sheets need them before
+    the first row, up to `width_sample_rows` rows are held back per sheet and
+    the widths are taken from that window.
+    """
+
+    def __init__(self, output_xlsx, green_threshold=0.97, yellow_threshold=0.92, width_sample_rows=1000):
+        self.output_xlsx = output_xlsx
+        self.green_threshold = green_threshold
+        self.yellow_threshold = yellow_threshold
+        self.width_sample_rows = width_sample_rows
+        self.rows_written = 0
+        self.wb = Workbook(write_only=True)
+        self._ws = None
+        self._styles = None
+        self._pending = []
+        self._widths = []
+        self._started = False
+
+    def add_sheet(self, title=None):
+        self._flush()
+        self._ws = self.wb.create_sheet(title)
+        self._pending = []
+        self._widths = []
+        self._started = False
+        if self._styles is None:
+            self._styles = self._build_styles(self._ws)
+
+    @staticmethod
+    def _build_styles(ws):
+        # Style each colour once and copy the resulting style array onto cells,
+        # instead of creating and registering a PatternFill per cell
+        styles = {}
+        for color in (GREEN, YELLOW, RED):
+            template = WriteOnlyCell(ws)
+            template.fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
+            styles[color] = template._style
+        return styles
+
+    def _color(self, confidence):
+        if confidence >= self.green_threshold:
+            return GREEN
+        if confidence >= self.yellow_threshold:
+            return YELLOW
+        return RED
+
+    def write_row(self, row):
+        if self._ws is None:
+            self.add_sheet()
+
+        widths = self._widths
+        for col_index, cell in enumerate(row):
+            if cell is None:
+                continue
+            length = len(str(cell[0]))
+            if col_index >= len(widths):
+                widths.extend([0] * (col_index + 1 - len(widths)))
+            if length > widths[col_index]:
+                widths[col_index] = length
+
+        if self._started:
+            self._ws.append(self._cells(row))
+        else:
+            self._pending.append(row)
+            if len(self._pending) >= self.width_sample_rows:
+                self._start()
+        self.rows_written += 1
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
+    def _start(self):
+        for col_index, max_length in enumerate(self._widths, start=1):
+            if max_length:
+                self._ws.column_dimensions[get_column_letter(col_index)].width = max_length + 2
+        self._started = True
+        pending, self._pending = self._pending, []
+        for row in pending:
+            self._ws.append(self._cells(row))
+
+    def _cells(self, row):
+        ws = self._ws
+        styles = self._styles
+        cells = []
+        for cell in row:
+            if cell is None:
+                cells.append(None)
+                continue
+            text, confidence = cell
+            out = WriteOnlyCell(ws, value=text)
+            out._style = copy(styles[self._color(confidence)])
+            cells.append(out)
+        return cells
+
+    def _flush(self):
+        if self._ws is not None and not self._started:
+            self._start()
+
+    def close(self):
+        if self._ws is None:
+            self.add_sheet()
+        self._flush()
+        self.wb.save(self.output_xlsx)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+@timed('xlsx')
+def write_xlsx(rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92):
+    """Streaming replacement for save_as_xlsx; rows are lists of (text, confidence) or None."""
+    # The rows are already in memory, so let the width window cover all of them
+    with XlsxStreamWriter(output_xlsx, green_threshold, yellow_threshold,
+                          width_sample_rows=max(len(rows), 1)) as writer:
+        writer.write_rows(rows)
@@ -19,25 +19,36 @@ import psutil
 import win32api
 import win32con
 import logging
-import cv2
-import numpy as np
-import openpyxl
-from openpyxl.styles import PatternFill
-from openpyxl.utils import get_column_letter
-from paddleocr import PaddleOCR
-import pytesseract
-from pytesseract import Output
+import importlib
+# Only light modules are imported here so the window opens at once. paddleocr, pytesseract,
+# cv2, numpy and openpyxl are imported by the background warm-up or on first use.
+from OCR_Modules.batch_view import BatchTable
+from OCR_Modules.gui_jobs import BatchRunner, JobScheduler
+from OCR_Modules.image_view import ImageViewer
+from OCR_Modules import instrumentation
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Imported by the engine warm-up thread so the first image doesn't pay for them
+PIPELINE_MODULES = ('OCR_Modules.image_io', 'OCR_Modules.table_layout', 'OCR_Modules.xlsx_writer',
+                    'OCR_Modules.preview', 'OCR_Modules.page_source', 'OCR_Modules.ocr_cache')
+# Progress bar steps of an OCR job; documents skip building the table, which happens page by page
+JOB_STAGES = ('Loading engine', 'Recognising text', 'Building table', 'Writing Excel', 'Drawing boxes',
+              'Rendering preview')
+INPUT_FILETYPES = [("Images and documents", ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tif", "*.tiff", "*.pdf"))]
+
 class PaddleOCREngine:
-    def __init__(self, model_dir=None):
+    def __init__(self, model_dir=None, backend=None):
         if model_dir is None:
             model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
-        
-        self.ocr = PaddleOCR(
+        self.model_dir = model_dir
+
+        from OCR_Modules import onnx_backend
+        # 'paddle', or 'onnx' / 'onnx-int8' to run the models on ONNX Runtime (default: $OCR_PADDLE_BACKEND)
+        self.backend = onnx_backend.resolve_backend(backend)
+        params = dict(
             use_angle_cls=True,
             lang='en',
             use_gpu=False,
@@ -46,18 +57,43 @@ class PaddleOCREngine:
             cls_model_dir=os.path.join(model_dir, 'cls'),
             rec_model_dir=os.path.join(model_dir, 'rec')
         )
+        from paddleocr import PaddleOCR
+        from OCR_Modules import program_cache
+
+        ocr = None
+        if self.backend != 'paddle':
+            params.update(onnx_backend.onnx_params(params, self.backend))
+        elif program_cache.enabled():
+            # Loads the IR-optimised programs cached by an earlier start (opt-in with OCR_PROGRAM_CACHE=1)
+            try:
+                ocr = program_cache.create_paddle_ocr(params)
+            except Exception as e:
+                logger.warning(f"Optimised program cache unavailable, loading the models directly: {str(e)}")
+        if ocr is None:
+            ocr = PaddleOCR(**params)
+        self.ocr = instrumentation.instrument_paddle(ocr)
+        # One engine serves the GUI job thread and the batch workers; Paddle predictors are not thread-safe
+        self.lock = threading.Lock()
 
     def process_image(self, file_path):
-        try:
-            image = cv2.imread(file_path)
-            if image is None:
-                raise ValueError("Could not open image!")
-
-            result = self.ocr.ocr(image, cls=True, det=True)
-            if result is None or not result:
-                raise ValueError("No text detected in image.")
+        from OCR_Modules.preprocess import prepare, restore_boxes
+        from OCR_Modules.word_boxes import WordBoxes
 
-            data = []
+        try:
+            # file_path may also be an in-memory ndarray (BGR) or PIL image; deskewed etc. as needed
+            image, info = prepare(file_path, 'paddle')
+
+            with self.lock:
+                result = self.ocr.ocr(image, cls=True, det=True)
+            if result is None:
+                raise ValueError("OCR processing failed - no results returned")
+            # A blank image (e.g. an empty page of a duplex scan) comes back as [] or [None]
+            if not any(result):
+                return WordBoxes.empty()
+
+            boxes = []
+            texts = []
+            confidences = []
             for line in result:
                 if not line:
                     continue
@@ -67,21 +103,27 @@ class PaddleOCREngine:
                     bbox, (text, confidence) = word_info
                     if not bbox or len(bbox) != 4:
                         continue
-                    x = (bbox[0][0] + bbox[2][0]) / 2
-                    y = (bbox[0][1] + bbox[2][1]) / 2
-                    data.append({
-                        'x': x, 
-                        'y': y, 
-                        'text': text, 
-                        'confidence': confidence, 
-                        'bbox': bbox
-                    })
-
-            return data
+                    boxes.append(bbox)
+                    texts.append(text)
+                    confidences.append(confidence)
+
+            # Boxes found on a deskewed image are rotated back onto the original
+            return restore_boxes(WordBoxes(boxes, confidences, texts), info)
         except Exception as e:
             logger.error(f"Error processing image: {str(e)}")
             raise
 
+    def process_images(self, file_paths, rec_batch_size=64):
+        # One WordBoxes per image, in the same order as file_paths
+        from OCR_Modules.paddleOCR import process_images as paddle_process_images
+
+        try:
+            with self.lock:
+                return paddle_process_images(file_paths, self.ocr, rec_batch_size=rec_batch_size)
+        except Exception as e:
+            logger.error(f"Error processing images: {str(e)}")
+            raise
+
     def group_into_rows(self, data, y_threshold=10):
         data_sorted = sorted(data, key=lambda k: k['y'])
         rows = []
@@ -106,110 +148,76 @@ class PaddleOCREngine:
         return [[(text, confidence) for x, text, confidence in row] for row in rows]
 
     def save_as_xlsx(self, rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92):
-        wb = openpyxl.Workbook()
-        ws = wb.active
-
-        for row_index, row in enumerate(rows, start=1):
-            for col_index, cell in enumerate(row, start=1):
-                text, confidence = cell
-                ws.cell(row=row_index, column=col_index, value=text)
-
-                if confidence >= green_threshold:
-                    fill_color = '00FF00'
-                elif confidence >= yellow_threshold:
-                    fill_color = 'FFFF00'
-                else:
-                    fill_color = 'FF0000'
-
-                fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-                ws.cell(row=row_index, column=col_index).fill = fill
+        from OCR_Modules.xlsx_writer import write_xlsx
+        write_xlsx(rows, output_xlsx, green_threshold, yellow_threshold)
 
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column_letter].width = adjusted_width
+    @instrumentation.timed('draw')
+    def draw_bounding_boxes(self, image_path, data, output_image_path):
+        import cv2
+        import numpy as np
+        from OCR_Modules.image_io import load_pil_image
+        from OCR_Modules.word_boxes import as_word_boxes
 
-        wb.save(output_xlsx)
+        words = as_word_boxes(data)
+        image = np.array(load_pil_image(image_path))
+        cv2.polylines(image, list(np.rint(words.boxes).astype(np.int32)), True, (0, 128, 0), 2)
 
-    def draw_bounding_boxes(self, image_path, data, output_image_path):
-        image = Image.open(image_path)
-        image = image.convert('RGB')
+        image = Image.fromarray(image)
         draw = ImageDraw.Draw(image)
         try:
             font = ImageFont.truetype("arial.ttf", 16)
         except:
             font = ImageFont.load_default()
 
-        for item in data:
-            bbox = item['bbox']
-            text = item['text']
-            confidence = item['confidence']
-
-            bbox_points = [(point[0], point[1]) for point in bbox]
-            draw.line(bbox_points + [bbox_points[0]], fill='green', width=2)
-            x, y = bbox[0][0], bbox[0][1]
+        anchors = words.boxes[:, 0].tolist()
+        for (x, y), text, confidence in zip(anchors, words.texts, words.confidence.tolist()):
             draw.text((x, y - 20), f'{text} ({confidence:.2f})', fill='red', font=font)
 
         image.save(output_image_path)
+        return image
 
 class TesseractOCREngine:
     def __init__(self, tesseract_cmd=None):
         if tesseract_cmd is None:
             tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
         
+        self.tesseract_cmd = tesseract_cmd
+        import pytesseract
+        from OCR_Modules.tesserocr_backend import load_tesserocr
+        self.pytesseract = pytesseract
         pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
         os.environ['TESSDATA_PREFIX'] = r'C:\Program Files\Tesseract-OCR\tessdata'
+        # In-process API when tesserocr is installed, otherwise one tesseract process per image
+        self.api = load_tesserocr(os.environ['TESSDATA_PREFIX'])
 
     def process_image(self, file_path):
-        try:
-            image = cv2.imread(file_path)
-            if image is None:
-                raise ValueError("Could not open image!")
-
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            data = pytesseract.image_to_data(image_rgb, output_type=Output.DICT)
+        import cv2
+        from OCR_Modules.preprocess import prepare, restore_boxes
+        from OCR_Modules.word_boxes import WordBoxes
 
-            n_boxes = len(data['level'])
-            extracted_data = []
+        try:
+            image, info = prepare(file_path, 'tesseract')
+            # Binarised pages are single-channel and go to Tesseract as they are
+            image_rgb = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            with instrumentation.stage('tesseract'):
+                data = (self.api or self.pytesseract).image_to_data(image_rgb, output_type=self.pytesseract.Output.DICT)
 
-            for i in range(n_boxes):
-                try:
-                    if not data['text'][i].strip():
-                        continue
-                        
-                    x = data['left'][i] + data['width'][i] / 2
-                    y = data['top'][i] + data['height'][i] / 2
-                    text = data['text'][i]
-                    confidence = float(data['conf'][i]) / 100.0 if data['conf'][i] != '-1' else 0.0
-                    bbox = [
-                        (data['left'][i], data['top'][i]),
-                        (data['left'][i] + data['width'][i], data['top'][i]),
-                        (data['left'][i] + data['width'][i], data['top'][i] + data['height'][i]),
-                        (data['left'][i], data['top'][i] + data['height'][i]),
-                    ]
-                    extracted_data.append({
-                        'x': x, 
-                        'y': y, 
-                        'text': text.strip(), 
-                        'confidence': confidence, 
-                        'bbox': bbox
-                    })
-                except Exception as e:
-                    logger.warning(f"Error processing box {i}: {str(e)}")
-
-            return extracted_data
+            # Column-wise conversion; empty-text and conf == -1 rows are masked out
+            with instrumentation.stage('parse'):
+                words = WordBoxes.from_tesseract(data)
+            return restore_boxes(words, info)
 
         except Exception as e:
             logger.error(f"Error processing image: {str(e)}")
             raise
 
+    def params(self):
+        # OCR cache identity of the backend in use and of the pre-processing
+        from OCR_Modules.preprocess import cache_params
+
+        params = self.api.params() if self.api else {'tesseract_cmd': self.tesseract_cmd}
+        return dict(params, **cache_params('tesseract'))
+
     def group_into_rows(self, data, y_threshold=10):
         data_sorted = sorted(data, key=lambda k: k['y'])
         rows = []
@@ -234,59 +242,33 @@ class TesseractOCREngine:
         return [[(text, confidence) for x, text, confidence in row] for row in rows]
 
     def save_as_xlsx(self, rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92):
-        wb = openpyxl.Workbook()
-        ws = wb.active
-
-        for row_index, row in enumerate(rows, start=1):
-            for col_index, cell in enumerate(row, start=1):
-                text, confidence = cell
-                ws.cell(row=row_index, column=col_index, value=text)
-
-                if confidence >= green_threshold:
-                    fill_color = '00FF00'
-                elif confidence >= yellow_threshold:
-                    fill_color = 'FFFF00'
-                else:
-                    fill_color = 'FF0000'
+        from OCR_Modules.xlsx_writer import write_xlsx
+        write_xlsx(rows, output_xlsx, green_threshold, yellow_threshold)
 
-                fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
-                ws.cell(row=row_index, column=col_index).fill = fill
+    @instrumentation.timed('draw')
+    def draw_bounding_boxes(self, image_path, data, output_path):
+        import cv2
+        import numpy as np
+        from OCR_Modules.image_io import load_image
+        from OCR_Modules.word_boxes import as_word_boxes
 
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        try:
+            words = as_word_boxes(data)
+            image = load_image(image_path)
+            if image is image_path:
+                image = image.copy()
 
-        wb.save(output_xlsx)
+            polygons = np.rint(words.boxes).astype(np.int32).reshape(-1, 4, 1, 2)
+            cv2.polylines(image, list(polygons), True, (0, 255, 0), 2)
 
-    def draw_bounding_boxes(self, image_path, data, output_path):
-        try:
-            image = cv2.imread(image_path)
-            for item in data:
-                bbox = item['bbox']
-                if len(bbox) != 4:
-                    continue
-                
-                bbox_np = np.array(bbox, dtype=np.int32)
-                bbox_np = bbox_np.reshape((-1, 1, 2))
-                
-                cv2.polylines(image, [bbox_np], True, (0, 255, 0), 2)
-                
-                text = item['text']
-                confidence = item['confidence']
+            anchors = polygons[:, 0, 0].tolist()
+            for (x, y), text, confidence in zip(anchors, words.texts, words.confidence.tolist()):
                 label = f"{text} ({confidence:.2f})"
-                cv2.putText(image, label, (bbox[0][0], bbox[0][1] - 10),
+                cv2.putText(image, label, (x, y - 10),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
             
             cv2.imwrite(output_path, image)
-            
+            return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
         except Exception as e:
             logger.error(f"Error in draw_bounding_boxes: {str(e)}")
             raise
@@ -299,13 +281,10 @@ class OCRApp:
         # Simplify to just use current directory
         self.app_dir = os.path.dirname(os.path.abspath(__file__))
         
-        # Initialize OCR engines as class attributes
-        self.paddle_ocr = PaddleOCREngine(
-            model_dir=os.path.join(self.app_dir, 'models')
-        )
-        self.tesseract_ocr = TesseractOCREngine(
-            tesseract_cmd=r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-        )
+        # Engines are created on first use (normally by the warm-up thread); the unselected one never is
+        self.engines = {}
+        self.engine_locks = {'PaddleOCR': threading.Lock(), 'Tesseract': threading.Lock()}
+        self.warming_engines = set()
         
         # Initialize the rest of the application
         self.initialize_app(root)
@@ -327,8 +306,18 @@ class OCRApp:
         self.green_threshold = tk.IntVar(value=97)
         self.yellow_threshold = tk.IntVar(value=92)
         self.output_directory = None
+        # Screenshots are OCR'd from memory; keeping the PNG is optional and done in the background
+        self.save_screenshots = tk.BooleanVar(value=True)
+        # Per-stage timings in the status bar, appended to ~/.ocr_tool/trace.jsonl
+        self.record_timings = tk.BooleanVar(value=instrumentation.is_enabled())
+        # OCR jobs run one at a time off the Tk thread; their progress and results come back via root.after
+        self.jobs = JobScheduler(self.root)
+        # The running (or last) multi-file batch, listed in the batch table
+        self.batch = None
         
         self.setup_ui()
+        # Load the selected engine once the window is up
+        self.root.after(100, self.warm_up_engine)
 
     def setup_ui(self):
         # Main frame
@@ -360,7 +349,10 @@ class OCRApp:
         ocr_label.pack(pady=(10, 5))
         ocr_dropdown = ttk.Combobox(self.center_frame, textvariable=self.ocr_engine, state="readonly", width=30)
         ocr_dropdown['values'] = ('PaddleOCR', 'Tesseract')
-        ocr_dropdown.pack(pady=(0, 20))
+        ocr_dropdown.pack(pady=(0, 5))
+        ocr_dropdown.bind('<<ComboboxSelected>>', self.warm_up_engine)
+        self.engine_status_label = ttk.Label(self.center_frame, text="")
+        self.engine_status_label.pack(pady=(0, 15))
 
         # Confidence Thresholds
         thresholds_frame = ttk.Frame(self.center_frame)
@@ -389,6 +381,15 @@ class OCRApp:
                                         command=self.select_image, width=20)
         self.upload_button.pack(pady=(0, 10))
 
+        # Upload Folder Button
+        upload_folder_icon = Image.open(os.path.join('icons', 'folder.png'))
+        upload_folder_icon = upload_folder_icon.resize((20, 20), Image.LANCZOS)
+        self.upload_folder_icon_photo = ImageTk.PhotoImage(upload_folder_icon)
+        self.upload_folder_button = ttk.Button(self.center_frame, text="Upload Folder",
+                                               image=self.upload_folder_icon_photo, compound=tk.LEFT,
+                                               command=self.select_folder, width=20)
+        self.upload_folder_button.pack(pady=(0, 10))
+
         # Screenshot Button
         screenshot_icon = Image.open("icons/screenshot.png")
         screenshot_icon = screenshot_icon.resize((20, 20), Image.LANCZOS)
@@ -396,14 +397,20 @@ class OCRApp:
         self.screenshot_button = ttk.Button(self.center_frame, text="Screenshot", 
                                             image=self.screenshot_icon_photo, compound=tk.LEFT,
                                             command=self.take_screenshot, width=20)
-        self.screenshot_button.pack(pady=(0, 20))
+        self.screenshot_button.pack(pady=(0, 5))
+        save_screenshot_check = ttk.Checkbutton(self.center_frame, text="Save screenshot as PNG",
+                                                variable=self.save_screenshots)
+        save_screenshot_check.pack(pady=(0, 5))
+        record_timings_check = ttk.Checkbutton(self.center_frame, text="Record timings",
+                                               variable=self.record_timings, command=self.toggle_timings)
+        record_timings_check.pack(pady=(0, 20))
 
         # Status Label
         self.status_label = ttk.Label(self.center_frame, text="")
         self.status_label.pack(pady=(0, 10))
 
         # Progress bar (hidden initially)
-        self.progress_bar = ttk.Progressbar(self.center_frame, mode='indeterminate')
+        self.progress_bar = ttk.Progressbar(self.center_frame, mode='determinate', maximum=100, length=300)
         self.progress_bar.pack(pady=(0, 10))
         self.progress_bar.pack_forget()
 
@@ -413,6 +420,19 @@ class OCRApp:
         self.middle_frame = ttk.Frame(self.main_frame)
         self.right_frame = ttk.Frame(self.main_frame)  # For the sidebar
 
+        # Batch status table along the bottom (hidden until a batch is started)
+        self.batch_frame = ttk.Frame(self.main_frame, padding=(10, 5))
+        batch_header = ttk.Frame(self.batch_frame)
+        batch_header.pack(fill=tk.X, pady=(0, 5))
+        self.batch_label = ttk.Label(batch_header, text="")
+        self.batch_label.pack(side=tk.LEFT)
+        self.batch_close_button = ttk.Button(batch_header, text="Close", command=self.close_batch)
+        self.batch_close_button.pack(side=tk.RIGHT)
+        self.batch_cancel_button = ttk.Button(batch_header, text="Cancel", command=self.cancel_batch)
+        self.batch_cancel_button.pack(side=tk.RIGHT, padx=(0, 5))
+        self.batch_table = BatchTable(self.batch_frame, on_select=self.show_batch_item)
+        self.batch_table.pack(fill=tk.BOTH, expand=True)
+
     def select_output_directory(self):
         directory = filedialog.askdirectory()
         if directory:
@@ -449,14 +469,108 @@ class OCRApp:
         self.progress_bar.pack_forget()
 
     def select_image(self):
-        file_path = filedialog.askopenfilename(
-            filetypes=[("Image files", ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tiff"))]
-        )
-        if file_path:
-            self.is_screenshot = False  # Set to False for uploaded images
-            self.current_image_path = file_path  # Store the current image path
-            self.reset_ui()
-            self.process_image(file_path)
+        file_paths = filedialog.askopenfilenames(filetypes=INPUT_FILETYPES)
+        if not file_paths:
+            return
+        self.is_screenshot = False  # Set to False for uploaded images
+        self.current_image_path = file_paths[0]  # Store the current image path
+        self.reset_ui()
+        if len(file_paths) == 1:
+            self.process_image(file_paths[0])
+        else:
+            self.start_batch(list(file_paths))
+
+    def select_folder(self):
+        from OCR_Modules.batch import collect_inputs
+
+        directory = filedialog.askdirectory()
+        if not directory:
+            return
+        file_paths = collect_inputs([directory])
+        if not file_paths:
+            self.status_label.config(text=f"No images or PDFs found in {directory}")
+            return
+        self.is_screenshot = False
+        self.current_image_path = file_paths[0]
+        self.reset_ui()
+        self.start_batch(file_paths)
+
+    def start_batch(self, file_paths):
+        if self.batch is not None:
+            self.batch.cancel()
+        ocr_engine = self.ocr_engine.get()
+        settings = {
+            'ocr_engine': ocr_engine,
+            'green': self.green_threshold.get() / 100.0,
+            'yellow': self.yellow_threshold.get() / 100.0,
+            # None: next to each input file
+            'output_dir': self.output_directory,
+            # Previews are rendered when a row is clicked, not for every file
+            'preview': False,
+        }
+        # PaddleOCR inference is serialised by the engine's lock; the second worker
+        # writes a file's outputs while the next one is OCR'd
+        workers = 2 if ocr_engine == "PaddleOCR" else max(1, (os.cpu_count() or 1) // 2)
+        self.batch = BatchRunner(self.jobs, self._batch_job, file_paths, settings, workers=workers,
+                                 on_update=self.update_batch_item, on_finished=self.batch_finished)
+        self.batch_table.load(self.batch.items)
+        self.batch_cancel_button.config(state=tk.NORMAL)
+        # Pack before everything else so the table keeps its strip along the bottom
+        slaves = self.main_frame.pack_slaves()
+        if self.batch_frame not in slaves:
+            self.batch_frame.pack(side=tk.BOTTOM, fill=tk.X, before=slaves[0])
+        self.update_batch_label()
+        self.batch.start()
+
+    def _batch_job(self, job, file_path, settings):
+        # Runs on a batch worker; every worker uses the engine loaded once by get_engine
+        settings = dict(settings, output_dir=settings['output_dir'] or os.path.dirname(file_path))
+        result = self._ocr_job(job, file_path, None, settings)
+        # Keep only what the result view needs; the image is read back from disk when the row is clicked
+        result.pop('annotated')
+        return result
+
+    def update_batch_item(self, item):
+        self.batch_table.update(item)
+        self.update_batch_label()
+
+    def update_batch_label(self):
+        counts = self.batch.counts()
+        finished = counts['done'] + counts['failed'] + counts['cancelled']
+        text = f"{finished}/{len(self.batch.items)} files processed, {counts['failed']} failed"
+        if counts['cancelled']:
+            text += f", {counts['cancelled']} cancelled"
+        self.batch_label.config(text=text)
+
+    def batch_finished(self, batch):
+        if batch is not self.batch:
+            return
+        self.batch_cancel_button.config(state=tk.DISABLED)
+        self.update_batch_label()
+
+    def cancel_batch(self):
+        if self.batch is not None:
+            self.batch.cancel()
+
+    def close_batch(self):
+        self.cancel_batch()
+        self.batch_frame.pack_forget()
+
+    def show_batch_item(self, item):
+        if item.status == 'failed':
+            self.status_label.config(text=f"{os.path.basename(item.path)} failed: {str(item.error)}")
+        elif item.status == 'done':
+            # Loading the boxes image and drawing the preview happen on the job thread
+            self.jobs.submit(item.path, self._batch_result_job, item.result,
+                             on_done=self.show_job_result, on_error=self.show_job_error)
+
+    def _batch_result_job(self, job, result):
+        from OCR_Modules.preview import render_table_preview
+
+        annotated_image = Image.open(result['image_path'])
+        annotated_image.load()
+        preview = render_table_preview(result['rows'], result['green'], result['yellow'])
+        return dict(result, annotated=annotated_image, preview=preview)
 
     def take_screenshot(self):
         self.root.withdraw()
@@ -471,14 +585,20 @@ class OCRApp:
             else:
                 output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
             
-            os.makedirs(output_dir, exist_ok=True)
-            base_filename = "screenshot"
+            start = time.perf_counter()
             date_string = time.strftime("%Y-%m-%d_%H-%M-%S")
-            screenshot_path = os.path.join(output_dir, base_filename + "_" + date_string + ".png")
-            image.save(screenshot_path)
+            base_filename = "screenshot_" + date_string
+            # Clipboard images load lazily; decode once so the PNG save and OCR threads never race on it
+            image.load()
+            screenshot_path = os.path.join(output_dir, base_filename + ".png")
+            if self.save_screenshots.get():
+                # Written in the background; OCR works on the in-memory image
+                from OCR_Modules.image_io import save_image_async
+                save_image_async(image, screenshot_path)
             self.current_image_path = screenshot_path  # Store the current image path
             self.reset_ui()
-            self.process_image(screenshot_path)
+            self.process_image(image, base_filename)
+            logger.info(f"Screenshot handed to OCR in {(time.perf_counter() - start) * 1000:.1f} ms without touching disk")
 
     def capture_screenshot(self):
         
@@ -522,99 +642,222 @@ class OCRApp:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
             raise Exception(f"Error capturing screenshot: {str(e)}")
 
-    def process_image(self, file_path):
-        # Start a new thread for processing
-        processing_thread = threading.Thread(target=self._process_image_thread, args=(file_path,))
-        processing_thread.start()
-
-    def _process_image_thread(self, file_path):
+    def get_engine(self, ocr_engine):
+        if ocr_engine not in self.engine_locks:
+            raise ValueError("Please select an OCR engine.")
+        # Per-engine lock: a request arriving during the warm-up waits for it instead of loading twice
+        with self.engine_locks[ocr_engine]:
+            engine = self.engines.get(ocr_engine)
+            if engine is None:
+                if ocr_engine == "PaddleOCR":
+                    engine = PaddleOCREngine(model_dir=os.path.join(self.app_dir, 'models'))
+                else:
+                    engine = TesseractOCREngine(tesseract_cmd=r'C:\Program Files\Tesseract-OCR\tesseract.exe')
+                self.engines[ocr_engine] = engine
+            return engine
+
+    def warm_up_engine(self, event=None):
+        ocr_engine = self.ocr_engine.get()
+        if ocr_engine in self.warming_engines:
+            return
+        self.warming_engines.add(ocr_engine)
+        self.engine_status_label.config(text=f"Loading {ocr_engine} model...")
+        threading.Thread(target=self._warm_up_thread, args=(ocr_engine,), daemon=True).start()
+
+    def _warm_up_thread(self, ocr_engine):
+        start = time.perf_counter()
         try:
-            ocr_engine = self.ocr_engine.get()
-
-            # Show progress bar in the center frame
-            self.progress_bar.pack(pady=(0, 10))
-            self.progress_bar.start()
+            for name in PIPELINE_MODULES:
+                importlib.import_module(name)
+            self.get_engine(ocr_engine)
+        except Exception as e:
+            # Let the next selection (or the first image) try again
+            self.warming_engines.discard(ocr_engine)
+            logger.error(f"Could not load {ocr_engine}: {str(e)}")
+            self.jobs.call_in_ui(self.engine_status_label.config, text=f"Could not load {ocr_engine}: {str(e)}")
+            return
+        logger.info(f"{ocr_engine} ready {time.perf_counter() - start:.2f}s after the warm-up started")
+        self.jobs.call_in_ui(self._engine_ready, ocr_engine)
+
+    def _engine_ready(self, ocr_engine):
+        if self.ocr_engine.get() == ocr_engine:
+            self.engine_status_label.config(text=f"{ocr_engine} ready")
+
+    def toggle_timings(self):
+        if self.record_timings.get():
+            instrumentation.enable(instrumentation.DEFAULT_TRACE_PATH)
+        else:
+            instrumentation.disable()
 
-            if ocr_engine == "PaddleOCR":
-                self.process_with_paddleocr(file_path)
+    def output_dir_for(self, file_path):
+        if self.output_directory:
+            return self.output_directory
+        if self.is_screenshot:
+            return os.path.join(os.path.expanduser("~"), "Desktop")
+        return os.path.dirname(file_path)
+
+    def process_image(self, file_path, base_filename=None):
+        # file_path may also be an in-memory image, in which case base_filename names the outputs
+        from OCR_Modules.image_io import describe_source
+
+        # The job never touches Tk, so everything it needs from the widgets is read here
+        settings = {
+            'ocr_engine': self.ocr_engine.get(),
+            'green': self.green_threshold.get() / 100.0,
+            'yellow': self.yellow_threshold.get() / 100.0,
+            'output_dir': self.output_dir_for(file_path),
+        }
+        label = base_filename or describe_source(file_path)
+        self.progress_bar.config(value=0)
+        self.progress_bar.pack(pady=(0, 10))
+        self.status_label.config(text=f"Queued {os.path.basename(label)}...")
+        # A new image supersedes the one still being processed
+        self.jobs.submit(label, self._ocr_job, file_path, base_filename, settings, stages=JOB_STAGES,
+                         on_progress=self.show_progress, on_done=self.show_job_result, on_error=self.show_job_error)
+
+    def _ocr_job(self, job, file_path, base_filename, settings):
+        # Runs on the job thread: report through job.stage()/job.progress() only
+        from OCR_Modules.page_source import is_document
+
+        ocr_engine = settings['ocr_engine']
+        with instrumentation.trace_image(job.name, engine=ocr_engine) as record:
+            if isinstance(file_path, str) and is_document(file_path):
+                # PDFs and multi-frame TIFFs are streamed page by page into one workbook
+                result = self.process_document_file(job, file_path, settings)
+            elif ocr_engine == "PaddleOCR":
+                result = self.process_with_paddleocr(job, file_path, base_filename, settings)
             elif ocr_engine == "Tesseract":
-                self.process_with_tesseract(file_path)
+                result = self.process_with_tesseract(job, file_path, base_filename, settings)
             else:
                 raise ValueError("Please select an OCR engine.")
-        except Exception as e:
-            self.status_label.config(text=f"Error: {str(e)}\nPlease try a different image or OCR engine.")
-        finally:
-            # Hide progress bar
-            self.progress_bar.stop()
-            self.progress_bar.pack_forget()
-
-    def process_with_paddleocr(self, file_path):
-        try:
-            data = self.paddle_ocr.process_image(file_path)
-            rows = self.paddle_ocr.group_into_rows(data)
-            
-            if self.output_directory:
-                output_dir = self.output_directory
-            else:
-                if self.is_screenshot:
-                    output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
-                else:
-                    output_dir = os.path.dirname(file_path)
-                
-            os.makedirs(output_dir, exist_ok=True)
-            base_filename = os.path.splitext(os.path.basename(file_path))[0]
-            output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
-            output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
-
-            green_thresh = self.green_threshold.get() / 100.0
-            yellow_thresh = self.yellow_threshold.get() / 100.0
+        if record is not None:
+            result['message'] += f"\n{instrumentation.format_record(record)}"
+        return result
 
-            self.paddle_ocr.save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
-            self.paddle_ocr.draw_bounding_boxes(file_path, data, output_image_path)
+    def show_progress(self, job, percent, message):
+        if percent is not None:
+            self.progress_bar.config(value=percent)
+        if message:
+            self.status_label.config(text=message)
 
-            self.status_label.config(text=f"Excel file saved: {output_xlsx}")
-            self.display_results(output_image_path, output_xlsx)
-        except Exception as e:
-            self.status_label.config(text=f"Error: {str(e)}\nPlease try a different image or OCR engine.")
-
-    def process_with_tesseract(self, file_path):
-        try:
-            data = self.tesseract_ocr.process_image(file_path)
-
-            if not data:
-                raise ValueError("No data extracted from image.")
-
-            rows = self.tesseract_ocr.group_into_rows(data)
-
-            if not rows:
-                raise ValueError("No rows extracted from data.")
+    def show_job_result(self, job, result):
+        self.progress_bar.pack_forget()
+        self.status_label.config(text=result['message'])
+        self.display_results(result['annotated'], result['rows'], result['green'], result['yellow'],
+                             preview=result['preview'])
 
-            # Determine the output directory
-            if self.output_directory:
-                output_dir = self.output_directory
-            else:
-                if self.is_screenshot:
-                    output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
-                else:
-                    output_dir = os.path.dirname(file_path)
-                
-            os.makedirs(output_dir, exist_ok=True)
+    def show_job_error(self, job, error):
+        self.progress_bar.pack_forget()
+        self.status_label.config(text=f"Error: {str(error)}\nPlease try a different image or OCR engine.")
+
+    def process_with_paddleocr(self, job, file_path, base_filename, settings):
+        from OCR_Modules.ocr_cache import cached_process_image, get_default_cache, model_files
+        from OCR_Modules.onnx_backend import ocr_cache_params
+
+        job.stage('Loading engine')
+        paddle_ocr = self.get_engine("PaddleOCR")
+        job.stage('Recognising text')
+        # Re-runs of the same image (e.g. with new thresholds) come from the OCR cache
+        data = cached_process_image(
+            lambda path, engine: engine.process_image(path), file_path, paddle_ocr, 'PaddleOCR',
+            cache=get_default_cache(),
+            model_files=model_files(paddle_ocr.model_dir),
+            params=ocr_cache_params(paddle_ocr.backend)
+        )
+        return self.write_results(job, paddle_ocr, file_path, base_filename, data, settings)
+
+    def process_with_tesseract(self, job, file_path, base_filename, settings):
+        from OCR_Modules.ocr_cache import cached_process_image, get_default_cache
+
+        job.stage('Loading engine')
+        tesseract_ocr = self.get_engine("Tesseract")
+        job.stage('Recognising text')
+        data = cached_process_image(
+            lambda path, engine: engine.process_image(path), file_path, tesseract_ocr, 'Tesseract',
+            cache=get_default_cache(),
+            model_files=[os.path.join(os.environ.get('TESSDATA_PREFIX', ''), 'eng.traineddata')],
+            params=tesseract_ocr.params()
+        )
+        return self.write_results(job, tesseract_ocr, file_path, base_filename, data, settings)
+
+    def write_results(self, job, engine, file_path, base_filename, data, settings):
+        """Grid, xlsx, bounding box image and table preview for one OCR'd image (job thread)."""
+        from OCR_Modules.preview import render_table_preview
+        from OCR_Modules.table_layout import group_into_grid
+
+        if not data:
+            raise ValueError("No data extracted from image.")
+        job.stage('Building table')
+        rows = group_into_grid(data)
+        if not rows:
+            raise ValueError("No rows extracted from data.")
+
+        output_dir = settings['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        if base_filename is None:
             base_filename = os.path.splitext(os.path.basename(file_path))[0]
-            output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
-            output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
-
-            green_thresh = self.green_threshold.get() / 100.0
-            yellow_thresh = self.yellow_threshold.get() / 100.0
-
-            self.tesseract_ocr.save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
-            self.tesseract_ocr.draw_bounding_boxes(file_path, data, output_image_path)
+        output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
+        output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
+        green_thresh, yellow_thresh = settings['green'], settings['yellow']
+
+        job.stage('Writing Excel')
+        engine.save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
+        job.stage('Drawing boxes')
+        annotated_image = engine.draw_bounding_boxes(file_path, data, output_image_path)
+        # The preview is drawn here too, so the Tk thread only has to show it
+        job.stage('Rendering preview')
+        preview = render_table_preview(rows, green_thresh, yellow_thresh) if settings.get('preview', True) else None
+        return {'message': f"Excel file saved: {output_xlsx}", 'annotated': annotated_image, 'rows': rows,
+                'preview': preview, 'green': green_thresh, 'yellow': yellow_thresh,
+                'xlsx': output_xlsx, 'image_path': output_image_path}
+
+    def process_document_file(self, job, file_path, settings):
+        from OCR_Modules.page_source import page_count, process_document
+        from OCR_Modules.preview import render_table_preview
+
+        ocr_engine = settings['ocr_engine']
+        job.stage('Loading engine')
+        engine = self.get_engine(ocr_engine)
+        # A PaddleOCR engine must not be shared between threads
+        workers = 1 if ocr_engine == "PaddleOCR" else max(1, (os.cpu_count() or 1) // 2)
+
+        output_dir = settings['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        base_filename = os.path.splitext(os.path.basename(file_path))[0]
+        output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
+        output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
+        green_thresh, yellow_thresh = settings['green'], settings['yellow']
+        total = page_count(file_path)
+
+        # Keep only the first page with text for the on-screen preview
+        first_page = {}
+        def on_page(page_number, page, data, rows):
+            if not first_page and data:
+                first_page.update(page=page, data=data, rows=rows)
+            # Also where a superseded document stops, between two pages
+            job.progress(page_number / total, f"Processed page {page_number} of {total}...")
+
+        job.stage('Recognising text', f"Processing {total} pages...")
+        summary = process_document(
+            file_path, engine.process_image, output_xlsx,
+            green_thresh, yellow_thresh, workers=workers, on_page=on_page
+        )
 
-            self.status_label.config(text=f"Excel file saved: {output_xlsx}")
-            self.display_results(output_image_path, output_xlsx)
-        except Exception as e:
-            self.status_label.config(text=f"Error: {str(e)}\nPlease try a different image or OCR engine.")
+        if not first_page:
+            raise ValueError("No text extracted from any page.")
+        job.stage('Drawing boxes')
+        annotated_image = engine.draw_bounding_boxes(first_page['page'], first_page['data'], output_image_path)
+        job.stage('Rendering preview')
+        preview = None
+        if settings.get('preview', True):
+            preview = render_table_preview(first_page['rows'], green_thresh, yellow_thresh)
+        return {'message': f"Excel file saved: {output_xlsx} ({summary['pages']} pages, {summary['failed']} failed)",
+                'annotated': annotated_image, 'rows': first_page['rows'], 'preview': preview,
+                'green': green_thresh, 'yellow': yellow_thresh, 'xlsx': output_xlsx, 'image_path': output_image_path}
+
+    def display_results(self, image, rows, green_thresh, yellow_thresh, preview=None):
+        from OCR_Modules.preview import render_table_preview
 
-    def display_results(self, image_path, excel_path):
         self.reorganize_layout()
 
         # Clear previous images
@@ -626,16 +869,15 @@ class OCRApp:
             widget.destroy()
 
         # Display image with bounding boxes
-        self.display_image(image_path, self.left_frame)
+        self.display_image(image, self.left_frame)
 
-        # Display Excel image
-        excel_image_path = os.path.splitext(excel_path)[0] + "_excel_image.png"
-        self.generate_excel_image(excel_path, excel_image_path)
+        # Display the Excel preview, drawn from the OCR grid already in memory (or by the job)
+        excel_image = preview if preview is not None else render_table_preview(rows, green_thresh, yellow_thresh)
 
         # Add padding to the middle frame
         padding_frame = ttk.Frame(self.middle_frame, padding=20)
         padding_frame.pack(fill=tk.BOTH, expand=True)
-        self.display_image(excel_image_path, padding_frame)
+        self.display_image(excel_image, padding_frame)
 
         # Setup the sidebar
         self.setup_sidebar()
@@ -667,8 +909,11 @@ class OCRApp:
         ocr_dropdown = ttk.Combobox(top_inner_frame, textvariable=self.ocr_engine, state="readonly", width=20)
         ocr_dropdown['values'] = ('PaddleOCR', 'Tesseract')
         ocr_dropdown.pack(side=tk.LEFT, padx=(0, 10))
+        ocr_dropdown.bind('<<ComboboxSelected>>', self.warm_up_engine)
         upload_button = ttk.Button(top_inner_frame, text="Upload Image", command=self.select_image)
         upload_button.pack(side=tk.LEFT, padx=(0, 10))
+        upload_folder_button = ttk.Button(top_inner_frame, text="Upload Folder", command=self.select_folder)
+        upload_folder_button.pack(side=tk.LEFT, padx=(0, 10))
 
         # Add Screenshot Button with Icon
         screenshot_icon = Image.open(os.path.join('icons', 'screenshoticon.png'))
@@ -697,90 +942,11 @@ class OCRApp:
         self.right_frame.pack(side=tk.RIGHT, fill=tk.Y)
 
     def display_image(self, image_path, panel):
-        image = Image.open(image_path)
-
-        # Create a canvas to display the image
-        canvas = tk.Canvas(panel, bg='white')
-        canvas.pack(fill=tk.BOTH, expand=True)
-
-        # Function to resize the image when the panel size changes
-        def resize_image(event):
-            # Get the size of the canvas
-            canvas_width = event.width
-            canvas_height = event.height
-
-            # Calculate the scaling factor
-            width_ratio = canvas_width / image.width
-            height_ratio = canvas_height / image.height
-            scale_factor = min(width_ratio, height_ratio, 1.0)  # Do not upscale images
-
-            new_width = int(image.width * scale_factor)
-            new_height = int(image.height * scale_factor)
-
-            resized_image = image.resize((new_width, new_height), Image.LANCZOS)
-            photo = ImageTk.PhotoImage(resized_image)
-
-            canvas.delete("all")
-            canvas.create_image(canvas_width/2, canvas_height/2, image=photo, anchor='center')
-            canvas.image = photo  # Keep a reference
+        # Accepts a file path or an already rendered PIL image
+        image = image_path if isinstance(image_path, Image.Image) else Image.open(image_path)
 
-        # Bind the resize event to the function
-        canvas.bind("<Configure>", resize_image)
-
-    def generate_excel_image(self, excel_path, output_image_path):
-        from openpyxl import load_workbook
-        from PIL import Image, ImageDraw, ImageFont
-
-        wb = load_workbook(excel_path)
-        ws = wb.active
-
-        # Increase cell size and font size
-        cell_width = 90
-        cell_height = 30
-        font_size = 20
-        border_size = 40  # Increased border size
-
-        max_col = ws.max_column
-        max_row = ws.max_row
-        image_width = cell_width * max_col + 2 * border_size
-        image_height = cell_height * max_row + 2 * border_size
-
-        image = Image.new('RGB', (image_width, image_height), 'white')
-        draw = ImageDraw.Draw(image)
-        try:
-            font = ImageFont.truetype("arial.ttf", font_size)
-        except:
-            font = ImageFont.load_default()
-
-        for row in ws.iter_rows():
-            for cell in row:
-                col_idx = cell.column - 1
-                row_idx = cell.row - 1
-                x1 = col_idx * cell_width + border_size
-                y1 = row_idx * cell_height + border_size
-                x2 = x1 + cell_width
-                y2 = y1 + cell_height
-
-                # Draw cell background
-                fill_color = 'FFFFFF'  # Default fill
-                if cell.fill and cell.fill.fgColor:
-                    if cell.fill.fgColor.type == 'rgb':
-                        fill_color = cell.fill.fgColor.rgb[-6:]
-                    elif cell.fill.fgColor.type == 'indexed':
-                        fill_color = 'FFFFFF'  # Handle indexed colors as white
-
-                draw.rectangle([x1, y1, x2, y2], fill=f'#{fill_color}', outline='black')
-
-                # Draw cell text
-                text = str(cell.value) if cell.value is not None else ''
-                bbox = font.getbbox(text)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-                text_x = x1 + (cell_width - text_width) / 2
-                text_y = y1 + (cell_height - text_height) / 2
-                draw.text((text_x, text_y), text, fill='black', font=font)
-
-        image.save(output_image_path)
+        # Pyramid-backed canvas: debounced resizing, cached redraws, wheel zoom and drag to pan
+        return ImageViewer(panel, image, bg='white')
 
     def setup_sidebar(self):
         # Sidebar content
@@ -852,9 +1018,9 @@ class OCRApp:
 
         # Enhanced Disclaimer Text
         disclaimer_text = (
-            "Note: When the input image contains a table with missing data in some rows or columns, "
-            "the extracted data may not align perfectly in the output Excel file. "
-            "Empty cells might cause subsequent data to shift positions, resulting in misaligned columns. "
+            "Note: Columns are detected from the gaps between text, so empty cells are kept empty. "
+            "Tables with merged cells or very little spacing between columns "
+            "may still not align perfectly in the output Excel file. "
             "Please review the Excel output carefully and adjust as needed."
         )
         disclaimer_message = ttk.Label(disclaimer_frame, text=disclaimer_text, wraplength=250, justify='left')
@@ -0,0 +1,60 @@
+"""Per-image vs batched PaddleOCR recognition throughput.
+
+    python -m benchmarks.bench_batched_rec path/to/corpus --rec-batch-sizes 6 32 64 128
+
+The per-image row runs process_image on each file. The batched rows run
+process_images over the whole corpus, grouped --pages-per-call at a time.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OCR_Modules.batch import collect_inputs
+from OCR_Modules.paddleOCR import initialize_ocr_SLANet_LCNetV2, process_image, process_images
+
+def report(label, n_images, n_crops, elapsed):
+    print(f"{label:<22} {elapsed:>8.2f} {n_images / elapsed:>8.2f} {n_crops / elapsed:>9.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='+', help="Image files, directories or glob patterns")
+    parser.add_argument('--rec-batch-sizes', type=int, nargs='+', default=[6, 32, 64, 128])
+    parser.add_argument('--pages-per-call', type=int, default=16)
+    parser.add_argument('--model-dir')
+    args = parser.parse_args(argv)
+
+    files = collect_inputs(args.corpus, recursive=True)
+    if not files:
+        print("No images found in the corpus.")
+        return 2
+
+    ocr = initialize_ocr_SLANet_LCNetV2(model_dir=args.model_dir)
+    # Warm up the predictors so the first measurement isn't penalised
+    process_image(files[0], ocr)
+
+    print(f"{len(files)} images")
+    print(f"{'mode':<22} {'time s':>8} {'img/s':>8} {'crops/s':>9}")
+
+    start = time.perf_counter()
+    n_crops = 0
+    for file_path in files:
+        try:
+            n_crops += len(process_image(file_path, ocr))
+        except Exception:
+            pass
+    report('per-image', len(files), n_crops, time.perf_counter() - start)
+
+    for rec_batch_size in args.rec_batch_sizes:
+        start = time.perf_counter()
+        n_crops = 0
+        for i in range(0, len(files), args.pages_per_call):
+            pages = process_images(files[i:i + args.pages_per_call], ocr, rec_batch_size=rec_batch_size)
+            n_crops += sum(len(page) for page in pages)
+        report(f'batched (rec={rec_batch_size})', len(files), n_crops, time.perf_counter() - start)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
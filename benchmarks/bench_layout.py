@@ -0,0 +1,90 @@
+"""group_into_rows vs table_layout.group_into_grid on synthetic pages.
+
+    python -m benchmarks.bench_layout --words 1000 10000 --empty 0.1
+
+Pages are a regular grid of word boxes with jittered positions and heights
+and a fraction of deliberately empty cells. Accuracy is the share of words
+that end up in their true row and column.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OCR_Modules.paddleOCR import group_into_rows
+from OCR_Modules.table_layout import group_into_grid
+
+def synthetic_page(n_words, n_cols=10, empty=0.1, jitter=2.0, seed=0):
+    rng = np.random.default_rng(seed)
+    n_rows = int(np.ceil(n_words / ((1 - empty) * n_cols)))
+    data = []
+    truth = {}
+    for r in range(n_rows):
+        for c in range(n_cols):
+            if rng.random() < empty or len(data) >= n_words:
+                continue
+            h = rng.uniform(10, 16)
+            w = rng.uniform(30, 80)
+            x = c * 120 + rng.uniform(0, 20)
+            y = r * 28 + rng.normal(0, jitter)
+            text = f"r{r}c{c}"
+            truth[text] = (r, c)
+            data.append({
+                'x': x + w / 2,
+                'y': y + h / 2,
+                'text': text,
+                'confidence': float(rng.uniform(0.8, 1.0)),
+                'bbox': [[x, y], [x + w, y], [x + w, y + h], [x, y + h]],
+            })
+    return data, truth
+
+def cell_accuracy(rows, truth):
+    """Share of words whose detected row holds their true row and whose column is right.
+
+    Each detected row is matched to the true row most of its words come from,
+    so a single spurious split doesn't count every later row as wrong.
+    """
+    placed = {}
+    for r, row in enumerate(rows):
+        for c, cell in enumerate(row):
+            if cell is not None:
+                for text in cell[0].split(' '):
+                    placed[text] = (r, c)
+    votes = {}
+    for text, (r, _) in placed.items():
+        true_row = truth[text][0]
+        votes.setdefault(r, {}).setdefault(true_row, 0)
+        votes[r][true_row] += 1
+    row_match = {r: max(counts, key=counts.get) for r, counts in votes.items()}
+    hits = sum(1 for text, (r, c) in placed.items() if truth[text] == (row_match[r], c))
+    return hits / len(truth) if truth else 1.0
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--cols', type=int, default=10)
+    parser.add_argument('--empty', type=float, default=0.1, help="Fraction of empty cells")
+    args = parser.parse_args(argv)
+
+    print(f"{'words':>7} {'function':<16} {'time ms':>9} {'accuracy':>9}")
+    for n_words in args.words:
+        data, truth = synthetic_page(n_words, args.cols, args.empty)
+        for name, fn in (('group_into_rows', group_into_rows), ('group_into_grid', group_into_grid)):
+            elapsed, rows = timed(fn, data)
+            print(f"{len(data):>7} {name:<16} {elapsed * 1000:>9.1f} {cell_accuracy(rows, truth):>9.1%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
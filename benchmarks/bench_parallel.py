@@ -0,0 +1,62 @@
+"""Scaling benchmark for ParallelOCRExecutor.
+
+    python -m benchmarks.bench_parallel path/to/corpus --workers 1 2 4 8
+
+Model loading happens in warm_up() and is reported separately, so the
+throughput numbers only cover OCR on the fixed corpus.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OCR_Modules.batch import collect_inputs
+from OCR_Modules.parallel import ParallelOCRExecutor
+
+def run(files, workers, threads_per_worker=None, model_dir=None):
+    with ParallelOCRExecutor(workers=workers, threads_per_worker=threads_per_worker,
+                             model_dir=model_dir) as executor:
+        load_time = executor.warm_up()
+        start = time.perf_counter()
+        failed = sum(1 for _, _, error in executor.map(files) if error is not None)
+        elapsed = time.perf_counter() - start
+    return {
+        'workers': executor.workers,
+        'threads': executor.threads_per_worker,
+        'load_time': load_time,
+        'elapsed': elapsed,
+        'images_per_sec': len(files) / elapsed if elapsed else 0.0,
+        'failed': failed,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('corpus', nargs='+', help="Image files, directories or glob patterns")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--threads', type=int, help="Threads per worker (default: cores / workers)")
+    parser.add_argument('--model-dir')
+    args = parser.parse_args(argv)
+
+    files = collect_inputs(args.corpus, recursive=True)
+    if not files:
+        print("No images found in the corpus.")
+        return 2
+
+    print(f"{len(files)} images, {os.cpu_count()} cores")
+    print(f"{'workers':>7} {'threads':>7} {'load s':>8} {'run s':>8} {'img/s':>8} {'speedup':>8} {'eff':>6}")
+    baseline = None
+    for workers in args.workers:
+        result = run(files, workers, args.threads, args.model_dir)
+        baseline = baseline or result['images_per_sec']
+        speedup = result['images_per_sec'] / baseline if baseline else 0.0
+        print(f"{result['workers']:>7} {result['threads']:>7} {result['load_time']:>8.2f} "
+              f"{result['elapsed']:>8.2f} {result['images_per_sec']:>8.2f} {speedup:>8.2f} "
+              f"{speedup / result['workers']:>6.0%}")
+        if result['failed']:
+            print(f"        ({result['failed']} images failed)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Excel preview: save/reload/PNG round trip vs rendering from the in-memory grid.
+
+    python -m benchmarks.bench_preview --cells 1000 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from openpyxl import load_workbook
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_xlsx import synthetic_rows
+from OCR_Modules.preview import _font, render_table_preview
+from OCR_Modules.xlsx_writer import write_xlsx
+
+def legacy_preview(excel_path, output_image_path):
+    # The GUI's old generate_excel_image followed by display_image's Image.open
+    wb = load_workbook(excel_path)
+    ws = wb.active
+    cell_width, cell_height, border_size = 90, 30, 40
+    image = Image.new('RGB', (cell_width * ws.max_column + 2 * border_size,
+                              cell_height * ws.max_row + 2 * border_size), 'white')
+    draw = ImageDraw.Draw(image)
+    font = _font(20)
+    for row in ws.iter_rows():
+        for cell in row:
+            x1 = (cell.column - 1) * cell_width + border_size
+            y1 = (cell.row - 1) * cell_height + border_size
+            fill_color = 'FFFFFF'
+            if cell.fill and cell.fill.fgColor and cell.fill.fgColor.type == 'rgb':
+                fill_color = cell.fill.fgColor.rgb[-6:]
+            draw.rectangle([x1, y1, x1 + cell_width, y1 + cell_height], fill=f'#{fill_color}', outline='black')
+            text = str(cell.value) if cell.value is not None else ''
+            bbox = font.getbbox(text)
+            draw.text((x1 + (cell_width - (bbox[2] - bbox[0])) / 2,
+                       y1 + (cell_height - (bbox[3] - bbox[1])) / 2), text, fill='black', font=font)
+    image.save(output_image_path)
+    return Image.open(output_image_path).convert('RGB')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cells', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args(argv)
+
+    print(f"{'cells':>8} {'legacy ms':>10} {'memory ms':>10} {'viewport ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_cells in args.cells:
+            rows = synthetic_rows(n_cells)
+            excel_path = os.path.join(tmp, f"{n_cells}.xlsx")
+            # The xlsx is written in both cases, so it is not part of the timing
+            write_xlsx(rows, excel_path)
+
+            start = time.perf_counter()
+            legacy_preview(excel_path, os.path.join(tmp, f"{n_cells}.png"))
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            render_table_preview(rows, viewport=None)
+            memory = time.perf_counter() - start
+
+            start = time.perf_counter()
+            render_table_preview(rows, viewport=(0, 0, 60, 20))
+            viewport = time.perf_counter() - start
+            print(f"{n_cells:>8} {legacy * 1000:>10.1f} {memory * 1000:>10.1f} {viewport * 1000:>12.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
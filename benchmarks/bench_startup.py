@@ -0,0 +1,60 @@
+"""Import cost of the GUI entry points, measured with python -X importtime.
+
+    python -m benchmarks.bench_startup                    # import main
+    python -m benchmarks.bench_startup --module app --repeat 5
+    python -m benchmarks.bench_startup --statement "import OCR_Modules.batch"
+
+Each run is a fresh interpreter, so nothing is cached between runs
+(apart from the OS file cache, which the first run warms).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(statement):
+    """(total ms, {top-level module: cumulative ms}) for one fresh interpreter."""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                               cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented below the module that triggered them
+        if not name.startswith('  ', 1):
+            modules[name.strip()] = int(cumulative) / 1000
+    return sum(modules.values()), modules
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='main', help="Module to import (default: main)")
+    parser.add_argument('--statement', help="Python statement to time instead of importing --module")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10, help="Slowest top-level imports to list")
+    args = parser.parse_args(argv)
+
+    statement = args.statement or f"import {args.module}"
+    label = statement.strip().splitlines()[0] + (' ...' if '\n' in statement.strip() else '')
+    totals = []
+    slowest = {}
+    for _ in range(args.repeat):
+        total, modules = import_times(statement)
+        totals.append(total)
+        for name, elapsed in modules.items():
+            slowest.setdefault(name, []).append(elapsed)
+
+    print(f"{label}: median {statistics.median(totals):.0f} ms "
+          f"(min {min(totals):.0f}, max {max(totals):.0f}) over {args.repeat} runs")
+    ranked = sorted(slowest.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, elapsed in ranked[:args.top]:
+        print(f"  {statistics.median(elapsed):>8.1f} ms  {name}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Per-image Tesseract latency: pytesseract subprocess vs the in-process tesserocr API.
+
+    python -m benchmarks.bench_tesseract --repeat 10 --size 800 300
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OCR_Modules.tesserocr_backend import load_tesserocr
+
+def synthetic_screenshot(width, height):
+    # A small table-like screenshot: a few rows of short words and numbers
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype("arial.ttf", 20)
+    except:
+        font = ImageFont.load_default()
+    for row, y in enumerate(range(10, height - 30, 32)):
+        for col, x in enumerate(range(10, width - 120, 150)):
+            draw.text((x, y), f"Item {row}.{col} {row * 37 + col}", fill='black', font=font)
+    return np.asarray(image)
+
+def time_backend(engine, image, repeat):
+    engine.image_to_data(image, output_type='dict')  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = engine.image_to_data(image, output_type='dict')
+        timings.append(time.perf_counter() - start)
+    words = sum(1 for text in data['text'] if str(text).strip())
+    return statistics.median(timings), words
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--size', type=int, nargs=2, default=[800, 300], metavar=('WIDTH', 'HEIGHT'))
+    args = parser.parse_args(argv)
+
+    image = synthetic_screenshot(*args.size)
+    backends = []
+    try:
+        import pytesseract
+        backends.append(('subprocess', pytesseract))
+    except ImportError:
+        print("pytesseract not installed, skipping the subprocess backend")
+    engine = load_tesserocr()
+    if engine is not None:
+        backends.append(('tesserocr', engine))
+    else:
+        print("tesserocr not available, skipping the in-process backend")
+
+    print(f"{'backend':<12} {'median ms':>10} {'words':>6}")
+    for name, backend in backends:
+        median, words = time_backend(backend, image, args.repeat)
+        print(f"{name:<12} {median * 1000:>10.1f} {words:>6}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
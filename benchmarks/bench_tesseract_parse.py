@@ -0,0 +1,81 @@
+"""Parsing image_to_data output: the per-box loop vs WordBoxes.from_tesseract.
+
+    python -m benchmarks.bench_tesseract_parse --words 5000 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OCR_Modules.word_boxes import WordBoxes
+
+def legacy_parse(data):
+    # The loop tesseractOCR.process_image used before from_tesseract
+    n_boxes = len(data['level'])
+    extracted_data = []
+    for i in range(n_boxes):
+        try:
+            x = data['left'][i] + data['width'][i] / 2
+            y = data['top'][i] + data['height'][i] / 2
+            text = data['text'][i]
+            confidence = float(data['conf'][i]) / 100.0 if data['conf'][i] != '-1' else 0.0
+            bbox = [
+                (data['left'][i], data['top'][i]),
+                (data['left'][i] + data['width'][i], data['top'][i]),
+                (data['left'][i] + data['width'][i], data['top'][i] + data['height'][i]),
+                (data['left'][i], data['top'][i] + data['height'][i]),
+            ]
+            if text.strip():
+                extracted_data.append({'x': x, 'y': y, 'text': text.strip(), 'confidence': confidence, 'bbox': bbox})
+        except Exception:
+            pass
+    return WordBoxes.from_records(extracted_data)
+
+def synthetic_tesseract_data(n_words, words_per_line=12, seed=0):
+    """image_to_data DICT output for a dense page: level 1-4 rows with conf -1 between the words."""
+    rng = random.Random(seed)
+    data = {key: [] for key in ('level', 'left', 'top', 'width', 'height', 'conf', 'text')}
+
+    def add(level, left, top, width, height, conf, text):
+        for key, value in zip(data, (level, left, top, width, height, conf, text)):
+            data[key].append(value)
+
+    add(1, 0, 0, 2480, 3508, -1, '')
+    for word in range(n_words):
+        line, col = divmod(word, words_per_line)
+        if col == 0:
+            if line % 10 == 0:
+                add(2, 0, line * 30, 2480, 300, -1, '')
+                add(3, 0, line * 30, 2480, 300, -1, '')
+            add(4, 0, line * 30, 2480, 24, -1, '')
+        # Occasional whitespace-only words, as tesseract emits for some noise
+        text = ' ' if rng.random() < 0.02 else f"w{word}"
+        add(5, col * 200 + rng.randint(0, 5), line * 30, rng.randint(30, 150), 24, rng.uniform(30, 96), text)
+    return data
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, nargs='+', default=[5000, 20000])
+    args = parser.parse_args(argv)
+
+    print(f"{'words':>7} {'rows':>7} {'loop ms':>9} {'vector ms':>10} {'same':>5}")
+    for n_words in args.words:
+        data = synthetic_tesseract_data(n_words)
+        start = time.perf_counter()
+        old = legacy_parse(data)
+        loop = time.perf_counter() - start
+        start = time.perf_counter()
+        new = WordBoxes.from_tesseract(data)
+        vector = time.perf_counter() - start
+        same = (old.texts == new.texts and np.array_equal(old.boxes, new.boxes)
+                and np.allclose(old.confidence, new.confidence) and np.array_equal(old.centres, new.centres))
+        print(f"{n_words:>7} {len(data['level']):>7} {loop * 1000:>9.1f} {vector * 1000:>10.1f} {str(same):>5}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Memory and layout cost of the per-word dict list vs WordBoxes.
+
+    python -m benchmarks.bench_word_boxes --words 10000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_layout import synthetic_page
+from OCR_Modules.table_layout import group_into_grid
+from OCR_Modules.word_boxes import WordBoxes
+
+def allocated(build):
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--words', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    template, _ = synthetic_page(args.words)
+    n = len(template)
+    # Rebuild inside the trace so only the structure under test is counted
+    records, records_bytes = allocated(lambda: [
+        {'x': w['x'], 'y': w['y'], 'text': ''.join(w['text']), 'confidence': w['confidence'],
+         'bbox': [list(p) for p in w['bbox']]}
+        for w in template
+    ])
+    words, words_bytes = allocated(lambda: WordBoxes.from_records(template))
+
+    print(f"{n} words")
+    print(f"{'structure':<12} {'bytes/word':>11} {'layout ms':>10}")
+    for name, data, size in (('dict list', records, records_bytes), ('WordBoxes', words, words_bytes)):
+        start = time.perf_counter()
+        group_into_grid(data)
+        print(f"{name:<12} {size / n:>11.0f} {(time.perf_counter() - start) * 1000:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Legacy in-memory save_as_xlsx vs the streaming xlsx writer.
+
+    python -m benchmarks.bench_xlsx --cells 100 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OCR_Modules.xlsx_writer import write_xlsx
+
+def legacy_save_as_xlsx(rows, output_xlsx, green_threshold=0.97, yellow_threshold=0.92):
+    # The save_as_xlsx implementation before the streaming writer, kept as the baseline
+    wb = openpyxl.Workbook()
+    ws = wb.active
+
+    for row_index, row in enumerate(rows, start=1):
+        for col_index, cell in enumerate(row, start=1):
+            if cell is None:
+                continue
+            text, confidence = cell
+            ws.cell(row=row_index, column=col_index, value=text)
+
+            if confidence >= green_threshold:
+                fill_color = '00FF00'
+            elif confidence >= yellow_threshold:
+                fill_color = 'FFFF00'
+            else:
+                fill_color = 'FF0000'
+
+            fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type='solid')
+            ws.cell(row=row_index, column=col_index).fill = fill
+
+    for column in ws.columns:
+        max_length = 0
+        column_letter = get_column_letter(column[0].column)
+        for cell in column:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(cell.value)
+            except:
+                pass
+        ws.column_dimensions[column_letter].width = max_length + 2
+
+    wb.save(output_xlsx)
+
+def synthetic_rows(n_cells, n_cols=10, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for start in range(0, n_cells, n_cols):
+        rows.append([
+            (f"value {rng.randint(0, 10 ** rng.randint(1, 8))}", rng.uniform(0.85, 1.0))
+            for _ in range(min(n_cols, n_cells - start))
+        ])
+    return rows
+
+def measure(fn, rows, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(rows, path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cells', type=int, nargs='+', default=[100, 10000, 100000])
+    args = parser.parse_args(argv)
+
+    print(f"{'cells':>8} {'writer':<10} {'time s':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_cells in args.cells:
+            rows = synthetic_rows(n_cells)
+            for name, fn in (('legacy', legacy_save_as_xlsx), ('streaming', write_xlsx)):
+                elapsed, peak = measure(fn, rows, os.path.join(tmp, f"{name}_{n_cells}.xlsx"))
+                print(f"{n_cells:>8} {name:<10} {elapsed:>8.3f} {peak / 2 ** 20:>8.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
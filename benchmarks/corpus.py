@@ -0,0 +1,157 @@
+"""Synthetic table images with known ground truth.
+
+    python -m benchmarks.corpus out/ --sizes 10x5 40x8 --noise 0 12
+
+Every image is a table with a header row, a filled first column and
+typed columns (codes, integers, prices, dates, words). A share of the
+other cells is left empty according to `density`. The true grid is
+known, and so are the exact word boxes, which feed the post-processing
+stages without an OCR engine.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from OCR_Modules.word_boxes import WordBoxes
+
+HEADERS = ['Code', 'Qty', 'Price', 'Date', 'Item', 'Total', 'Ref', 'Status']
+WORDS = ['alpha', 'bravo', 'cargo', 'delta', 'export', 'freight', 'garnet', 'harbour', 'invoice',
+         'jetty', 'kernel', 'ledger', 'marine', 'nickel', 'orbit', 'pallet', 'quota', 'rebate']
+
+_fonts = {}
+
+def load_font(name, size):
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        try:
+            font = ImageFont.truetype(name, size)
+        except OSError:
+            font = ImageFont.load_default(size)
+        _fonts[key] = font
+    return font
+
+def cell_text(rng, column):
+    kind = column % 6
+    if kind == 0:
+        return f"{rng.choice('ABCDEFGHKLMNPRSTUVWXYZ')}{rng.choice('ABCDEFGHKLMNPRSTUVWXYZ')}{rng.randint(1000, 9999)}"
+    if kind == 1:
+        return str(rng.randint(1, 999))
+    if kind == 2:
+        return f"{rng.uniform(1, 9999):.2f}"
+    if kind == 3:
+        return f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if kind == 4:
+        return rng.choice(WORDS)
+    return str(rng.randint(10000, 999999))
+
+def make_table(rows=10, cols=5, font='arial.ttf', font_size=20, density=1.0, noise=0.0, seed=0):
+    """One synthetic table: {'name', 'spec', 'image' (PIL RGB), 'truth' (text grid), 'words'}.
+
+    truth holds '' for the cells left empty. noise is the standard deviation
+    of the Gaussian pixel noise added to the rendered page.
+    """
+    rng = random.Random(seed)
+    truth = [[HEADERS[c % len(HEADERS)] + (str(c // len(HEADERS)) if c >= len(HEADERS) else '')
+              for c in range(cols)]]
+    for r in range(1, rows):
+        # The first column is always filled so no row or column of the table disappears
+        truth.append([cell_text(rng, c) if c == 0 or rng.random() < density else '' for c in range(cols)])
+
+    face = load_font(font, font_size)
+    measure = ImageDraw.Draw(Image.new('L', (1, 1)))
+    pad = font_size
+    widths = [max(measure.textlength(truth[r][c], font=face) for r in range(rows)) + 2 * pad for c in range(cols)]
+    row_height = int(font_size * 1.8)
+    lefts = np.concatenate(([pad], pad + np.cumsum(widths)[:-1])).astype(int)
+    width = int(pad * 2 + sum(widths))
+    height = pad * 2 + rows * row_height
+
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    boxes, texts = [], []
+    for r, row in enumerate(truth):
+        for c, text in enumerate(row):
+            if not text:
+                continue
+            position = (int(lefts[c]) + pad // 2, pad + r * row_height)
+            draw.text(position, text, fill=0, font=face)
+            x0, y0, x1, y1 = draw.textbbox(position, text, font=face)
+            boxes.append([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+            texts.append(text)
+
+    if noise:
+        pixels = np.asarray(image, dtype=np.float32)
+        pixels += np.random.default_rng(seed).normal(0, noise, pixels.shape)
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    spec = {'rows': rows, 'cols': cols, 'font': font, 'font_size': font_size,
+            'density': density, 'noise': noise, 'seed': seed}
+    name = f"table_{rows}x{cols}_{os.path.splitext(os.path.basename(font))[0]}{font_size}_d{density:g}_n{noise:g}"
+    return {
+        'name': name,
+        'spec': spec,
+        'image': image.convert('RGB'),
+        'truth': truth,
+        'words': WordBoxes(boxes, np.ones(len(texts), dtype=np.float32), texts),
+    }
+
+def parse_size(text):
+    rows, cols = text.lower().split('x')
+    return int(rows), int(cols)
+
+def generate_corpus(sizes=((10, 5), (40, 8)), fonts=('arial.ttf',), font_sizes=(16, 24),
+                    densities=(1.0, 0.7), noises=(0.0, 12.0), seed=0):
+    """Yield one table per combination of the parameters, each with its own fixed seed."""
+    combinations = itertools.product(sizes, fonts, font_sizes, densities, noises)
+    for index, ((rows, cols), font, font_size, density, noise) in enumerate(combinations):
+        yield make_table(rows, cols, font, font_size, density, noise, seed=seed + index)
+
+def save_table(table, directory):
+    """Write <name>.png and <name>.json (spec, truth grid and word boxes)."""
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, table['name'])
+    table['image'].save(base + '.png')
+    words = table['words']
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'spec': table['spec'], 'truth': table['truth'],
+                   'boxes': words.boxes.tolist(), 'texts': words.texts}, f)
+    return base + '.png'
+
+def build_parser():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[(10, 5), (40, 8)],
+                        help="Table sizes as ROWSxCOLS (default: 10x5 40x8)")
+    parser.add_argument('--fonts', nargs='+', default=['arial.ttf'],
+                        help="TrueType fonts; Pillow's default font is used when one is missing")
+    parser.add_argument('--font-sizes', type=int, nargs='+', default=[16, 24])
+    parser.add_argument('--density', type=float, nargs='+', default=[1.0, 0.7],
+                        help="Share of filled body cells (default: 1.0 0.7)")
+    parser.add_argument('--noise', type=float, nargs='+', default=[0.0, 12.0],
+                        help="Gaussian pixel noise standard deviation (default: 0 12)")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser
+
+def corpus_from_args(args):
+    return generate_corpus(args.sizes, args.fonts, args.font_sizes, args.density, args.noise, args.seed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     parents=[build_parser()])
+    parser.add_argument('directory')
+    args = parser.parse_args(argv)
+
+    for table in corpus_from_args(args):
+        print(save_table(table, args.directory))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
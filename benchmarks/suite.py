@@ -0,0 +1,273 @@
+"""Benchmark suite over a synthetic table corpus, with baseline comparison.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --tolerance 0.15
+
+The post-processing stages (grouping, xlsx, bounding boxes, preview) run on
+the true word boxes, so they are measured even without an OCR engine.
+Engines that cannot be loaded are skipped. The OCR engines are also scored
+on cell accuracy: the share of filled table cells whose text lands in the
+right row and column. Runs over the baseline by more than the tolerance
+are reported as regressions and make the exit status 1.
+
+    python -m benchmarks.suite --engines paddle --backends paddle onnx onnx-int8
+
+runs PaddleOCR once per inference backend and prints the speed and
+accuracy of each against the Paddle predictor.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_parser as corpus_parser, corpus_from_args
+from OCR_Modules.image_io import load_image
+from OCR_Modules.preview import render_table_preview
+from OCR_Modules.table_layout import group_into_grid
+from OCR_Modules.xlsx_writer import write_xlsx
+
+# Metrics where a larger value is worse; throughput and accuracy are the other way round
+LOWER_IS_BETTER = ('p50_ms', 'p90_ms', 'p99_ms', 'alloc_peak_mb', 'rss_peak_mb')
+HIGHER_IS_BETTER = ('images_per_s', 'words_per_s')
+BACKENDS = ('paddle', 'onnx', 'onnx-int8')
+
+def engine_module():
+    """An OCR module for group_into_rows/draw_bounding_boxes, whichever engine imports."""
+    for name in ('tesseractOCR', 'paddleOCR'):
+        try:
+            return __import__(f"OCR_Modules.{name}", fromlist=[name])
+        except ImportError:
+            continue
+    return None
+
+def stages(work_dir):
+    """name -> function(table, grid) for each post-processing stage."""
+    table_stages = {
+        'group_into_grid': lambda table, grid: group_into_grid(table['words']),
+        'save_as_xlsx': lambda table, grid: write_xlsx(grid, os.path.join(work_dir, 'bench.xlsx')),
+        'render_table_preview': lambda table, grid: render_table_preview(grid),
+    }
+    module = engine_module()
+    if module is not None:
+        table_stages['group_into_rows'] = lambda table, grid: module.group_into_rows(table['words'])
+        table_stages['draw_bounding_boxes'] = lambda table, grid: module.draw_bounding_boxes(
+            table['image'], table['words'], os.path.join(work_dir, 'bench.jpg'))
+    else:
+        print("No OCR module importable, skipping group_into_rows and draw_bounding_boxes")
+    return table_stages
+
+def normalise(text):
+    return ''.join(text.split()).casefold()
+
+def cell_accuracy(grid, truth):
+    """Share of non-empty truth cells reproduced at the same row and column."""
+    filled = correct = 0
+    for r, row in enumerate(truth):
+        for c, text in enumerate(row):
+            if not text:
+                continue
+            filled += 1
+            if r < len(grid) and c < len(grid[r]) and grid[r][c] is not None:
+                correct += normalise(grid[r][c][0]) == normalise(text)
+    return correct / filled if filled else 1.0
+
+def measure(function, tables, repeat=3, memory=True):
+    """Latency percentiles and throughput over tables x repeat calls, plus one traced pass for memory."""
+    latencies = []
+    process = psutil.Process()
+    rss_peak = process.memory_info().rss
+    start = time.perf_counter()
+    outputs = []
+    for table in tables:
+        for _ in range(repeat):
+            call_start = time.perf_counter()
+            output = function(table)
+            latencies.append(time.perf_counter() - call_start)
+            rss_peak = max(rss_peak, process.memory_info().rss)
+        outputs.append(output)
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    result = {
+        'calls': len(latencies),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p90_ms': float(np.percentile(latencies, 90)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'images_per_s': len(latencies) / elapsed if elapsed else 0.0,
+        'rss_peak_mb': rss_peak / 2 ** 20,
+    }
+    if memory:
+        # A separate pass: tracemalloc slows allocation-heavy code too much to time under it
+        tracemalloc.start()
+        for table in tables:
+            function(table)
+        result['alloc_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result, outputs
+
+def engine_runs(engines, backends=('paddle',)):
+    """(result key, engine, backend) per run; PaddleOCR runs once per inference backend."""
+    for engine in engines:
+        if engine != 'paddle':
+            yield f"engine:{engine}", engine, 'paddle'
+            continue
+        for backend in backends:
+            # The Paddle predictor keeps the key older baselines were recorded under
+            yield "engine:paddle" + ('' if backend == 'paddle' else f"-{backend}"), engine, backend
+
+def run_engines(engines, tables, repeat, backends=('paddle',)):
+    from OCR_Modules.batch import load_engine
+
+    results = {}
+    for key, engine, backend in engine_runs(engines, backends):
+        try:
+            module, pool, _ = load_engine(engine, backend=backend)
+        except Exception as e:
+            print(f"Skipping {key}: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+            continue
+        with pool.engine() as ocr:
+            pages = [load_image(table['image']) for table in tables]
+            module.process_image(pages[0], ocr)  # warm-up, model loading is not measured
+            by_id = {id(table): page for table, page in zip(tables, pages)}
+            # Engines keep Python-side allocations small; RSS is the memory figure that matters
+            result, outputs = measure(lambda table: module.process_image(by_id[id(table)], ocr), tables,
+                                      repeat, memory=False)
+        accuracies = [cell_accuracy(group_into_grid(data), table['truth']) for table, data in zip(tables, outputs)]
+        result['cell_accuracy'] = float(np.mean(accuracies))
+        result['cell_accuracy_min'] = float(np.min(accuracies))
+        result['words_per_s'] = result['images_per_s'] * float(np.mean([len(data) for data in outputs]))
+        results[key] = result
+    return results
+
+def run_suite(tables, engines=('paddle', 'tesseract'), repeat=3, backends=('paddle',)):
+    results = {}
+    grids = {id(table): group_into_grid(table['words']) for table in tables}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, function in stages(work_dir).items():
+            result, _ = measure(lambda table: function(table, grids[id(table)]), tables, repeat)
+            results[f"stage:{name}"] = result
+    results.update(run_engines(engines, tables, repeat, backends))
+    return results
+
+def compare(results, baseline, tolerance=0.15, accuracy_tolerance=0.01):
+    """(key, metric, baseline, current) for every metric that got worse beyond the tolerance."""
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        for metric in LOWER_IS_BETTER:
+            if metric in base and metric in current and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append((key, metric, base[metric], current[metric]))
+        for metric in HIGHER_IS_BETTER:
+            if metric in base and metric in current and current[metric] < base[metric] * (1 - tolerance):
+                regressions.append((key, metric, base[metric], current[metric]))
+        for metric in ('cell_accuracy', 'cell_accuracy_min'):
+            if metric in base and metric in current and current[metric] < base[metric] - accuracy_tolerance:
+                regressions.append((key, metric, base[metric], current[metric]))
+    return regressions
+
+def format_backends(results):
+    """Speed and accuracy of each PaddleOCR backend relative to the Paddle predictor."""
+    reference = results.get('engine:paddle')
+    runs = [(key, result) for key, result in results.items() if key.startswith('engine:paddle')]
+    if reference is None or len(runs) < 2:
+        return None
+    lines = [f"{'backend':<28} {'words/s':>9} {'speed-up':>9} {'p50 ms':>9} {'accuracy':>9} {'change':>8}"]
+    for key, result in runs:
+        # No words from the reference (broken model, blank corpus) leaves nothing to compare against
+        if reference['words_per_s']:
+            speedup = f"{result['words_per_s'] / reference['words_per_s']:.2f}x"
+        else:
+            speedup = 'n/a'
+        lines.append(f"{key:<28} {result['words_per_s']:>9.1f} {speedup:>9} "
+                     f"{result['p50_ms']:>9.1f} {result['cell_accuracy']:>9.1%} "
+                     f"{(result['cell_accuracy'] - reference['cell_accuracy']) * 100:>+7.1f}%")
+    return '\n'.join(lines)
+
+def format_results(results):
+    lines = [f"{'benchmark':<28} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'img/s':>8} "
+             f"{'alloc MB':>9} {'RSS MB':>8} {'accuracy':>9}"]
+    for key, result in results.items():
+        alloc = f"{result['alloc_peak_mb']:.1f}" if 'alloc_peak_mb' in result else '-'
+        accuracy = f"{result['cell_accuracy']:.1%}" if 'cell_accuracy' in result else '-'
+        lines.append(f"{key:<28} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                     f"{result['images_per_s']:>8.1f} {alloc:>9} {result['rss_peak_mb']:>8.0f} {accuracy:>9}")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     parents=[corpus_parser()])
+    parser.add_argument('--engines', nargs='*', choices=('paddle', 'tesseract'), default=['paddle', 'tesseract'],
+                        help="OCR engines to run; pass no names to benchmark only the stages")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=['paddle'],
+                        help="PaddleOCR inference backends to compare (default: paddle)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed calls per image (default: 3)")
+    parser.add_argument('--save-corpus', metavar='DIR', help="Also write the images and ground truth to DIR")
+    parser.add_argument('--output', help="Write the results as JSON")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Store the results as the new baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="Compare against this baseline")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="Allowed relative slowdown / memory growth before flagging (default: 0.15)")
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.01,
+                        help="Allowed absolute drop in cell accuracy (default: 0.01)")
+    args = parser.parse_args(argv)
+    # Per-call INFO logs would dominate the timings of the fast stages
+    logging.disable(logging.INFO)
+
+    tables = list(corpus_from_args(args))
+    if args.save_corpus:
+        from benchmarks.corpus import save_table
+        for table in tables:
+            save_table(table, args.save_corpus)
+    print(f"{len(tables)} synthetic tables, {args.repeat} timed calls each")
+
+    results = run_suite(tables, args.engines, args.repeat, args.backends)
+    print(format_results(results))
+    comparison = format_backends(results)
+    if comparison:
+        print(comparison)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'corpus': [table['spec'] for table in tables],
+            'repeat': args.repeat,
+            'backends': args.backends,
+        },
+        'results': results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('corpus') != report['meta']['corpus']:
+            print("Warning: the baseline was recorded on a different corpus")
+        regressions = compare(results, baseline['results'], args.tolerance, args.accuracy_tolerance)
+        for key, metric, before, after in regressions:
+            print(f"REGRESSION {key} {metric}: {before:.3f} -> {after:.3f}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,14 @@ from tkinter import filedialog
 from PIL import Image, ImageTk
 import os
 import threading
-from OCR_Modules.paddleOCR import initialize_ocr_SLANet_LCNetV2, process_image as paddle_process_image, group_into_rows as paddle_group_into_rows, save_as_xlsx as paddle_save_as_xlsx, draw_bounding_boxes as paddle_draw_bounding_boxes
-from OCR_Modules.tesseractOCR import initialize_tesseract, process_image as tesseract_process_image, group_into_rows as tesseract_group_into_rows, save_as_xlsx as tesseract_save_as_xlsx, draw_bounding_boxes as tesseract_draw_bounding_boxes
+import importlib
+# Only light modules are imported here so the window opens at once. The OCR engines,
+# cv2, numpy and openpyxl are imported by the background warm-up or on first use.
+from OCR_Modules.engine_pool import get_paddle_pool, get_tesseract_pool, log_pool_stats
+from OCR_Modules.batch_view import BatchTable
+from OCR_Modules.gui_jobs import BatchRunner, JobScheduler
+from OCR_Modules.image_view import ImageViewer
+from OCR_Modules import instrumentation
 import tempfile
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
@@ -21,6 +27,19 @@ from datetime import datetime
 import psutil
 import win32api
 import win32con
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Imported by the engine warm-up thread so the first image doesn't pay for them
+PIPELINE_MODULES = ('OCR_Modules.image_io', 'OCR_Modules.table_layout', 'OCR_Modules.xlsx_writer',
+                    'OCR_Modules.preview', 'OCR_Modules.page_source', 'OCR_Modules.ocr_cache')
+# Progress bar steps of an OCR job; documents skip building the table, which happens page by page
+JOB_STAGES = ('Loading engine', 'Recognising text', 'Building table', 'Writing Excel', 'Drawing boxes',
+              'Rendering preview')
+INPUT_FILETYPES = [("Images and documents", ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tif", "*.tiff", "*.pdf"))]
 
 def get_resource_path(relative_path):
     if getattr(sys, 'frozen', False):
@@ -78,9 +97,21 @@ class OCRApp:
         self.green_threshold = tk.IntVar(value=97)
         self.yellow_threshold = tk.IntVar(value=92)
         self.output_directory = None
+        # Screenshots are OCR'd from memory; keeping the PNG is optional and done in the background
+        self.save_screenshots = tk.BooleanVar(value=True)
+        # Per-stage timings in the status bar, appended to ~/.ocr_tool/trace.jsonl
+        self.record_timings = tk.BooleanVar(value=instrumentation.is_enabled())
         self.is_screenshot = False
+        # Engines whose warm-up has been started; the others are never loaded
+        self.warming_engines = set()
+        # OCR jobs run one at a time off the Tk thread; their progress and results come back via root.after
+        self.jobs = JobScheduler(self.root)
+        # The running (or last) multi-file batch, listed in the batch table
+        self.batch = None
         
         self.setup_ui()
+        # Load the selected engine once the window is up
+        self.root.after(100, self.warm_up_engine)
 
     def setup_ui(self):
         # Main frame
@@ -112,7 +143,10 @@ class OCRApp:
         ocr_label.pack(pady=(10, 5))
         ocr_dropdown = ttk.Combobox(self.center_frame, textvariable=self.ocr_engine, state="readonly", width=30)
         ocr_dropdown['values'] = ('PaddleOCR', 'Tesseract')
-        ocr_dropdown.pack(pady=(0, 20))
+        ocr_dropdown.pack(pady=(0, 5))
+        ocr_dropdown.bind('<<ComboboxSelected>>', self.warm_up_engine)
+        self.engine_status_label = ttk.Label(self.center_frame, text="")
+        self.engine_status_label.pack(pady=(0, 15))
 
         # Confidence Thresholds
         thresholds_frame = ttk.Frame(self.center_frame)
@@ -141,6 +175,15 @@ class OCRApp:
                                         command=self.select_image, width=20)
         self.upload_button.pack(pady=(0, 10))
 
+        # Upload Folder Button
+        upload_folder_icon = Image.open(os.path.join('icons', 'folder.png'))
+        upload_folder_icon = upload_folder_icon.resize((20, 20), Image.LANCZOS)
+        self.upload_folder_icon_photo = ImageTk.PhotoImage(upload_folder_icon)
+        self.upload_folder_button = ttk.Button(self.center_frame, text="Upload Folder",
+                                               image=self.upload_folder_icon_photo, compound=tk.LEFT,
+                                               command=self.select_folder, width=20)
+        self.upload_folder_button.pack(pady=(0, 10))
+
         # Screenshot Button
         screenshot_icon = Image.open("icons/screenshot.png")
         screenshot_icon = screenshot_icon.resize((20, 20), Image.LANCZOS)
@@ -148,14 +191,20 @@ class OCRApp:
         self.screenshot_button = ttk.Button(self.center_frame, text="Screenshot", 
                                             image=self.screenshot_icon_photo, compound=tk.LEFT,
                                             command=self.take_screenshot, width=20)
-        self.screenshot_button.pack(pady=(0, 20))
+        self.screenshot_button.pack(pady=(0, 5))
+        save_screenshot_check = ttk.Checkbutton(self.center_frame, text="Save screenshot as PNG",
+                                                variable=self.save_screenshots)
+        save_screenshot_check.pack(pady=(0, 5))
+        record_timings_check = ttk.Checkbutton(self.center_frame, text="Record timings",
+                                               variable=self.record_timings, command=self.toggle_timings)
+        record_timings_check.pack(pady=(0, 20))
 
         # Status Label
         self.status_label = ttk.Label(self.center_frame, text="")
         self.status_label.pack(pady=(0, 10))
 
         # Progress bar (hidden initially)
-        self.progress_bar = ttk.Progressbar(self.center_frame, mode='indeterminate')
+        self.progress_bar = ttk.Progressbar(self.center_frame, mode='determinate', maximum=100, length=300)
         self.progress_bar.pack(pady=(0, 10))
         self.progress_bar.pack_forget()
 
@@ -165,6 +214,19 @@ class OCRApp:
         self.middle_frame = ttk.Frame(self.main_frame)
         self.right_frame = ttk.Frame(self.main_frame)  # For the sidebar
 
+        # Batch status table along the bottom (hidden until a batch is started)
+        self.batch_frame = ttk.Frame(self.main_frame, padding=(10, 5))
+        batch_header = ttk.Frame(self.batch_frame)
+        batch_header.pack(fill=tk.X, pady=(0, 5))
+        self.batch_label = ttk.Label(batch_header, text="")
+        self.batch_label.pack(side=tk.LEFT)
+        self.batch_close_button = ttk.Button(batch_header, text="Close", command=self.close_batch)
+        self.batch_close_button.pack(side=tk.RIGHT)
+        self.batch_cancel_button = ttk.Button(batch_header, text="Cancel", command=self.cancel_batch)
+        self.batch_cancel_button.pack(side=tk.RIGHT, padx=(0, 5))
+        self.batch_table = BatchTable(self.batch_frame, on_select=self.show_batch_item)
+        self.batch_table.pack(fill=tk.BOTH, expand=True)
+
     def select_output_directory(self):
         directory = filedialog.askdirectory()
         if directory:
@@ -201,13 +263,110 @@ class OCRApp:
         self.progress_bar.pack_forget()
 
     def select_image(self):
-        file_path = filedialog.askopenfilename(
-            filetypes=[("Image files", ("*.png", "*.jpg", "*.jpeg", "*.bmp", "*.tiff"))]
-        )
-        if file_path:
-            self.reset_ui()  # Reset the UI before processing a new image
-            self.is_screenshot = False
-            self.process_image(file_path)
+        file_paths = filedialog.askopenfilenames(filetypes=INPUT_FILETYPES)
+        if not file_paths:
+            return
+        self.reset_ui()  # Reset the UI before processing a new image
+        self.is_screenshot = False
+        if len(file_paths) == 1:
+            self.process_image(file_paths[0])
+        else:
+            self.start_batch(list(file_paths))
+
+    def select_folder(self):
+        from OCR_Modules.batch import collect_inputs
+
+        directory = filedialog.askdirectory()
+        if not directory:
+            return
+        file_paths = collect_inputs([directory])
+        if not file_paths:
+            self.status_label.config(text=f"No images or PDFs found in {directory}")
+            return
+        self.reset_ui()
+        self.is_screenshot = False
+        self.start_batch(file_paths)
+
+    def start_batch(self, file_paths):
+        if self.batch is not None:
+            self.batch.cancel()
+        ocr_engine = self.ocr_engine.get()
+        settings = {
+            'ocr_engine': ocr_engine,
+            'green': self.green_threshold.get() / 100.0,
+            'yellow': self.yellow_threshold.get() / 100.0,
+            # None: next to each input file
+            'output_dir': self.output_directory,
+            # Previews are rendered when a row is clicked, not for every file
+            'preview': False,
+        }
+        if ocr_engine == "PaddleOCR":
+            # One engine; the second worker writes a file's outputs while the next one is OCR'd
+            workers = 2
+        else:
+            workers = max(1, (os.cpu_count() or 1) // 2)
+            self.engine_pool(ocr_engine).resize(workers)
+        self.batch = BatchRunner(self.jobs, self._batch_job, file_paths, settings, workers=workers,
+                                 on_update=self.update_batch_item, on_finished=self.batch_finished)
+        self.batch_table.load(self.batch.items)
+        self.batch_cancel_button.config(state=tk.NORMAL)
+        # Pack before everything else so the table keeps its strip along the bottom
+        slaves = self.main_frame.pack_slaves()
+        if self.batch_frame not in slaves:
+            self.batch_frame.pack(side=tk.BOTTOM, fill=tk.X, before=slaves[0])
+        self.update_batch_label()
+        self.batch.start()
+
+    def _batch_job(self, job, file_path, settings):
+        # Runs on a batch worker; every worker borrows from the same warm engine pool
+        settings = dict(settings, output_dir=settings['output_dir'] or os.path.dirname(file_path))
+        result = self._ocr_job(job, file_path, None, settings)
+        # Keep only what the result view needs; the image is read back from disk when the row is clicked
+        result.pop('annotated')
+        return result
+
+    def update_batch_item(self, item):
+        self.batch_table.update(item)
+        self.update_batch_label()
+
+    def update_batch_label(self):
+        counts = self.batch.counts()
+        finished = counts['done'] + counts['failed'] + counts['cancelled']
+        text = f"{finished}/{len(self.batch.items)} files processed, {counts['failed']} failed"
+        if counts['cancelled']:
+            text += f", {counts['cancelled']} cancelled"
+        self.batch_label.config(text=text)
+
+    def batch_finished(self, batch):
+        if batch is not self.batch:
+            return
+        self.batch_cancel_button.config(state=tk.DISABLED)
+        self.update_batch_label()
+        log_pool_stats()
+
+    def cancel_batch(self):
+        if self.batch is not None:
+            self.batch.cancel()
+
+    def close_batch(self):
+        self.cancel_batch()
+        self.batch_frame.pack_forget()
+
+    def show_batch_item(self, item):
+        if item.status == 'failed':
+            self.status_label.config(text=f"{os.path.basename(item.path)} failed: {str(item.error)}")
+        elif item.status == 'done':
+            # Loading the boxes image and drawing the preview happen on the job thread
+            self.jobs.submit(item.path, self._batch_result_job, item.result,
+                             on_done=self.show_job_result, on_error=self.show_job_error)
+
+    def _batch_result_job(self, job, result):
+        from OCR_Modules.preview import render_table_preview
+
+        annotated_image = Image.open(result['image_path'])
+        annotated_image.load()
+        preview = render_table_preview(result['rows'], result['green'], result['yellow'])
+        return dict(result, annotated=annotated_image, preview=preview)
 
     def take_screenshot(self):
         # Minimize the root window
@@ -226,18 +385,21 @@ class OCRApp:
             else:
                 # For screenshots, default to Desktop
                 output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
-            # Ensure output directory exists
-            os.makedirs(output_dir, exist_ok=True)
-            # Save the screenshot image
-            base_filename = "screenshot"
+            start = time.perf_counter()
             date_string = time.strftime("%Y-%m-%d_%H-%M-%S")
-            screenshot_path = os.path.join(output_dir, base_filename + "_" + date_string + ".png")
+            base_filename = "screenshot_" + date_string
+            # Clipboard images load lazily; decode once so the PNG save and OCR threads never race on it
+            image.load()
             self.is_screenshot = True
-            image.save(screenshot_path)
+            if self.save_screenshots.get():
+                from OCR_Modules.image_io import save_image_async
+                # Save the screenshot image in the background; OCR reads the in-memory image
+                save_image_async(image, os.path.join(output_dir, base_filename + ".png"))
             # Reset the UI before processing
             self.reset_ui()
             # Process the image
-            self.process_image(screenshot_path)
+            self.process_image(image, base_filename)
+            logger.info(f"Screenshot handed to OCR in {(time.perf_counter() - start) * 1000:.1f} ms without touching disk")
 
     def capture_screenshot(self):
         
@@ -281,123 +443,236 @@ class OCRApp:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
             raise Exception(f"Error capturing screenshot: {str(e)}")
 
-    def process_image(self, file_path):
-        # Start a new thread for processing
-        processing_thread = threading.Thread(target=self._process_image_thread, args=(file_path,))
-        processing_thread.start()
-
-    def _process_image_thread(self, file_path):
+    def engine_pool(self, ocr_engine):
+        if ocr_engine == "PaddleOCR":
+            from OCR_Modules.onnx_backend import default_backend
+            # OCR_PADDLE_BACKEND=onnx / onnx-int8 runs the models on ONNX Runtime
+            return get_paddle_pool(model_dir=os.path.join(self.app_dir, 'paddleocr', 'whl'), backend=default_backend())
+        if ocr_engine == "Tesseract":
+            return get_tesseract_pool(tesseract_cmd=os.path.join(self.app_dir, 'tesseract_binary', 'tesseract.exe'))
+        raise ValueError("Please select an OCR engine.")
+
+    def warm_up_engine(self, event=None):
+        ocr_engine = self.ocr_engine.get()
+        if ocr_engine in self.warming_engines:
+            return
+        self.warming_engines.add(ocr_engine)
+        self.engine_status_label.config(text=f"Loading {ocr_engine} model...")
+        # A request made meanwhile simply waits in the pool for this engine
+        threading.Thread(target=self._warm_up_thread, args=(ocr_engine,), daemon=True).start()
+
+    def _warm_up_thread(self, ocr_engine):
+        start = time.perf_counter()
         try:
-            ocr_engine = self.ocr_engine.get()
-
-            # Show progress bar in the center frame
-            self.progress_bar.pack(pady=(0, 10))
-            self.progress_bar.start()
+            for name in PIPELINE_MODULES:
+                importlib.import_module(name)
+            self.engine_pool(ocr_engine).warm_up(1)
+        except Exception as e:
+            # Let the next selection (or the first image) try again
+            self.warming_engines.discard(ocr_engine)
+            logger.error(f"Could not load {ocr_engine}: {str(e)}")
+            self.jobs.call_in_ui(self.engine_status_label.config, text=f"Could not load {ocr_engine}: {str(e)}")
+            return
+        logger.info(f"{ocr_engine} ready {time.perf_counter() - start:.2f}s after the warm-up started")
+        self.jobs.call_in_ui(self._engine_ready, ocr_engine)
+
+    def _engine_ready(self, ocr_engine):
+        if self.ocr_engine.get() == ocr_engine:
+            self.engine_status_label.config(text=f"{ocr_engine} ready")
+
+    def toggle_timings(self):
+        if self.record_timings.get():
+            instrumentation.enable(instrumentation.DEFAULT_TRACE_PATH)
+        else:
+            instrumentation.disable()
 
-            if ocr_engine == "PaddleOCR":
-                self.process_with_paddleocr(file_path)
+    def output_dir_for(self, file_path):
+        if self.output_directory:
+            return self.output_directory
+        if self.is_screenshot:
+            # For screenshots, default to Desktop
+            return os.path.join(os.path.expanduser("~"), "Desktop")
+        # For uploaded images, use the same directory as the image
+        return os.path.dirname(file_path)
+
+    def process_image(self, file_path, base_filename=None):
+        # file_path may also be an in-memory image, in which case base_filename names the outputs
+        from OCR_Modules.image_io import describe_source
+
+        # The job never touches Tk, so everything it needs from the widgets is read here
+        settings = {
+            'ocr_engine': self.ocr_engine.get(),
+            'green': self.green_threshold.get() / 100.0,
+            'yellow': self.yellow_threshold.get() / 100.0,
+            'output_dir': self.output_dir_for(file_path),
+        }
+        label = base_filename or describe_source(file_path)
+        self.progress_bar.config(value=0)
+        self.progress_bar.pack(pady=(0, 10))
+        self.status_label.config(text=f"Queued {os.path.basename(label)}...")
+        # A new image supersedes the one still being processed
+        self.jobs.submit(label, self._ocr_job, file_path, base_filename, settings, stages=JOB_STAGES,
+                         on_progress=self.show_progress, on_done=self.show_job_result, on_error=self.show_job_error)
+
+    def _ocr_job(self, job, file_path, base_filename, settings):
+        # Runs on the job thread: report through job.stage()/job.progress() only
+        from OCR_Modules.page_source import is_document
+
+        ocr_engine = settings['ocr_engine']
+        with instrumentation.trace_image(job.name, engine=ocr_engine) as record:
+            if isinstance(file_path, str) and is_document(file_path):
+                # PDFs and multi-frame TIFFs are streamed page by page into one workbook
+                result = self.process_document_file(job, file_path, settings)
+            elif ocr_engine == "PaddleOCR":
+                result = self.process_with_paddleocr(job, file_path, base_filename, settings)
             elif ocr_engine == "Tesseract":
-                self.process_with_tesseract(file_path)
+                result = self.process_with_tesseract(job, file_path, base_filename, settings)
             else:
                 raise ValueError("Please select an OCR engine.")
-        except Exception as e:
-            self.status_label.config(text=f"Error: {str(e)}\nPlease try a different image or OCR engine.")
-        finally:
-            # Hide progress bar
-            self.progress_bar.stop()
-            self.progress_bar.pack_forget()
-
-    def process_with_paddleocr(self, file_path):
-        try:
-            # Initialize OCR with explicit paths
-            ocr = initialize_ocr_SLANet_LCNetV2(
-                model_dir=os.path.join(self.app_dir, 'paddleocr', 'whl')
-            )
-            
-            data = paddle_process_image(file_path, ocr)
-            
-            rows = paddle_group_into_rows(data)
-            
-            # Determine the output directory
-            if self.output_directory:
-                output_dir = self.output_directory
-            else:
-                if self.is_screenshot:
-                    # For screenshots, default to Desktop
-                    output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
-                else:
-                    # For uploaded images, use the same directory as the image
-                    output_dir = os.path.dirname(file_path)
-            # Ensure output directory exists
-            os.makedirs(output_dir, exist_ok=True)
-            # Create the output filenames
-            base_filename = os.path.splitext(os.path.basename(file_path))[0]
-            output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
-            output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
-
-            # Get thresholds from dropdowns
-            green_thresh = self.green_threshold.get() / 100.0
-            yellow_thresh = self.yellow_threshold.get() / 100.0
-
-            paddle_save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
+        if record is not None:
+            result['message'] += f"\n{instrumentation.format_record(record)}"
+        return result
 
-            paddle_draw_bounding_boxes(file_path, data, output_image_path)
+    def show_progress(self, job, percent, message):
+        if percent is not None:
+            self.progress_bar.config(value=percent)
+        if message:
+            self.status_label.config(text=message)
 
-            self.status_label.config(text=f"Excel file saved: {output_xlsx}")
-            self.display_results(output_image_path, output_xlsx)
-        except Exception as e:
-            self.status_label.config(text=f"Error: {str(e)}\nPlease try a different image or OCR engine.")
+    def show_job_result(self, job, result):
+        self.progress_bar.pack_forget()
+        self.status_label.config(text=result['message'])
+        self.display_results(result['annotated'], result['rows'], result['green'], result['yellow'],
+                             preview=result['preview'])
 
-    def process_with_tesseract(self, file_path):
-        try:
-            # Initialize Tesseract with explicit paths
-            ocr = initialize_tesseract(
-                tesseract_cmd=os.path.join(self.app_dir, 'tesseract_binary', 'tesseract.exe')
+    def show_job_error(self, job, error):
+        self.progress_bar.pack_forget()
+        self.status_label.config(text=f"Error: {str(error)}\nPlease try a different image or OCR engine.")
+
+    def process_with_paddleocr(self, job, file_path, base_filename, settings):
+        from OCR_Modules import paddleOCR
+        from OCR_Modules.ocr_cache import cached_process_image, get_default_cache, model_files
+        from OCR_Modules.onnx_backend import default_backend, ocr_cache_params
+
+        # Borrow the engine loaded by the warm-up (or load it now if that hasn't run)
+        job.stage('Loading engine')
+        model_dir = os.path.join(self.app_dir, 'paddleocr', 'whl')
+        pool = self.engine_pool("PaddleOCR")
+        with pool.engine() as ocr:
+            job.stage('Recognising text')
+            # Re-runs of the same image (e.g. with new thresholds) come from the OCR cache
+            data = cached_process_image(
+                paddleOCR.process_image, file_path, ocr, 'PaddleOCR',
+                cache=get_default_cache(),
+                model_files=model_files(model_dir),
+                params=ocr_cache_params(default_backend())
             )
-            
-            data = tesseract_process_image(file_path, ocr)
-
-            if not data:
-                raise ValueError("No data extracted from image.")
-
-            rows = tesseract_group_into_rows(data)
-
-            if not rows:
-                raise ValueError("No rows extracted from data.")
-
-            # Determine the output directory
-            if self.output_directory:
-                output_dir = self.output_directory
-            else:
-                if self.is_screenshot:
-                    # For screenshots, default to Desktop
-                    output_dir = os.path.join(os.path.expanduser("~"), "Desktop")
-                else:
-                    # For uploaded images, use the same directory as the image
-                    output_dir = os.path.dirname(file_path)
-            # Ensure output directory exists
-            os.makedirs(output_dir, exist_ok=True)
-            # Create the output filenames
+        log_pool_stats()
+        get_default_cache().log_stats()
+        return self.write_results(job, paddleOCR, file_path, base_filename, data, settings)
+
+    def process_with_tesseract(self, job, file_path, base_filename, settings):
+        from OCR_Modules import tesseractOCR
+        from OCR_Modules.ocr_cache import cached_process_image, get_default_cache
+
+        # Borrow Tesseract with explicit paths; the pool keeps the in-process API handle warm
+        job.stage('Loading engine')
+        pool = self.engine_pool("Tesseract")
+        with pool.engine() as ocr:
+            job.stage('Recognising text')
+            data = cached_process_image(
+                tesseractOCR.process_image, file_path, ocr, 'Tesseract',
+                cache=get_default_cache(),
+                model_files=[os.path.join(self.app_dir, 'tessdata', 'eng.traineddata')],
+                params=tesseractOCR.engine_params(ocr)
+            )
+        return self.write_results(job, tesseractOCR, file_path, base_filename, data, settings)
+
+    def write_results(self, job, module, file_path, base_filename, data, settings):
+        """Grid, xlsx, bounding box image and table preview for one OCR'd image (job thread)."""
+        from OCR_Modules.preview import render_table_preview
+        from OCR_Modules.table_layout import group_into_grid
+
+        if not data:
+            raise ValueError("No data extracted from image.")
+        job.stage('Building table')
+        rows = group_into_grid(data)
+        if not rows:
+            raise ValueError("No rows extracted from data.")
+
+        output_dir = settings['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        if base_filename is None:
             base_filename = os.path.splitext(os.path.basename(file_path))[0]
-            output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
-            output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
-
-            # Get thresholds from dropdowns
-            green_thresh = self.green_threshold.get() / 100.0
-            yellow_thresh = self.yellow_threshold.get() / 100.0
-
-            tesseract_save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
-
-            tesseract_draw_bounding_boxes(file_path, data, output_image_path)
+        output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
+        output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
+        green_thresh, yellow_thresh = settings['green'], settings['yellow']
+
+        job.stage('Writing Excel')
+        module.save_as_xlsx(rows, output_xlsx, green_thresh, yellow_thresh)
+        job.stage('Drawing boxes')
+        annotated_image = module.draw_bounding_boxes(file_path, data, output_image_path)
+        # The preview is drawn here too, so the Tk thread only has to show it
+        job.stage('Rendering preview')
+        preview = render_table_preview(rows, green_thresh, yellow_thresh) if settings.get('preview', True) else None
+        return {'message': f"Excel file saved: {output_xlsx}", 'annotated': annotated_image, 'rows': rows,
+                'preview': preview, 'green': green_thresh, 'yellow': yellow_thresh,
+                'xlsx': output_xlsx, 'image_path': output_image_path}
+
+    def process_document_file(self, job, file_path, settings):
+        from OCR_Modules.page_source import page_count, process_document
+        from OCR_Modules.preview import render_table_preview
+
+        ocr_engine = settings['ocr_engine']
+        job.stage('Loading engine')
+        pool = self.engine_pool(ocr_engine)
+        if ocr_engine == "PaddleOCR":
+            from OCR_Modules import paddleOCR as module
+            # A PaddleOCR engine must not be shared between threads
+            workers = 1
+        else:
+            from OCR_Modules import tesseractOCR as module
+            workers = max(1, (os.cpu_count() or 1) // 2)
+        process_page, draw_bounding_boxes = module.process_image, module.draw_bounding_boxes
+
+        output_dir = settings['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        base_filename = os.path.splitext(os.path.basename(file_path))[0]
+        output_xlsx = os.path.join(output_dir, base_filename + "_output.xlsx")
+        output_image_path = os.path.join(output_dir, base_filename + "_output_image.jpg")
+        green_thresh, yellow_thresh = settings['green'], settings['yellow']
+        total = page_count(file_path)
+
+        # Keep only the first page with text for the on-screen preview
+        first_page = {}
+        def on_page(page_number, page, data, rows):
+            if not first_page and data:
+                first_page.update(page=page, data=data, rows=rows)
+            # Also where a superseded document stops, between two pages
+            job.progress(page_number / total, f"Processed page {page_number} of {total}...")
+
+        with pool.engine() as ocr:
+            job.stage('Recognising text', f"Processing {total} pages...")
+            summary = process_document(
+                file_path, lambda page: process_page(page, ocr), output_xlsx,
+                green_thresh, yellow_thresh, workers=workers, on_page=on_page
+            )
 
-            self.status_label.config(text=f"Excel file saved: {output_xlsx}")
-            self.display_results(output_image_path, output_xlsx)
-        except ValueError as ve:
-            self.status_label.config(text=f"Error: {str(ve)}\nPlease try a different image or OCR engine.")
-        except Exception as e:
-            self.status_label.config(text=f"Unexpected error: {str(e)}\nPlease try a different image or OCR engine.")
+        if not first_page:
+            raise ValueError("No text extracted from any page.")
+        job.stage('Drawing boxes')
+        annotated_image = draw_bounding_boxes(first_page['page'], first_page['data'], output_image_path)
+        job.stage('Rendering preview')
+        preview = None
+        if settings.get('preview', True):
+            preview = render_table_preview(first_page['rows'], green_thresh, yellow_thresh)
+        return {'message': f"Excel file saved: {output_xlsx} ({summary['pages']} pages, {summary['failed']} failed)",
+                'annotated': annotated_image, 'rows': first_page['rows'], 'preview': preview,
+                'green': green_thresh, 'yellow': yellow_thresh, 'xlsx': output_xlsx, 'image_path': output_image_path}
+
+    def display_results(self, image, rows, green_thresh, yellow_thresh, preview=None):
+        from OCR_Modules.preview import render_table_preview
 
-    def display_results(self, image_path, excel_path):
         self.reorganize_layout()
 
         # Clear previous images
@@ -409,16 +684,15 @@ class OCRApp:
             widget.destroy()
 
         # Display image with bounding boxes
-        self.display_image(image_path, self.left_frame)
+        self.display_image(image, self.left_frame)
 
-        # Display Excel image
-        excel_image_path = os.path.splitext(excel_path)[0] + "_excel_image.png"
-        self.generate_excel_image(excel_path, excel_image_path)
+        # Display the Excel preview, drawn from the OCR grid already in memory (or by the job)
+        excel_image = preview if preview is not None else render_table_preview(rows, green_thresh, yellow_thresh)
 
         # Add padding to the middle frame
         padding_frame = ttk.Frame(self.middle_frame, padding=20)
         padding_frame.pack(fill=tk.BOTH, expand=True)
-        self.display_image(excel_image_path, padding_frame)
+        self.display_image(excel_image, padding_frame)
 
         # Setup the sidebar
         self.setup_sidebar()
@@ -450,8 +724,11 @@ class OCRApp:
         ocr_dropdown = ttk.Combobox(top_inner_frame, textvariable=self.ocr_engine, state="readonly", width=20)
         ocr_dropdown['values'] = ('PaddleOCR', 'Tesseract')
         ocr_dropdown.pack(side=tk.LEFT, padx=(0, 10))
+        ocr_dropdown.bind('<<ComboboxSelected>>', self.warm_up_engine)
         upload_button = ttk.Button(top_inner_frame, text="Upload Image", command=self.select_image)
         upload_button.pack(side=tk.LEFT, padx=(0, 10))
+        upload_folder_button = ttk.Button(top_inner_frame, text="Upload Folder", command=self.select_folder)
+        upload_folder_button.pack(side=tk.LEFT, padx=(0, 10))
 
         # Add Screenshot Button with Icon
         screenshot_icon = Image.open(os.path.join('icons', 'screenshoticon.png'))
@@ -480,90 +757,11 @@ class OCRApp:
         self.right_frame.pack(side=tk.RIGHT, fill=tk.Y)
 
     def display_image(self, image_path, panel):
-        image = Image.open(image_path)
-
-        # Create a canvas to display the image
-        canvas = tk.Canvas(panel, bg='white')
-        canvas.pack(fill=tk.BOTH, expand=True)
-
-        # Function to resize the image when the panel size changes
-        def resize_image(event):
-            # Get the size of the canvas
-            canvas_width = event.width
-            canvas_height = event.height
-
-            # Calculate the scaling factor
-            width_ratio = canvas_width / image.width
-            height_ratio = canvas_height / image.height
-            scale_factor = min(width_ratio, height_ratio, 1.0)  # Do not upscale images
-
-            new_width = int(image.width * scale_factor)
-            new_height = int(image.height * scale_factor)
+        # Accepts a file path or an already rendered PIL image
+        image = image_path if isinstance(image_path, Image.Image) else Image.open(image_path)
 
-            resized_image = image.resize((new_width, new_height), Image.LANCZOS)
-            photo = ImageTk.PhotoImage(resized_image)
-
-            canvas.delete("all")
-            canvas.create_image(canvas_width/2, canvas_height/2, image=photo, anchor='center')
-            canvas.image = photo  # Keep a reference
-
-        # Bind the resize event to the function
-        canvas.bind("<Configure>", resize_image)
-
-    def generate_excel_image(self, excel_path, output_image_path):
-        from openpyxl import load_workbook
-        from PIL import Image, ImageDraw, ImageFont
-
-        wb = load_workbook(excel_path)
-        ws = wb.active
-
-        # Increase cell size and font size
-        cell_width = 90
-        cell_height = 30
-        font_size = 20
-        border_size = 40  # Increased border size
-
-        max_col = ws.max_column
-        max_row = ws.max_row
-        image_width = cell_width * max_col + 2 * border_size
-        image_height = cell_height * max_row + 2 * border_size
-
-        image = Image.new('RGB', (image_width, image_height), 'white')
-        draw = ImageDraw.Draw(image)
-        try:
-            font = ImageFont.truetype("arial.ttf", font_size)
-        except:
-            font = ImageFont.load_default()
-
-        for row in ws.iter_rows():
-            for cell in row:
-                col_idx = cell.column - 1
-                row_idx = cell.row - 1
-                x1 = col_idx * cell_width + border_size
-                y1 = row_idx * cell_height + border_size
-                x2 = x1 + cell_width
-                y2 = y1 + cell_height
-
-                # Draw cell background
-                fill_color = 'FFFFFF'  # Default fill
-                if cell.fill and cell.fill.fgColor:
-                    if cell.fill.fgColor.type == 'rgb':
-                        fill_color = cell.fill.fgColor.rgb[-6:]
-                    elif cell.fill.fgColor.type == 'indexed':
-                        fill_color = 'FFFFFF'  # Handle indexed colors as white
-
-                draw.rectangle([x1, y1, x2, y2], fill=f'#{fill_color}', outline='black')
-
-                # Draw cell text
-                text = str(cell.value) if cell.value is not None else ''
-                bbox = font.getbbox(text)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-                text_x = x1 + (cell_width - text_width) / 2
-                text_y = y1 + (cell_height - text_height) / 2
-                draw.text((text_x, text_y), text, fill='black', font=font)
-
-        image.save(output_image_path)
+        # Pyramid-backed canvas: debounced resizing, cached redraws, wheel zoom and drag to pan
+        return ImageViewer(panel, image, bg='white')
 
     def setup_sidebar(self):
         # Sidebar content
@@ -635,9 +833,9 @@ class OCRApp:
 
         # Enhanced Disclaimer Text
         disclaimer_text = (
-            "Note: When the input image contains a table with missing data in some rows or columns, "
-            "the extracted data may not align perfectly in the output Excel file. "
-            "Empty cells might cause subsequent data to shift positions, resulting in misaligned columns. "
+            "Note: Columns are detected from the gaps between text, so empty cells are kept empty. "
+            "Tables with merged cells or very little spacing between columns "
+            "may still not align perfectly in the output Excel file. "
             "Please review the Excel output carefully and adjust as needed."
         )
         disclaimer_message = ttk.Label(disclaimer_frame, text=disclaimer_text, wraplength=250, justify='left')